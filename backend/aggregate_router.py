@@ -0,0 +1,450 @@
+"""
+Answers GROUP BY queries over Fact_Delays from the ETL's aggregate tables.
+
+A query is rewritten when it is a single SELECT over Fact_Delays, inner-joined
+only to Dim_Airline / Dim_Airport through the fact's foreign keys, and every
+fact measure it reads is an aggregate the Agg_Delays_* tables can rebuild
+exactly:
+
+    COUNT(*), COUNT/SUM/AVG of arrival_delay, departure_delay and the cause
+    delays, MAX(departure_delay), AVG(CASE WHEN departure_delay > 15 THEN
+    departure_delay END), and conditional counts (SUM(CASE WHEN ... THEN 1
+    ELSE 0 END) / COUNT(CASE WHEN ... THEN 1 END)) on arrival_delay <= 0,
+    arrival_delay > 15, is_delayed = 1 and departure_delay > 15
+
+WHERE may filter dimension columns and foreign keys freely; on fact measures
+it may only use the filters the aggregate flags encode (arrival_delay IS NOT
+NULL, is_delayed = 0/1, arrival_delay > 15, departure_delay IS NOT NULL).
+The smallest table whose grain covers the referenced keys is used. Anything
+else runs against Fact_Delays, with the reason recorded.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+import sqlglot
+from sqlglot import exp
+
+from result_cache import normalize_sql
+
+FACT_TABLE = "Fact_Delays"
+DIALECT = "tsql"
+DELAYED_THRESHOLD = 15
+
+# Grain keys of each aggregate table, smallest first
+AGGREGATE_TABLES = OrderedDict([
+    ("Agg_Delays_Carrier", {"airline_key"}),
+    ("Agg_Delays_OriginAirport", {"origin_airport_key"}),
+    ("Agg_Delays_RouteCarrier", {"airline_key", "origin_airport_key", "dest_airport_key"})
+])
+KEY_COLUMNS = {"airline_key", "origin_airport_key", "dest_airport_key"}
+CAUSE_COLUMNS = {"carrier_delay", "weather_delay", "nas_delay", "security_delay", "late_aircraft_delay"}
+MEASURE_COLUMNS = {"arrival_delay", "departure_delay", "is_delayed"} | CAUSE_COLUMNS
+FACT_COLUMNS = KEY_COLUMNS | MEASURE_COLUMNS | {
+    "delay_key", "date_key", "flight_number", "total_delay_minutes", "delay_category"
+}
+# Dimension table -> {dimension key: fact foreign keys that may join it}
+DIMENSION_JOINS = {
+    "dim_airline": {"airline_key": {"airline_key"}},
+    "dim_airport": {"airport_key": {"origin_airport_key", "dest_airport_key"}}
+}
+
+Route = namedtuple("Route", ["sql", "source", "reason"])
+
+
+class NotRoutable(Exception):
+    """The query cannot be answered from an aggregate table; the message says why"""
+
+
+class NotApplicable(NotRoutable):
+    """The query does not read Fact_Delays at all (not counted against the hit rate)"""
+
+
+def number(node):
+    if isinstance(node, exp.Neg) and isinstance(node.this, exp.Literal):
+        value = number(node.this)
+        return None if value is None else -value
+    if isinstance(node, exp.Literal) and not node.is_string:
+        return float(node.this)
+    return None
+
+
+class QueryShape:
+    """Table aliases, fact population filters and referenced keys of one parsed SELECT"""
+
+    def __init__(self, select):
+        self.select = select
+        from_ = select.args.get("from_")
+        if from_ is None or not isinstance(from_.this, exp.Table) or from_.this.name.lower() != FACT_TABLE.lower():
+            raise NotApplicable("not a query over Fact_Delays")
+        self.fact = from_.this
+        self.alias = self.fact.alias_or_name
+        self.owners = {self.alias.lower(): "fact"}
+        self.keys = set()
+        self.output_names = {e.alias_or_name.lower() for e in select.expressions if e.alias_or_name}
+        # Population of fact rows the query aggregates over
+        self.arrival_reported = False
+        self.is_delayed = None
+        self.departure_reported = False
+
+    def owner(self, column):
+        """'fact', a dimension table name, or None for select-list aliases"""
+        table = column.table.lower()
+        name = column.name.lower()
+        if table:
+            if table not in self.owners:
+                raise NotRoutable(f"unknown table alias '{column.table}'")
+            return self.owners[table]
+        if name in FACT_COLUMNS:
+            return "fact"
+        if name in self.output_names:
+            return None
+        return "dimension"
+
+    def fact_measure(self, node):
+        """Fact measure column name read by node (a column, or one CAST to FLOAT), else None"""
+        cast_to_float = False
+        if isinstance(node, exp.Cast) and node.to.this in (exp.DataType.Type.FLOAT, exp.DataType.Type.DOUBLE):
+            node, cast_to_float = node.this, True
+        if isinstance(node, exp.Column) and self.owner(node) == "fact" and node.name.lower() in MEASURE_COLUMNS:
+            return node.name.lower(), cast_to_float
+        return None
+
+    def reads_fact_measures(self, node):
+        return any(self.owner(column) == "fact" and column.name.lower() in MEASURE_COLUMNS
+                   for column in node.find_all(exp.Column))
+
+    @property
+    def arrival_population(self):
+        return self.arrival_reported or self.is_delayed == 1
+
+
+def parse_select(query):
+    try:
+        statements = [statement for statement in sqlglot.parse(query, read=DIALECT) if statement is not None]
+    except sqlglot.errors.SqlglotError:
+        raise NotApplicable("query could not be parsed")
+    if len(statements) != 1 or not isinstance(statements[0], exp.Select):
+        raise NotApplicable("not a single SELECT")
+    select = statements[0]
+    if select.args.get("with_") or select.args.get("with"):
+        raise NotRoutable("common table expressions")
+    if any(node is not select for node in select.find_all(exp.Select)):
+        raise NotRoutable("subqueries")
+    if select.find(exp.Window):
+        raise NotRoutable("window functions")
+    if any(isinstance(e, exp.Star) or (isinstance(e, exp.Column) and isinstance(e.this, exp.Star))
+           for e in select.expressions):
+        raise NotRoutable("SELECT *")
+    return select
+
+
+def read_joins(shape):
+    for join in shape.select.args.get("joins") or []:
+        dimension = join.this
+        if not isinstance(dimension, exp.Table) or dimension.name.lower() not in DIMENSION_JOINS:
+            raise NotRoutable("joins other than Dim_Airline / Dim_Airport")
+        if join.side or (join.kind and join.kind.upper() != "INNER") or join.args.get("using"):
+            raise NotRoutable("only INNER JOIN ... ON is supported")
+        shape.owners[dimension.alias_or_name.lower()] = dimension.name.lower()
+
+    for join in shape.select.args.get("joins") or []:
+        dimension = join.this.name.lower()
+        condition = join.args.get("on")
+        if not isinstance(condition, exp.EQ):
+            raise NotRoutable("join condition is not a single key equality")
+        sides = {shape.owner(column): column.name.lower() for column in (condition.this, condition.expression)
+                 if isinstance(column, exp.Column)}
+        dimension_key = sides.get(dimension)
+        fact_key = sides.get("fact")
+        if dimension_key not in DIMENSION_JOINS[dimension] or fact_key not in DIMENSION_JOINS[dimension][dimension_key]:
+            raise NotRoutable(f"{join.this.name} is not joined on a fact foreign key")
+        shape.keys.add(fact_key)
+
+
+def read_filters(shape):
+    """Turn fact-measure conjuncts of WHERE into population flags; return the other conjuncts"""
+    where = shape.select.args.get("where")
+    if where is None:
+        return []
+    kept = []
+    arrival_lower_bounds = []
+    for conjunct in where.this.flatten() if isinstance(where.this, exp.And) else [where.this]:
+        if not shape.reads_fact_measures(conjunct):
+            kept.append(conjunct)
+            continue
+        if isinstance(conjunct, exp.Not) and isinstance(conjunct.this, exp.Is) \
+                and isinstance(conjunct.this.expression, exp.Null):
+            measure = shape.fact_measure(conjunct.this.this)
+            if measure and measure[0] == "arrival_delay":
+                shape.arrival_reported = True
+                continue
+            if measure and measure[0] == "departure_delay":
+                shape.departure_reported = True
+                continue
+        if isinstance(conjunct, exp.EQ):
+            measure = shape.fact_measure(conjunct.this)
+            value = number(conjunct.expression)
+            if measure and measure[0] == "is_delayed" and value in (0, 1):
+                if shape.is_delayed is not None and shape.is_delayed != value:
+                    raise NotRoutable("contradictory is_delayed filters")
+                shape.is_delayed = int(value)
+                continue
+        if isinstance(conjunct, exp.GT):
+            measure = shape.fact_measure(conjunct.this)
+            value = number(conjunct.expression)
+            if measure and measure[0] == "arrival_delay" and value is not None and value <= DELAYED_THRESHOLD:
+                arrival_lower_bounds.append(value)
+                continue
+        raise NotRoutable(f"filter on fact measures: {conjunct.sql(dialect=DIALECT)}")
+
+    if arrival_lower_bounds:
+        # is_delayed = 1 is exactly arrival_delay > 15; weaker bounds are implied by it
+        if DELAYED_THRESHOLD in arrival_lower_bounds and shape.is_delayed in (None, 1):
+            shape.is_delayed = 1
+        elif shape.is_delayed != 1:
+            raise NotRoutable("arrival_delay bound other than > 15 without is_delayed = 1")
+    return kept
+
+
+def conditional_count(shape, condition):
+    """Aggregate-table count of the rows matching a CASE condition"""
+    if isinstance(condition, exp.LTE):
+        measure = shape.fact_measure(condition.this)
+        if measure and measure[0] == "arrival_delay" and number(condition.expression) == 0:
+            return arrival_only(shape, "SUM({a}.on_time_count)")
+    if isinstance(condition, exp.GT):
+        measure = shape.fact_measure(condition.this)
+        if measure and number(condition.expression) == DELAYED_THRESHOLD:
+            if measure[0] == "arrival_delay":
+                return arrival_only(shape, "SUM(CASE WHEN {a}.is_delayed = 1 THEN {a}.flight_count ELSE 0 END)")
+            if measure[0] == "departure_delay":
+                return "SUM({a}.dep_delayed_count)"
+    if isinstance(condition, exp.EQ):
+        measure = shape.fact_measure(condition.this)
+        if measure and measure[0] == "is_delayed" and number(condition.expression) == 1:
+            return arrival_only(shape, "SUM(CASE WHEN {a}.is_delayed = 1 THEN {a}.flight_count ELSE 0 END)")
+    raise NotRoutable(f"conditional count on {condition.sql(dialect=DIALECT)}")
+
+
+def arrival_only(shape, template):
+    """Arrival and cause measures are not split by departure_delay IS NOT NULL"""
+    if shape.departure_reported:
+        raise NotRoutable("arrival or cause measure filtered on departure_delay IS NOT NULL")
+    return template
+
+
+def arrival_count(shape):
+    if shape.arrival_population:
+        return "SUM({a}.flight_count)"
+    return "SUM(CASE WHEN {a}.arrival_reported = 1 THEN {a}.flight_count ELSE 0 END)"
+
+
+def case_count_condition(node, else_value):
+    """The condition of CASE WHEN cond THEN 1 [ELSE else_value] END, or None"""
+    if not isinstance(node, exp.Case) or node.this is not None or len(node.args.get("ifs") or []) != 1:
+        return None
+    when = node.args["ifs"][0]
+    default = node.args.get("default")
+    if number(when.args.get("true")) != 1:
+        return None
+    if else_value is None and default is not None and not isinstance(default, exp.Null):
+        return None
+    if else_value is not None and number(default) != else_value:
+        return None
+    return when.this
+
+
+def translate_aggregate(shape, node):
+    """SQL template ({a} = aggregate table alias) equal to one aggregate over the fact rows"""
+    if isinstance(node, exp.Count):
+        argument = node.this
+        if isinstance(argument, exp.Distinct):
+            raise NotRoutable("COUNT(DISTINCT ...)")
+        if isinstance(argument, exp.Star) or number(argument) is not None:
+            return "COALESCE(SUM({a}.dep_delay_count), 0)" if shape.departure_reported \
+                else "COALESCE(SUM({a}.flight_count), 0)"
+        condition = case_count_condition(argument, None)
+        if condition is not None:
+            return f"COALESCE({conditional_count(shape, condition)}, 0)"
+        measure = shape.fact_measure(argument)
+        if measure and measure[0] == "arrival_delay":
+            return f"COALESCE({arrival_only(shape, arrival_count(shape))}, 0)"
+        if measure and measure[0] == "departure_delay":
+            return "COALESCE(SUM({a}.dep_delay_count), 0)"
+        if measure and measure[0] in CAUSE_COLUMNS:
+            return arrival_only(shape, f"COALESCE(SUM({{a}}.{measure[0]}_count), 0)")
+
+    elif isinstance(node, exp.Sum):
+        condition = case_count_condition(node.this, 0)
+        if condition is not None:
+            return conditional_count(shape, condition)
+        measure = shape.fact_measure(node.this)
+        if measure and measure[0] == "arrival_delay":
+            count = arrival_only(shape, arrival_count(shape))
+            return f"CASE WHEN {count} > 0 THEN SUM({{a}}.arr_delay_sum) END"
+        if measure and measure[0] == "departure_delay":
+            return "CASE WHEN SUM({a}.dep_delay_count) > 0 THEN SUM({a}.dep_delay_sum) END"
+        if measure and measure[0] in CAUSE_COLUMNS:
+            total = f"SUM({{a}}.{measure[0]}_sum)"
+            if measure[1]:
+                total = f"CAST({total} AS FLOAT)"
+            return arrival_only(shape, f"CASE WHEN SUM({{a}}.{measure[0]}_count) > 0 THEN {total} END")
+
+    elif isinstance(node, exp.Avg):
+        measure = shape.fact_measure(node.this)
+        if measure and measure[0] == "arrival_delay":
+            count = arrival_only(shape, arrival_count(shape))
+            return f"SUM({{a}}.arr_delay_sum) / NULLIF({count}, 0)"
+        if measure and measure[0] == "departure_delay":
+            return "SUM({a}.dep_delay_sum) / NULLIF(SUM({a}.dep_delay_count), 0)"
+        if measure and measure[0] in CAUSE_COLUMNS:
+            # AVG of the SMALLINT column is integer division; AVG(CAST(... AS FLOAT)) is not
+            total = f"SUM({{a}}.{measure[0]}_sum)"
+            if measure[1]:
+                total = f"CAST({total} AS FLOAT)"
+            return arrival_only(shape, f"{total} / NULLIF(SUM({{a}}.{measure[0]}_count), 0)")
+        case = node.this
+        if isinstance(case, exp.Case) and case.this is None and len(case.args.get("ifs") or []) == 1 \
+                and case.args.get("default") is None:
+            when = case.args["ifs"][0]
+            result = shape.fact_measure(when.args.get("true"))
+            if result and result[0] == "departure_delay" \
+                    and conditional_count(shape, when.this) == "SUM({a}.dep_delayed_count)":
+                return "SUM({a}.dep_delayed_sum) / NULLIF(SUM({a}.dep_delayed_count), 0)"
+
+    elif isinstance(node, exp.Max):
+        measure = shape.fact_measure(node.this)
+        if measure and measure[0] == "departure_delay":
+            return "MAX({a}.dep_delay_max)"
+
+    raise NotRoutable(f"unsupported aggregate {node.sql(dialect=DIALECT)}")
+
+
+def population_filters(shape):
+    filters = []
+    if shape.arrival_reported:
+        filters.append("{a}.arrival_reported = 1")
+    if shape.is_delayed is not None:
+        filters.append(f"{{a}}.is_delayed = {shape.is_delayed}")
+    if shape.departure_reported:
+        filters.append("{a}.dep_delay_count > 0")
+    return filters
+
+
+def inside(node, replaced):
+    while node is not None:
+        if id(node) in replaced:
+            return True
+        node = node.parent
+    return False
+
+
+def rewrite(query):
+    """
+    (aggregate SQL, aggregate table name) for a query the aggregates can answer;
+    raises NotRoutable otherwise
+    """
+    select = parse_select(query)
+    shape = QueryShape(select)
+    read_joins(shape)
+    kept_filters = read_filters(shape)
+
+    clauses = [select.args.get(name) for name in ("group", "having", "order")]
+    scopes = [e for e in select.expressions] + [clause for clause in clauses if clause is not None]
+    if select.args.get("group") is None and not any(e.find(exp.AggFunc) for e in select.expressions):
+        raise NotRoutable("no GROUP BY or aggregate")
+
+    alias = exp.to_identifier(shape.alias).sql(dialect=DIALECT)
+    replacements = {}
+    for scope in scopes:
+        for node in scope.find_all(exp.AggFunc):
+            if shape.reads_fact_measures(node) or (isinstance(node, exp.Count) and isinstance(node.this, exp.Star)) \
+                    or (isinstance(node, exp.Count) and number(node.this) is not None):
+                template = translate_aggregate(shape, node)
+                replacements[id(node)] = sqlglot.parse_one(template.format(a=alias), read=DIALECT)
+            elif not (isinstance(node, (exp.Min, exp.Max)) or isinstance(node.this, exp.Distinct)):
+                # Over aggregate rows only duplicate-insensitive aggregates keep their value
+                raise NotRoutable(f"unsupported aggregate {node.sql(dialect=DIALECT)}")
+
+    for scope in scopes + kept_filters:
+        for column in scope.find_all(exp.Column):
+            if inside(column, replacements) or shape.owner(column) != "fact":
+                continue
+            name = column.name.lower()
+            if name not in KEY_COLUMNS:
+                raise NotRoutable(f"fact column {column.sql(dialect=DIALECT)} outside a supported aggregate")
+            shape.keys.add(name)
+
+    table = next((name for name, keys in AGGREGATE_TABLES.items() if shape.keys <= keys), None)
+    if table is None:
+        raise NotRoutable("no aggregate table covers the joined keys")
+
+    for scope in scopes:
+        scope.transform(lambda node: replacements.get(id(node), node), copy=False)
+    # transform() cannot replace a root node in place
+    select.set("expressions", [replacements.get(id(e), e) for e in select.expressions])
+
+    filters = [sqlglot.parse_one(f.format(a=alias), read=DIALECT) for f in population_filters(shape)] + kept_filters
+    select.set("where", exp.Where(this=exp.and_(*filters)) if filters else None)
+    shape.fact.set("this", exp.to_identifier(table))
+    if not shape.fact.args.get("alias"):
+        shape.fact.set("alias", exp.TableAlias(this=exp.to_identifier(shape.alias)))
+    return select.sql(dialect=DIALECT), table
+
+
+class AggregateRouter:
+    """Memoized rewrite decisions plus routed / fallback counters for hit-rate metrics"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._routes = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"routed": 0, "fallback": 0, "not_applicable": 0}
+        self._tables = {}
+        self._reasons = {}
+
+    def route(self, query, available=True):
+        """Route for query; with available=False (aggregates missing or stale) routable queries fall back"""
+        key = normalize_sql(query)
+        with self._lock:
+            decision = self._routes.get(key)
+            if decision is not None:
+                self._routes.move_to_end(key)
+        if decision is None:
+            try:
+                sql, table = rewrite(query)
+                decision = ("routed", sql, table, None)
+            except NotApplicable as e:
+                decision = ("not_applicable", None, None, str(e))
+            except NotRoutable as e:
+                decision = ("fallback", None, FACT_TABLE, str(e))
+            with self._lock:
+                self._routes[key] = decision
+                while len(self._routes) > self.max_entries:
+                    self._routes.popitem(last=False)
+
+        outcome, sql, source, reason = decision
+        if outcome == "routed" and not available:
+            outcome, sql, source, reason = "fallback", None, FACT_TABLE, "aggregate tables unavailable or out of sync"
+        self.record(outcome, source, reason)
+        return Route(sql or query, source, reason)
+
+    def record(self, outcome, source=None, reason=None):
+        with self._lock:
+            self._stats[outcome] += 1
+            if outcome == "routed":
+                self._tables[source] = self._tables.get(source, 0) + 1
+            elif outcome == "fallback":
+                self._reasons[reason] = self._reasons.get(reason, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            eligible = self._stats["routed"] + self._stats["fallback"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["routed"] / eligible, 3) if eligible else 0.0,
+                "tables": dict(self._tables),
+                "fallback_reasons": dict(self._reasons),
+                "memoized": len(self._routes)
+            }
@@ -0,0 +1,131 @@
+"""
+Payload size and serialization time of the query result formats (no database).
+
+Builds a synthetic result shaped like a Fact_Delays extract (pyodbc value
+types: int, Decimal, float, str, date, NULLs) and encodes it the way each
+response path does:
+    rows       FastAPI default - jsonable_encoder + json.dumps of row dicts
+    columnar   column-major JSON (result_formats.columnar_json_bytes)
+    arrow      Arrow IPC stream (result_formats.arrow_record_batch + IPC writer)
+
+Usage:
+    python benchmark_formats.py --rows 100000
+"""
+
+import argparse
+import datetime
+import decimal
+import gzip
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+import result_formats
+from result_formats import arrow_ipc_bytes, arrow_record_batch, arrow_schema, columnar_json_bytes, transpose
+
+CARRIERS = ['AA', 'DL', 'UA', 'WN', 'B6', 'AS', 'NK', 'F9', 'G4', 'HA', 'MQ', 'OO', 'YX', '9E', 'OH']
+AIRPORTS = ['ATL', 'DFW', 'DEN', 'ORD', 'LAX', 'JFK', 'LAS', 'MCO', 'MIA', 'CLT', 'SEA', 'PHX', 'EWR', 'SFO']
+CHUNK_ROWS = 5000
+
+# (name, type_code, display_size, internal_size, precision, scale, null_ok) as pyodbc reports it
+DESCRIPTION = [
+    ('delay_key', int, None, 10, 10, 0, False),
+    ('full_date', datetime.date, None, 10, 10, 0, True),
+    ('carrier_code', str, None, 10, 10, 0, True),
+    ('origin', str, None, 10, 10, 0, True),
+    ('destination', str, None, 10, 10, 0, True),
+    ('flight_number', str, None, 20, 20, 0, True),
+    ('arrival_delay', float, None, 53, 53, 0, True),
+    ('carrier_delay', float, None, 53, 53, 0, True),
+    ('is_delayed', bool, None, 1, 1, 0, True),
+    ('delay_category', str, None, 20, 20, 0, True),
+    ('on_time_pct', decimal.Decimal, None, 5, 5, 2, True)
+]
+
+
+def make_rows(n_rows, seed=42):
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    rows = []
+    for i in range(n_rows):
+        arrival = round(rng.gauss(5, 40))
+        rows.append((
+            i + 1,
+            start + datetime.timedelta(days=rng.randrange(366)),
+            rng.choice(CARRIERS),
+            rng.choice(AIRPORTS),
+            rng.choice(AIRPORTS),
+            str(rng.randrange(1, 3000)),
+            float(arrival),
+            float(round(rng.expovariate(1 / 20))) if rng.random() < 0.4 else None,
+            arrival > 15,
+            'On-Time' if arrival <= 0 else 'Minor' if arrival <= 60 else 'Moderate' if arrival <= 180 else 'Severe',
+            decimal.Decimal(rng.randrange(0, 10000)) / 100
+        ))
+    return rows
+
+
+def chunks(rows):
+    return [rows[i:i + CHUNK_ROWS] for i in range(0, len(rows), CHUNK_ROWS)]
+
+
+def encode_rows(rows):
+    columns = [col[0] for col in DESCRIPTION]
+    data = [dict(zip(columns, row)) for row in rows]
+    content = jsonable_encoder({"success": True, "data": data, "row_count": len(data), "columns": columns})
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def encode_columnar(rows):
+    values = [[] for _ in DESCRIPTION]
+    for batch in chunks(rows):
+        for column, batch_values in zip(values, transpose(batch)):
+            column.extend(batch_values)
+    return columnar_json_bytes([col[0] for col in DESCRIPTION], values, 0.0, False)
+
+
+def encode_arrow(rows):
+    pa = result_formats.pa
+    schema = None
+    batches = []
+    for batch in chunks(rows):
+        columns = transpose(batch)
+        schema = schema or arrow_schema(DESCRIPTION, columns)
+        batches.append(arrow_record_batch(schema, columns))
+    return arrow_ipc_bytes(pa.Table.from_batches(batches, schema=schema))
+
+
+ENCODERS = {
+    'rows': encode_rows,
+    'columnar': encode_columnar,
+    'arrow': encode_arrow
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3, help="Best of N timings")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"Serializing {args.rows:,} rows x {len(DESCRIPTION)} columns")
+    print(f"  {'format':<10}{'bytes':>14}{'gzip bytes':>14}{'encode ms':>12}{'rows/sec':>14}")
+    for name, encode in ENCODERS.items():
+        if name == 'arrow' and result_formats.pa is None:
+            print(f"  {name:<10}skipped (pyarrow not installed)")
+            continue
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            payload = encode(rows)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"  {name:<10}{len(payload):>14,}{len(gzip.compress(payload, 6)):>14,}"
+              f"{best * 1000:>12.1f}{args.rows / best:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Bounded, health-checked pyodbc connection pools (one per database).
+
+Connections are borrowed with `pool.connection()` and returned on exit.
+Idle connections are re-validated before reuse, idle ones above min_size are
+reaped after max_idle_seconds, and callers wait up to acquire_timeout for a
+free slot once max_size connections are open.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pyodbc
+
+HEALTH_CHECK_QUERY = "SELECT 1"
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the acquire timeout"""
+
+
+class PoolClosed(Exception):
+    """The pool has been shut down"""
+
+
+class PooledConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    def __init__(self, name, connection_string, min_size=1, max_size=5, max_idle_seconds=300.0,
+                 acquire_timeout=30.0, validate_after_seconds=30.0, connect=pyodbc.connect):
+        self.name = name
+        self.connection_string = connection_string
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.acquire_timeout = acquire_timeout
+        self.validate_after_seconds = validate_after_seconds
+        self._connect = connect
+
+        self._idle = []
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._lock = threading.Condition()
+        self._stats = {
+            'acquired': 0,
+            'timeouts': 0,
+            'created': 0,
+            'closed': 0,
+            'health_check_failures': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0
+        }
+
+    def warm(self):
+        """Open min_size connections up front so the first requests skip the handshake"""
+        opened = []
+        with self._lock:
+            needed = max(0, self.min_size - self._size)
+            self._size += needed
+        try:
+            for _ in range(needed):
+                opened.append(PooledConnection(self._open()))
+        finally:
+            with self._lock:
+                self._size -= needed - len(opened)
+                self._idle.extend(opened)
+                self._lock.notify_all()
+        return len(opened)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is validated on error and returned (or discarded) on exit"""
+        pooled = self.acquire()
+        try:
+            yield pooled.conn
+        except Exception:
+            self.release(pooled, healthy=self._is_healthy(pooled.conn))
+            raise
+        else:
+            self.release(pooled)
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        while True:
+            with self._lock:
+                pooled, must_open = self._checkout(deadline)
+            if must_open:
+                try:
+                    pooled = PooledConnection(self._open())
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+            elif time.monotonic() - pooled.last_used > self.validate_after_seconds and not self._is_healthy(pooled.conn):
+                self._discard(pooled)
+                continue
+
+            wait_ms = (time.monotonic() - start) * 1000
+            with self._lock:
+                self._stats['acquired'] += 1
+                self._stats['total_wait_ms'] += wait_ms
+                self._stats['max_wait_ms'] = max(self._stats['max_wait_ms'], wait_ms)
+            return pooled
+
+    def _checkout(self, deadline):
+        """Under the lock: an idle connection, or a reserved slot for a new one"""
+        self._waiting += 1
+        try:
+            while True:
+                if self._closed:
+                    raise PoolClosed(f"{self.name} pool is closed")
+                if self._idle:
+                    return self._idle.pop(), False
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No {self.name} connection available within {self.acquire_timeout}s "
+                                      f"({self.max_size} in use)")
+                self._lock.wait(remaining)
+        finally:
+            self._waiting -= 1
+
+    def release(self, pooled, healthy=True):
+        if healthy:
+            try:
+                # End the implicit transaction so the next borrower starts clean
+                pooled.conn.rollback()
+            except pyodbc.Error:
+                healthy = False
+        if not healthy or self._closed:
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(pooled)
+            self._lock.notify()
+
+    def reap_idle(self):
+        """Close connections idle longer than max_idle_seconds, keeping min_size open"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            keep = []
+            # Oldest first: the most recently used connections stay warm
+            for pooled in self._idle:
+                if now - pooled.last_used > self.max_idle_seconds and self._size - len(expired) > self.min_size:
+                    expired.append(pooled)
+                else:
+                    keep.append(pooled)
+            self._idle = keep
+        for pooled in expired:
+            self._discard(pooled)
+        return len(expired)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._lock.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        with self._lock:
+            acquired = self._stats['acquired']
+            return {
+                'database': self.name,
+                'size': self._size,
+                'in_use': self._size - len(self._idle),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'acquired': acquired,
+                'timeouts': self._stats['timeouts'],
+                'connections_created': self._stats['created'],
+                'connections_closed': self._stats['closed'],
+                'health_check_failures': self._stats['health_check_failures'],
+                'avg_wait_ms': round(self._stats['total_wait_ms'] / acquired, 2) if acquired else 0.0,
+                'max_wait_ms': round(self._stats['max_wait_ms'], 2)
+            }
+
+    def _open(self):
+        conn = self._connect(self.connection_string)
+        with self._lock:
+            self._stats['created'] += 1
+        return conn
+
+    def _discard(self, pooled):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._stats['closed'] += 1
+            self._lock.notify()
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute(HEALTH_CHECK_QUERY)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            with self._lock:
+                self._stats['health_check_failures'] += 1
+            return False
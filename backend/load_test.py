@@ -0,0 +1,88 @@
+"""
+Concurrent load test for the query API (stdlib only; run against a live server).
+
+Fires --requests POSTs at an endpoint from N client threads for each
+concurrency level and reports throughput, latency percentiles and status
+codes (429/503 = rejected by admission control). Compare runs with different
+DB_POOL_MAX_SIZE / WAREHOUSE_MAX_CONCURRENT_QUERIES settings to see throughput
+scale with the pool, and hit GET / during a run to check the event loop stays
+responsive.
+
+Usage:
+    uvicorn main:app --port 8000
+    python load_test.py --concurrency 1 2 4 8 16 --requests 200
+    python load_test.py --endpoint /api/query/normalized --query "SELECT COUNT(*) FROM Fact_Delays d"
+"""
+
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_QUERY = "SELECT COUNT(*) AS total_flights FROM Fact_Delays"
+
+
+def post(url, payload, timeout):
+    request = urllib.request.Request(url, data=payload, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError):
+        status = 'error'
+    return status, (time.perf_counter() - start) * 1000
+
+
+def probe_root(base_url, timeout):
+    """Latency of GET / - should stay low while queries are running"""
+    start = time.perf_counter()
+    with urllib.request.urlopen(base_url + "/", timeout=timeout) as response:
+        response.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def run_level(url, base_url, payload, concurrency, n_requests, timeout):
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        start = time.perf_counter()
+        futures = [clients.submit(post, url, payload, timeout) for _ in range(n_requests)]
+        root_ms = probe_root(base_url, timeout)
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(ms for status, ms in results if status == 200)
+    ok = statuses.get(200, 0)
+    p50 = statistics.median(latencies) if latencies else 0.0
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+    print(f"  {concurrency:>4} clients  {ok / elapsed:>8.1f} req/s  p50 {p50:>8.1f} ms  p95 {p95:>8.1f} ms  "
+          f"GET / {root_ms:>6.1f} ms  status {dict(statuses)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default="http://localhost:8000")
+    parser.add_argument('--endpoint', default="/api/query/warehouse")
+    parser.add_argument('--query', default=DEFAULT_QUERY)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--requests', type=int, default=100, help="Requests per concurrency level")
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    payload = json.dumps({"query": args.query}).encode()
+    print(f"POST {args.endpoint} x {args.requests} per level: {args.query}")
+    for concurrency in args.concurrency:
+        run_level(args.url + args.endpoint, args.url, payload, concurrency, args.requests, args.timeout)
+
+    with urllib.request.urlopen(args.url + "/api/metrics/pool", timeout=args.timeout) as response:
+        print(json.dumps(json.loads(response.read())["executor"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import pyodbc
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+import asyncio
+import logging
 import time
-import re
 import os
 
+from db_pool import ConnectionPool, PoolClosed, PoolTimeout
+from query_executor import Overloaded, QueryExecutor
+from result_cache import ResultCache, estimate_result_bytes, is_cacheable, normalize_sql
+from streaming import NDJSON_MEDIA_TYPE, RowStream, json_array_body, ndjson_body
+from pagination import PaginationError, plan_page
+from result_formats import FORMATS, UnsupportedFormat, arrow_stream_body, negotiate_format, run_formatted_query
+from aggregate_router import AggregateRouter
+from normalized_query import QueryTranslator, UntranslatableQuery
+
 app = FastAPI(title="Flight Data Warehouse API", version="1.0.0")
+logger = logging.getLogger("uvicorn.error")
 
 # CORS configuration
 app.add_middleware(
@@ -36,16 +48,320 @@ NORMALIZED_CONNECTION_STRING = (
     "Trusted_Connection=yes;"
 )
 
+# Connection pools (per database)
+POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30"))
+POOL_REAP_INTERVAL = 60
+
+POOLS = {
+    database: ConnectionPool(
+        database,
+        connection_string,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        max_idle_seconds=POOL_MAX_IDLE_SECONDS,
+        acquire_timeout=POOL_ACQUIRE_TIMEOUT
+    )
+    for database, connection_string in [
+        (DATABASE_NAME, CONNECTION_STRING),
+        (NORMALIZED_DATABASE_NAME, NORMALIZED_CONNECTION_STRING)
+    ]
+}
+
+# Query execution: blocking pyodbc calls run in a bounded thread pool. Each
+# database admits at most *_MAX_CONCURRENT_QUERIES at a time (never more than
+# its pool holds); up to QUERY_MAX_QUEUE more wait, beyond that requests get 429
+WAREHOUSE_MAX_CONCURRENT_QUERIES = min(int(os.getenv("WAREHOUSE_MAX_CONCURRENT_QUERIES", str(POOL_MAX_SIZE))), POOL_MAX_SIZE)
+NORMALIZED_MAX_CONCURRENT_QUERIES = min(int(os.getenv("NORMALIZED_MAX_CONCURRENT_QUERIES", "4")), POOL_MAX_SIZE)
+QUERY_MAX_QUEUE = int(os.getenv("QUERY_MAX_QUEUE", "50"))
+QUERY_QUEUE_TIMEOUT = float(os.getenv("QUERY_QUEUE_TIMEOUT", "30"))
+RETRY_AFTER_SECONDS = 5
+
+QUERY_EXECUTOR = QueryExecutor(
+    {
+        DATABASE_NAME: WAREHOUSE_MAX_CONCURRENT_QUERIES,
+        NORMALIZED_DATABASE_NAME: NORMALIZED_MAX_CONCURRENT_QUERIES
+    },
+    max_queue=QUERY_MAX_QUEUE,
+    queue_timeout=QUERY_QUEUE_TIMEOUT
+)
+
+# Admission / pool failures are reported as 429 or 503 instead of 500
+UNAVAILABLE_ERRORS = (Overloaded, PoolTimeout, PoolClosed)
+
+# Result cache for read-only queries, keyed on (database, normalized SQL).
+# A database's entries are dropped whenever its DATA_VERSION_QUERIES result
+# moves - the ETL records each run in ETL_Runs, IMPORT_CSV_FILES.py each import
+# in Import_Runs (checked at most every CACHE_VERSION_CHECK_SECONDS); a database
+# whose version cannot be read is not cached. Otherwise LRU + TTL within the
+# entry/byte caps.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+CACHE_VERSION_CHECK_SECONDS = 10
+DATA_VERSION_QUERIES = {
+    DATABASE_NAME: "SELECT MAX(run_id) AS version FROM ETL_Runs",
+    NORMALIZED_DATABASE_NAME: "SELECT MAX(import_id) AS version FROM Import_Runs"
+}
+
+RESULT_CACHE = ResultCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_MB * 1024 * 1024,
+    ttl_seconds=CACHE_TTL_SECONDS
+)
+DATA_VERSION_STATE = {"checked_at": {}}
+
+# Aggregate tables (Agg_Delays_*, maintained by the ETL). Warehouse GROUP BY
+# queries over Fact_Delays are rewritten onto them (aggregate_router.py) while
+# they account for every Fact_Delays row; the check reruns when the ETL run id moves
+AGGREGATES_ENABLED = os.getenv("AGGREGATES_ENABLED", "1") == "1"
+AGGREGATE_CHECK_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM Fact_Delays) AS facts,
+        (SELECT SUM(flight_count) FROM Agg_Delays_Carrier) AS carrier,
+        (SELECT SUM(flight_count) FROM Agg_Delays_RouteCarrier) AS route_carrier,
+        (SELECT SUM(flight_count) FROM Agg_Delays_OriginAirport) AS origin_airport
+"""
+AGGREGATE_STATE = {"available": False, "data_version": None, "checked": False}
+AGGREGATE_ROUTER = AggregateRouter()
+
+# Warehouse SQL -> normalized Q1-Q4 SQL, translated once per query fingerprint
+NORMALIZED_TRANSLATOR = QueryTranslator(max_entries=int(os.getenv("NORMALIZED_TRANSLATION_CACHE_ENTRIES", "512")))
+
+# Result size limits. Buffered responses keep at most MAX_RESULT_ROWS rows
+# (flagged "truncated"); streams and pages read in FETCH_CHUNK_ROWS batches so
+# memory stays bounded whatever the result size.
+MAX_RESULT_ROWS = int(os.getenv("MAX_RESULT_ROWS", "100000"))
+MAX_STREAM_ROWS = int(os.getenv("MAX_STREAM_ROWS", "10000000"))
+MAX_PAGE_SIZE = 10000
+# Pages of queries that cannot use keyset tokens (pagination.py) re-read and
+# skip all earlier rows; they stop this many rows in
+MAX_PAGE_OFFSET = int(os.getenv("MAX_PAGE_OFFSET", "100000"))
+FETCH_CHUNK_ROWS = 5000
+STREAM_QUEUE_CHUNKS = 4
+
 class QueryRequest(BaseModel):
     query: str
+    # False skips the result cache (e.g. queries using GETDATE())
+    use_cache: bool = True
+
+class ExecuteRequest(QueryRequest):
+    # "ndjson" or "json" (chunked JSON array) streams the whole result
+    stream: Optional[Literal["ndjson", "json"]] = None
+    # Pagination (queries with an ORDER BY): page_size rows starting at page_token
+    # (from the previous page's next_page_token)
+    page_size: Optional[int] = Field(default=None, gt=0, le=MAX_PAGE_SIZE)
+    page_token: Optional[str] = None
+
+class CompareRequest(QueryRequest):
+    # True: run the two sides one after the other so neither competes with the
+    # other for server CPU/IO (strict benchmarking); False: run them concurrently
+    isolated: bool = False
+
+def run_query(database, query, offset=0, limit=MAX_RESULT_ROWS, params=None):
+    """
+    Blocking - execute on a pooled connection, skip offset rows and read at most
+    limit + 1 (the extra row tells callers the result was cut off).
+    Returns: (columns, rows as dicts, execution ms)
+    """
+    with POOLS[database].connection() as conn:
+        start = time.time()
+        cursor = conn.cursor()
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        columns = [col[0] for col in cursor.description]
+        if offset:
+            cursor.skip(offset)
+        rows = []
+        while len(rows) <= limit:
+            chunk = cursor.fetchmany(min(FETCH_CHUNK_ROWS, limit + 1 - len(rows)))
+            if not chunk:
+                break
+            rows.extend(chunk)
+        results = [dict(zip(columns, row)) for row in rows]
+        exec_time = (time.time() - start) * 1000
+        cursor.close()
+    return columns, results, exec_time
+
+def result_payload(columns, results, exec_time, limit=MAX_RESULT_ROWS):
+    """Response fields for a run_query result, applying the row cap"""
+    truncated = len(results) > limit
+    data = results[:limit] if truncated else results
+    return {
+        "data": data,
+        "execution_time_ms": round(exec_time, 2),
+        "row_count": len(data),
+        "columns": columns,
+        "truncated": truncated
+    }
+
+async def execute_on(database, query, offset=0, limit=MAX_RESULT_ROWS, params=None):
+    """Run a query off the event loop, subject to the database's admission limits"""
+    return await QUERY_EXECUTOR.run(database, run_query, database, query, offset, limit, params)
+
+async def formatted_query(database, query, result_format, headers=None):
+    """Buffered Arrow IPC or column-major JSON response (MAX_RESULT_ROWS cap, details in headers)"""
+    body, row_count, exec_time, truncated = await QUERY_EXECUTOR.run(
+        database, run_formatted_query, POOLS[database], query, result_format, MAX_RESULT_ROWS, FETCH_CHUNK_ROWS
+    )
+    return Response(content=body, media_type=FORMATS[result_format], headers={
+        "X-Row-Count": str(row_count),
+        "X-Execution-Time-Ms": str(round(exec_time, 2)),
+        "X-Result-Truncated": "true" if truncated else "false",
+        "X-Cache": "bypass",
+        **(headers or {})
+    })
+
+async def stream_query(database, query, stream_format, result_format="rows", headers=None):
+    """
+    StreamingResponse fed by fetchmany chunks. Waits for the column list first so
+    admission and SQL errors still surface as regular 4xx/5xx responses.
+    """
+    stream = RowStream(asyncio.get_running_loop(), STREAM_QUEUE_CHUNKS)
+
+    async def produce():
+        try:
+            await QUERY_EXECUTOR.run(database, stream.produce, POOLS[database], query, FETCH_CHUNK_ROWS, MAX_STREAM_ROWS)
+        except Exception as e:
+            await stream.queue.put(("error", e))
+
+    stream.task = asyncio.create_task(produce())
+    first = await stream.next()
+    if first[0] == "error":
+        raise first[1]
+    _, value, description = first
+
+    if result_format == "arrow":
+        return StreamingResponse(arrow_stream_body(stream, description), media_type=FORMATS["arrow"], headers=headers)
+    if stream_format == "ndjson":
+        return StreamingResponse(ndjson_body(stream, value), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(json_array_body(stream, value), media_type="application/json", headers=headers)
+
+async def refresh_data_version(database=DATABASE_NAME):
+    """
+    Pick up the database's latest ETL run / import id; a new one clears its
+    cached results (and, for the warehouse, rechecks the aggregate tables)
+    """
+    now = time.monotonic()
+    checked_at = DATA_VERSION_STATE["checked_at"].get(database)
+    if checked_at is not None and now - checked_at < CACHE_VERSION_CHECK_SECONDS:
+        return
+    DATA_VERSION_STATE["checked_at"][database] = now
+    try:
+        _, rows, _ = await execute_on(database, DATA_VERSION_QUERIES[database])
+    except UNAVAILABLE_ERRORS:
+        return
+    except Exception as e:
+        # No ETL_Runs / Import_Runs table yet: changes cannot be seen, so nothing is cached
+        logger.warning(f"Result cache: cannot read the {database} data version: {e}")
+        RESULT_CACHE.forget_version(database)
+        return
+    version = rows[0]["version"]
+    RESULT_CACHE.set_version(database, version)
+    if database == DATABASE_NAME and AGGREGATES_ENABLED and not (
+            AGGREGATE_STATE["checked"] and AGGREGATE_STATE["data_version"] == version):
+        await check_aggregates(version)
+
+async def check_aggregates(version):
+    """Aggregates are used only when each table sums to the Fact_Delays row count"""
+    try:
+        _, rows, _ = await execute_on(DATABASE_NAME, AGGREGATE_CHECK_QUERY)
+        counts = rows[0]
+        available = bool(counts["facts"]) and all(
+            counts[table] == counts["facts"] for table in ("carrier", "route_carrier", "origin_airport")
+        )
+        if not available:
+            logger.warning(f"Aggregate tables out of sync with Fact_Delays ({counts}) - "
+                           "run the ETL with --rebuild-aggregates")
+    except UNAVAILABLE_ERRORS:
+        return
+    except Exception as e:
+        logger.warning(f"Aggregate tables unavailable: {e}")
+        available = False
+    AGGREGATE_STATE.update(available=available, data_version=version, checked=True)
+
+async def warehouse_sql(query):
+    """
+    The SQL to run for a warehouse query and where it reads from:
+    (sql, {"table": aggregate table or Fact_Delays, "aggregate": bool, "reason": why not routed})
+    """
+    if not AGGREGATES_ENABLED:
+        return query, {"table": None, "aggregate": False, "reason": "aggregate routing disabled"}
+    await refresh_data_version()
+    route = AGGREGATE_ROUTER.route(query, AGGREGATE_STATE["available"])
+    return route.sql, {"table": route.source, "aggregate": route.sql != query, "reason": route.reason}
 
-def get_connection():
-    """Get connection to Data Warehouse"""
-    return pyodbc.connect(CONNECTION_STRING)
+async def execute_cached(database, query, use_cache=True):
+    """
+    execute_on through the result cache.
+    Returns: (columns, rows, execution ms, cache info) - on a hit, execution ms is
+    the time the cached result originally took
+    """
+    if not (use_cache and RESULT_CACHE_ENABLED and is_cacheable(query)):
+        columns, results, exec_time = await execute_on(database, query)
+        return columns, results, exec_time, {"status": "bypass", "hit": False}
 
-def get_normalized_connection():
-    """Get connection to Normalized Database"""
-    return pyodbc.connect(NORMALIZED_CONNECTION_STRING)
+    await refresh_data_version(database)
+    if not RESULT_CACHE.has_version(database):
+        columns, results, exec_time = await execute_on(database, query)
+        return columns, results, exec_time, {"status": "bypass", "hit": False}
+
+    key = (database, normalize_sql(query))
+    entry = RESULT_CACHE.get(key)
+    if entry is not None:
+        columns, results, exec_time = entry.value
+        return columns, results, exec_time, {
+            "status": "hit", "hit": True, "age_seconds": round(entry.age(), 1),
+            "data_version": RESULT_CACHE.version(database)
+        }
+
+    version = RESULT_CACHE.version(database)
+    columns, results, exec_time = await execute_on(database, query)
+    # A result read while the version changed underneath may predate the new run
+    if RESULT_CACHE.has_version(database) and RESULT_CACHE.version(database) == version:
+        RESULT_CACHE.put(key, (columns, results, exec_time), estimate_result_bytes(columns, results))
+    return columns, results, exec_time, {
+        "status": "miss", "hit": False, "age_seconds": 0.0, "data_version": version
+    }
+
+def source_headers(source):
+    """Query source for responses whose body has no room for it (Arrow, columnar, streams)"""
+    return {"X-Query-Source": source["table"] or "none"}
+
+def service_unavailable(e):
+    status_code = e.status_code if isinstance(e, Overloaded) else 503
+    return HTTPException(status_code=status_code, detail=str(e), headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+async def reap_idle_connections():
+    while True:
+        await asyncio.sleep(POOL_REAP_INTERVAL)
+        for pool in POOLS.values():
+            reaped = await asyncio.to_thread(pool.reap_idle)
+            if reaped:
+                logger.info(f"{pool.name} pool: closed {reaped} idle connection(s)")
+
+@app.on_event("startup")
+async def open_pools():
+    for pool in POOLS.values():
+        try:
+            opened = await asyncio.to_thread(pool.warm)
+            logger.info(f"{pool.name} pool: warmed {opened} connection(s)")
+        except Exception as e:
+            # Keep serving; connections are opened on demand once the server is reachable
+            logger.warning(f"{pool.name} pool: warm-up failed: {e}")
+    app.state.reaper = asyncio.create_task(reap_idle_connections())
+
+@app.on_event("shutdown")
+async def close_pools():
+    app.state.reaper.cancel()
+    QUERY_EXECUTOR.shutdown()
+    for pool in POOLS.values():
+        pool.close()
 
 # Predefined queries
 PREDEFINED_QUERIES = {
@@ -133,112 +449,91 @@ PREDEFINED_QUERIES = {
 }
 
 def convert_to_normalized_query(warehouse_query: str) -> str:
-    """Convert warehouse query to normalized Q1-Q4 structure"""
-    query = warehouse_query
-    
-    # Replace Fact_Delays with UNION ALL
-    query = re.sub(
-        r'FROM\s+(dbo\.)?Fact_Delays\s+d',
-        '''FROM (
-    SELECT * FROM Q1 WHERE cancelled = 0
-    UNION ALL
-    SELECT * FROM Q2 WHERE cancelled = 0
-    UNION ALL
-    SELECT * FROM Q3 WHERE cancelled = 0
-    UNION ALL
-    SELECT * FROM Q4 WHERE cancelled = 0
-) d''',
-        query,
-        flags=re.IGNORECASE
-    )
-    
-    # Remove dimension joins
-    query = re.sub(r'\s*INNER\s+JOIN\s+dbo\.Dim_Airport\s+(orig|dest_apt|apt)\s+ON\s+[^\n]+', '', query, flags=re.IGNORECASE)
-    query = re.sub(r'\s*INNER\s+JOIN\s+dbo\.Dim_Airline\s+a\s+ON\s+[^\n]+', '', query, flags=re.IGNORECASE)
-    
-    # Replace column names
-    query = query.replace("d.arrival_delay", "d.arr_delay")
-    query = query.replace("d.departure_delay", "d.dep_delay")
-    query = query.replace("d.is_delayed", "CASE WHEN d.arr_delay > 0 THEN 1 ELSE 0 END")
-    query = query.replace("orig.airport_code", "d.origin")
-    query = query.replace("dest_apt.airport_code", "d.dest")
-    query = query.replace("apt.airport_code", "d.origin")
-    
-    # Handle carrier columns
-    query = re.sub(r'\ba\.carrier_code\b', 'd.op_unique_carrier AS carrier_code', query, flags=re.IGNORECASE)
-    query = re.sub(r'\ba\.carrier_name\b', 'd.op_unique_carrier AS carrier_name', query, flags=re.IGNORECASE)
-    
-    # Fix GROUP BY - remove AS aliases
-    def fix_group_by(match):
-        clause = match.group(0)
-        clause = re.sub(r'\s+AS\s+carrier_code', '', clause, flags=re.IGNORECASE)
-        clause = re.sub(r'\s+AS\s+carrier_name', '', clause, flags=re.IGNORECASE)
-        parts = clause.split('GROUP BY', 1)
-        if len(parts) == 2:
-            cols = [c.strip() for c in parts[1].split(',')]
-            unique = []
-            seen = set()
-            for col in cols:
-                norm = col.lower().replace(' ', '')
-                if norm not in seen:
-                    seen.add(norm)
-                    unique.append(col)
-            clause = 'GROUP BY ' + ', '.join(unique)
-        return clause
-    
-    query = re.sub(r'GROUP\s+BY\s+[^\n]+(?:\n\s*[^\n]+)*?(?=\s*(?:HAVING|ORDER|$))', fix_group_by, query, flags=re.IGNORECASE | re.DOTALL)
-    
-    return query
+    """Convert warehouse query to normalized Q1-Q4 structure (memoized, see normalized_query.py)"""
+    return NORMALIZED_TRANSLATOR.translate(warehouse_query)
 
 @app.get("/")
 async def root():
     return {"message": "Flight Data Warehouse API", "version": "1.0.0", "status": "running"}
 
 @app.post("/api/query/execute")
-async def execute_query(request: QueryRequest):
-    """Execute query on warehouse only"""
+async def execute_query(request: ExecuteRequest, http_request: Request,
+                        requested_format: Optional[str] = Query(default=None, alias="format")):
+    """
+    Execute query on warehouse only - buffered, streamed (stream) or one page at a
+    time (page_size); rows, column-major JSON or Arrow IPC by content negotiation
+    """
     try:
-        start = time.time()
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(request.query)
-        columns = [col[0] for col in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        exec_time = (time.time() - start) * 1000
-        cursor.close()
-        conn.close()
+        result_format = negotiate_format(http_request.headers.get("accept"), requested_format)
+        query, source = await warehouse_sql(request.query)
+        if request.stream:
+            if result_format == "columnar":
+                raise HTTPException(status_code=400, detail="Columnar JSON cannot be streamed; use ndjson or Arrow")
+            return await stream_query(DATABASE_NAME, query, request.stream, result_format, source_headers(source))
+        if result_format != "rows":
+            if request.page_size or request.page_token:
+                raise HTTPException(status_code=400, detail="Pagination returns row JSON only")
+            return await formatted_query(DATABASE_NAME, query, result_format, source_headers(source))
+
+        if request.page_size or request.page_token:
+            page_size = request.page_size or FETCH_CHUNK_ROWS
+            plan = plan_page(request.query, query, request.page_token, page_size, MAX_PAGE_OFFSET)
+            columns, results, exec_time = await execute_on(DATABASE_NAME, plan.sql, plan.skip, page_size, plan.params)
+            payload = result_payload(columns, results, exec_time, page_size)
+            has_more = payload.pop("truncated")
+            return {
+                "success": True,
+                **payload,
+                "source": source,
+                "page": {
+                    "mode": plan.mode,
+                    "offset": plan.offset,
+                    "page_size": page_size,
+                    "next_page_token": plan.next_page_token(columns, payload["data"]) if has_more else None
+                }
+            }
+
+        columns, results, exec_time, cache = await execute_cached(DATABASE_NAME, query, request.use_cache)
         
         return {
             "success": True,
-            "data": results,
-            "execution_time_ms": round(exec_time, 2),
-            "row_count": len(results),
-            "columns": columns
+            **result_payload(columns, results, exec_time),
+            "cache": cache,
+            "source": source
         }
+    except HTTPException:
+        raise
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UNAVAILABLE_ERRORS as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/query/warehouse")
-async def execute_warehouse_query(request: QueryRequest):
-    """Execute query on warehouse database only"""
+async def execute_warehouse_query(request: QueryRequest, http_request: Request,
+                                  requested_format: Optional[str] = Query(default=None, alias="format")):
+    """Execute query on warehouse database only (rows, column-major JSON or Arrow IPC)"""
     try:
-        start = time.time()
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute(request.query)
-        columns = [col[0] for col in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        exec_time = (time.time() - start) * 1000
-        cursor.close()
-        conn.close()
+        result_format = negotiate_format(http_request.headers.get("accept"), requested_format)
+        query, source = await warehouse_sql(request.query)
+        if result_format != "rows":
+            return await formatted_query(DATABASE_NAME, query, result_format, source_headers(source))
+
+        columns, results, exec_time, cache = await execute_cached(DATABASE_NAME, query, request.use_cache)
         
         return {
             "success": True,
-            "data": results,
-            "execution_time_ms": round(exec_time, 2),
-            "row_count": len(results),
-            "columns": columns
+            **result_payload(columns, results, exec_time),
+            "cache": cache,
+            "source": source
         }
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except UNAVAILABLE_ERRORS as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -246,55 +541,41 @@ async def execute_warehouse_query(request: QueryRequest):
 async def execute_normalized_query(request: QueryRequest):
     """Execute query on normalized database only"""
     try:
-        start = time.time()
-        conn = get_normalized_connection()
-        cursor = conn.cursor()
         n_query = convert_to_normalized_query(request.query)
-        print(f"DEBUG - Converted query: {n_query}")
-        cursor.execute(n_query)
-        columns = [col[0] for col in cursor.description]
-        results = [dict(zip(columns, row)) for row in cursor.fetchall()]
-        exec_time = (time.time() - start) * 1000
-        cursor.close()
-        conn.close()
+        logger.debug(f"Converted query: {n_query}")
+        columns, results, exec_time, cache = await execute_cached(NORMALIZED_DATABASE_NAME, n_query, request.use_cache)
         
         return {
             "success": True,
-            "data": results,
-            "execution_time_ms": round(exec_time, 2),
-            "row_count": len(results),
-            "columns": columns
+            **result_payload(columns, results, exec_time),
+            "cache": cache
         }
+    except UntranslatableQuery as e:
+        raise HTTPException(status_code=400, detail=f"Query cannot be run on the normalized schema: {e}")
+    except UNAVAILABLE_ERRORS as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/query/compare")
-async def compare_databases(request: QueryRequest):
+async def compare_databases(request: CompareRequest):
     """Execute query on BOTH databases and compare performance"""
     try:
-        # Warehouse execution
-        w_start = time.time()
-        w_conn = get_connection()
-        w_cursor = w_conn.cursor()
-        w_cursor.execute(request.query)
-        w_cols = [col[0] for col in w_cursor.description]
-        w_results = [dict(zip(w_cols, row)) for row in w_cursor.fetchall()]
-        w_time = (time.time() - w_start) * 1000
-        w_cursor.close()
-        w_conn.close()
-        
-        # Normalized execution
-        n_start = time.time()
-        n_conn = get_normalized_connection()
-        n_cursor = n_conn.cursor()
         n_query = convert_to_normalized_query(request.query)
-        print(f"DEBUG - Converted query: {n_query}")
-        n_cursor.execute(n_query)
-        n_cols = [col[0] for col in n_cursor.description]
-        n_results = [dict(zip(n_cols, row)) for row in n_cursor.fetchall()]
-        n_time = (time.time() - n_start) * 1000
-        n_cursor.close()
-        n_conn.close()
+        logger.debug(f"Converted query: {n_query}")
+        w_query, w_source = await warehouse_sql(request.query)
+
+        # Each side is timed on its own connection; wall-clock covers both
+        start = time.time()
+        if request.isolated:
+            w_cols, w_results, w_time, w_cache = await execute_cached(DATABASE_NAME, w_query, request.use_cache)
+            n_cols, n_results, n_time, n_cache = await execute_cached(NORMALIZED_DATABASE_NAME, n_query, request.use_cache)
+        else:
+            (w_cols, w_results, w_time, w_cache), (n_cols, n_results, n_time, n_cache) = await asyncio.gather(
+                execute_cached(DATABASE_NAME, w_query, request.use_cache),
+                execute_cached(NORMALIZED_DATABASE_NAME, n_query, request.use_cache)
+            )
+        total_time = (time.time() - start) * 1000
         
         speedup = n_time / w_time if w_time > 0 else 1.0
         improvement = ((n_time - w_time) / n_time) * 100 if n_time > 0 else 0.0
@@ -302,23 +583,26 @@ async def compare_databases(request: QueryRequest):
         return {
             "success": True,
             "warehouse": {
-                "data": w_results,
-                "execution_time_ms": round(w_time, 2),
-                "row_count": len(w_results),
-                "columns": w_cols
+                **result_payload(w_cols, w_results, w_time),
+                "cache": w_cache,
+                "source": w_source
             },
             "normalized": {
-                "data": n_results,
-                "execution_time_ms": round(n_time, 2),
-                "row_count": len(n_results),
-                "columns": n_cols
+                **result_payload(n_cols, n_results, n_time),
+                "cache": n_cache
             },
             "comparison": {
                 "speedup": round(speedup, 2),
                 "improvement_pct": round(improvement, 1),
-                "time_saved_ms": round(n_time - w_time, 2)
+                "time_saved_ms": round(n_time - w_time, 2),
+                "total_time_ms": round(total_time, 2),
+                "mode": "isolated" if request.isolated else "concurrent"
             }
         }
+    except UntranslatableQuery as e:
+        raise HTTPException(status_code=400, detail=f"Query cannot be run on the normalized schema: {e}")
+    except UNAVAILABLE_ERRORS as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
 
@@ -331,18 +615,14 @@ async def get_predefined_queries():
 async def get_database_metrics():
     """Get database statistics"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
+        _, results, _, _ = await execute_cached(DATABASE_NAME, """
             SELECT 
                 (SELECT COUNT(*) FROM Fact_FlightPerformance) as total_flights,
                 (SELECT COUNT(*) FROM Dim_Airport) as total_airports,
                 (SELECT CAST(ROUND(AVG(CAST(arrival_delay AS FLOAT)), 2) AS DECIMAL(10,2)) 
                  FROM Fact_Delays WHERE arrival_delay IS NOT NULL) as avg_delay
         """)
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        row = list(results[0].values())
         
         return {
             "success": True,
@@ -352,9 +632,43 @@ async def get_database_metrics():
                 "avg_delay_minutes": float(row[2]) if row[2] else 0.0
             }
         }
+    except UNAVAILABLE_ERRORS as e:
+        raise service_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/metrics/pool")
+async def get_pool_metrics():
+    """Connection pool and query queue statistics per database"""
+    return {"success": True, "pools": [pool.stats() for pool in POOLS.values()], "executor": QUERY_EXECUTOR.stats()}
+
+@app.get("/api/metrics/cache")
+async def get_cache_metrics():
+    """Result cache statistics"""
+    return {"success": True, "enabled": RESULT_CACHE_ENABLED, "cache": RESULT_CACHE.stats()}
+
+@app.get("/api/metrics/aggregates")
+async def get_aggregate_metrics():
+    """Aggregate routing: availability, routed / fallback counts and hit rate"""
+    return {
+        "success": True,
+        "enabled": AGGREGATES_ENABLED,
+        "available": AGGREGATE_STATE["available"],
+        "data_version": AGGREGATE_STATE["data_version"],
+        "routing": AGGREGATE_ROUTER.stats()
+    }
+
+@app.get("/api/metrics/translation")
+async def get_translation_metrics():
+    """Normalized query translation cache statistics"""
+    return {"success": True, "translation": NORMALIZED_TRANSLATOR.stats()}
+
+@app.post("/api/cache/clear")
+async def clear_cache():
+    """Drop all cached query results"""
+    RESULT_CACHE.clear()
+    return {"success": True}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,548 @@
+"""
+Translates warehouse (star schema) queries to the normalized flight_analytics schema.
+
+The fact table in FROM becomes a UNION ALL of the quarter tables Q1-Q4.
+Dimension joins are dropped: every fact and dimension column maps to an
+expression over the quarter columns, e.g.
+
+    d.arrival_delay       -> d.arr_delay
+    d.is_delayed          -> CASE WHEN d.arr_delay > 15 THEN 1 ELSE 0 END
+    a.carrier_code        -> d.op_unique_carrier   (a joined on airline_key)
+    orig.airport_code     -> d.origin              (orig joined on origin_airport_key)
+    dt.month              -> DATEPART(MONTH, d.fl_date)
+
+Surrogate keys map to the natural codes they stand for, so they group and
+join the same way although their values differ. Attributes the normalized
+schema does not hold map to what the ETL loads for them (carrier_name is
+the carrier code, airport city/state are NULL). Select-list columns keep
+their warehouse names, and GROUP BY items that map to the same expression
+are merged.
+
+Each union branch is pushed as much of the query as it can evaluate alone:
+    - cancelled = 0 (the ETL loads no cancelled flights)
+    - every WHERE conjunct without aggregates, so rows are filtered while
+      scanning the quarter instead of after the union
+    - only the columns still read above the union (projection)
+Quarters a date predicate excludes are not scanned at all: fl_date /
+date_key / Dim_Date full_date ranges and Dim_Date month / quarter filters
+(AND-ed, or OR-ed across disjuncts) give the months of the year a row can
+fall in, and Qn holds calendar quarter n. date_key comparisons against a
+valid YYYYMMDD literal are rewritten onto fl_date so they stay sargable.
+
+Supported: one SELECT over Fact_Delays or Fact_FlightPerformance with INNER
+JOINs to Dim_Airline / Dim_Airport / Dim_Date on the fact's foreign keys.
+Anything else raises UntranslatableQuery. Translations are memoized by query
+fingerprint (QueryTranslator).
+"""
+
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+
+import sqlglot
+from sqlglot import exp
+
+from result_cache import normalize_sql
+
+DIALECT = "tsql"
+QUARTER_TABLES = ["Q1", "Q2", "Q3", "Q4"]
+# Months of the year held by each quarter table
+QUARTER_MONTHS = {table: {3 * i + 1, 3 * i + 2, 3 * i + 3} for i, table in enumerate(QUARTER_TABLES)}
+ALL_MONTHS = frozenset(range(1, 13))
+DELAYED_THRESHOLD = 15
+CAUSE_COLUMNS = ["carrier_delay", "weather_delay", "nas_delay", "security_delay", "late_aircraft_delay"]
+
+# Fact foreign key -> (dimension table, dimension key column)
+FOREIGN_KEYS = {
+    "date_key": ("dim_date", "date_key"),
+    "airline_key": ("dim_airline", "airline_key"),
+    "origin_airport_key": ("dim_airport", "airport_key"),
+    "dest_airport_key": ("dim_airport", "airport_key")
+}
+DIMENSION_TABLES = {dimension for dimension, _ in FOREIGN_KEYS.values()}
+
+# Fact foreign key -> {column of the dimension joined on it: expression over quarter columns}
+DIMENSION_COLUMNS = {
+    "date_key": {
+        "date_key": "YEAR(fl_date) * 10000 + MONTH(fl_date) * 100 + DAY(fl_date)",
+        "full_date": "fl_date",
+        "year": "DATEPART(YEAR, fl_date)",
+        "quarter": "DATEPART(QUARTER, fl_date)",
+        "month": "DATEPART(MONTH, fl_date)",
+        "month_name": "DATENAME(MONTH, fl_date)",
+        "day_of_month": "DATEPART(DAY, fl_date)",
+        "day_of_week": "DATEPART(WEEKDAY, fl_date)",
+        "day_name": "DATENAME(WEEKDAY, fl_date)",
+        "is_weekend": "CASE WHEN DATEPART(WEEKDAY, fl_date) IN (1, 7) THEN 1 ELSE 0 END"
+    },
+    "airline_key": {
+        "airline_key": "op_unique_carrier",
+        "carrier_code": "op_unique_carrier",
+        "carrier_name": "op_unique_carrier"
+    },
+    "origin_airport_key": {
+        "airport_key": "origin",
+        "airport_code": "origin",
+        "city_name": "CAST(NULL AS VARCHAR(100))",
+        "state_name": "CAST(NULL AS VARCHAR(50))"
+    },
+    "dest_airport_key": {
+        "airport_key": "dest",
+        "airport_code": "dest",
+        "city_name": "CAST(NULL AS VARCHAR(100))",
+        "state_name": "CAST(NULL AS VARCHAR(50))"
+    }
+}
+
+# Foreign keys and flight_number are common to both facts
+_SHARED_FACT_COLUMNS = {
+    **{key: DIMENSION_COLUMNS[key][FOREIGN_KEYS[key][1]] for key in FOREIGN_KEYS},
+    "flight_number": "op_carrier_fl_num"
+}
+
+# Fact table -> {fact column: expression over quarter columns}, derived columns as the ETL computes them
+FACT_COLUMNS = {
+    "fact_delays": {
+        **_SHARED_FACT_COLUMNS,
+        "departure_delay": "dep_delay",
+        "arrival_delay": "arr_delay",
+        **{cause: cause for cause in CAUSE_COLUMNS},
+        "total_delay_minutes": "CASE WHEN COALESCE({causes}) IS NOT NULL THEN {cause_sum} END".format(
+            causes=", ".join(CAUSE_COLUMNS),
+            cause_sum=" + ".join(f"COALESCE({cause}, 0)" for cause in CAUSE_COLUMNS)
+        ),
+        "is_delayed": f"CASE WHEN arr_delay > {DELAYED_THRESHOLD} THEN 1 ELSE 0 END",
+        "delay_category": "CASE WHEN arr_delay > 180 THEN 'Severe' WHEN arr_delay > 60 THEN 'Moderate' "
+                          "WHEN arr_delay > 0 THEN 'Minor' ELSE 'On-Time' END"
+    },
+    "fact_flightperformance": {
+        **_SHARED_FACT_COLUMNS,
+        "scheduled_dep_time": "crs_dep_time",
+        "actual_dep_time": "dep_time",
+        "scheduled_arr_time": "crs_arr_time",
+        "actual_arr_time": "arr_time",
+        "scheduled_elapsed_time": "crs_elapsed_time",
+        "actual_elapsed_time": "actual_elapsed_time",
+        "air_time": "air_time",
+        "taxi_out": "taxi_out",
+        "taxi_in": "taxi_in",
+        "distance": "distance",
+        "cancelled": "cancelled",
+        "cancellation_code": "cancellation_code",
+        "diverted": "diverted"
+    }
+}
+
+
+class UntranslatableQuery(ValueError):
+    """The query has no equivalent over the normalized Q1-Q4 tables; the message says why"""
+
+
+def parse_select(query):
+    try:
+        statements = [statement for statement in sqlglot.parse(query, read=DIALECT) if statement is not None]
+    except sqlglot.errors.SqlglotError as e:
+        raise UntranslatableQuery(f"query could not be parsed: {e}")
+    if len(statements) != 1 or not isinstance(statements[0], exp.Select):
+        raise UntranslatableQuery("only a single SELECT can be translated")
+    select = statements[0]
+    if select.args.get("with_") or select.args.get("with"):
+        raise UntranslatableQuery("common table expressions are not supported")
+    if any(node is not select for node in select.find_all(exp.Select)):
+        raise UntranslatableQuery("subqueries are not supported")
+    if any(isinstance(node, exp.Star) and not isinstance(node.parent, exp.Count) for node in select.find_all(exp.Star)):
+        raise UntranslatableQuery("SELECT * is not supported; name the columns")
+    return select
+
+
+class StarQuery:
+    """Fact table, dimension aliases and column mapping of one parsed warehouse SELECT"""
+
+    def __init__(self, select):
+        self.select = select
+        from_ = select.args.get("from_")
+        fact = from_.this if from_ is not None else None
+        if not isinstance(fact, exp.Table) or fact.name.lower() not in FACT_COLUMNS:
+            raise UntranslatableQuery("FROM must be Fact_Delays or Fact_FlightPerformance")
+        self.fact = fact
+        self.fact_columns = FACT_COLUMNS[fact.name.lower()]
+        self.alias = fact.alias_or_name
+        # dimension alias -> fact foreign key it is joined on
+        self.roles = {}
+        self.output_names = {e.alias_or_name.lower() for e in select.expressions if e.alias_or_name}
+        # WHERE conjuncts evaluated inside every union branch, and the quarter tables scanned
+        self.pushed = []
+        self.quarters = list(QUARTER_TABLES)
+
+    def read_joins(self):
+        joins = self.select.args.get("joins") or []
+        dimensions = {}
+        for join in joins:
+            dimension = join.this
+            if not isinstance(dimension, exp.Table) or dimension.name.lower() not in DIMENSION_TABLES:
+                raise UntranslatableQuery(f"cannot join {join.this.sql(dialect=DIALECT)}; only dimension tables")
+            if join.side or (join.kind and join.kind.upper() != "INNER") or join.args.get("using"):
+                raise UntranslatableQuery("only INNER JOIN ... ON is supported")
+            dimensions[dimension.alias_or_name.lower()] = dimension.name.lower()
+
+        for join in joins:
+            alias = join.this.alias_or_name.lower()
+            condition = join.args.get("on")
+            if not isinstance(condition, exp.EQ) or not all(isinstance(side, exp.Column)
+                                                           for side in (condition.this, condition.expression)):
+                raise UntranslatableQuery(f"{join.this.name} must be joined on a single key equality")
+            sides = {}
+            for column in (condition.this, condition.expression):
+                table = column.table.lower()
+                if table in (self.alias.lower(), "") and column.name.lower() in FOREIGN_KEYS:
+                    sides["fact"] = column.name.lower()
+                elif table == alias:
+                    sides["dimension"] = column.name.lower()
+            foreign_key = sides.get("fact")
+            if foreign_key is None or FOREIGN_KEYS[foreign_key] != (dimensions[alias], sides.get("dimension")):
+                raise UntranslatableQuery(f"{join.this.name} is not joined on a fact foreign key")
+            self.roles[alias] = foreign_key
+        self.select.set("joins", None)
+
+    def template(self, column, in_order):
+        """Expression template for a column reference, or None for a select-list alias"""
+        table = column.table.lower()
+        name = column.name.lower()
+        if table == self.alias.lower():
+            if name not in self.fact_columns:
+                raise UntranslatableQuery(f"{column.sql(dialect=DIALECT)} has no normalized equivalent")
+            return self.fact_columns[name]
+        if table:
+            if table not in self.roles:
+                raise UntranslatableQuery(f"unknown table alias '{column.table}'")
+            dimension_columns = DIMENSION_COLUMNS[self.roles[table]]
+            if name not in dimension_columns:
+                raise UntranslatableQuery(f"{column.sql(dialect=DIALECT)} has no normalized equivalent")
+            return dimension_columns[name]
+        # Unqualified: ORDER BY prefers select-list aliases, then the fact, then a joined dimension
+        if in_order and name in self.output_names:
+            return None
+        if name in self.fact_columns:
+            return self.fact_columns[name]
+        matches = {DIMENSION_COLUMNS[role][name] for role in self.roles.values() if name in DIMENSION_COLUMNS[role]}
+        if len(matches) == 1:
+            return matches.pop()
+        if matches:
+            raise UntranslatableQuery(f"ambiguous column '{column.name}'")
+        if name in self.output_names:
+            return None
+        raise UntranslatableQuery(f"unknown column '{column.name}'")
+
+    def expression(self, template):
+        """Parsed template with its quarter columns qualified by the fact alias"""
+        node = sqlglot.parse_one(template, read=DIALECT)
+        for column in list(node.find_all(exp.Column)):
+            column.set("table", exp.to_identifier(self.alias))
+        return node
+
+    def mapped_sql(self, template):
+        return self.expression(template).sql(dialect=DIALECT)
+
+    def map_columns(self):
+        order = self.select.args.get("order")
+        in_order = {id(column) for column in order.find_all(exp.Column)} if order is not None else set()
+
+        # Unaliased select-list columns keep their warehouse name
+        self.select.set("expressions", [
+            exp.alias_(e, e.name) if isinstance(e, exp.Column) else e for e in self.select.expressions
+        ])
+        for column in list(self.select.find_all(exp.Column)):
+            template = self.template(column, id(column) in in_order)
+            if template is not None:
+                column.replace(self.expression(template))
+
+    def merge_group_by(self):
+        group = self.select.args.get("group")
+        if group is None:
+            return
+        seen = set()
+        unique = []
+        for item in group.expressions:
+            key = item.sql(dialect=DIALECT)
+            if key not in seen:
+                seen.add(key)
+                unique.append(item)
+        group.set("expressions", unique)
+
+    def push_down(self):
+        """Move branch-local WHERE conjuncts into the union and pick the quarters to scan"""
+        where = self.select.args.get("where")
+        if where is None:
+            return
+        conjuncts = [self.sargable(c) for c in (where.this.flatten() if isinstance(where.this, exp.And) else [where.this])]
+
+        dates = DateRange()
+        for conjunct in conjuncts:
+            dates = dates.intersect(self.date_range(conjunct))
+        months = dates.months_of_year()
+        self.quarters = [table for table in QUARTER_TABLES if QUARTER_MONTHS[table] & months]
+
+        kept = []
+        for conjunct in conjuncts:
+            if self.branch_local(conjunct):
+                self.pushed.append(conjunct)
+            else:
+                kept.append(conjunct)
+        self.select.set("where", exp.Where(this=exp.and_(*kept)) if kept else None)
+
+    def branch_local(self, condition):
+        """True if a union branch can evaluate condition: no aggregates and only fact-alias columns"""
+        if condition.find(exp.AggFunc, exp.Window):
+            return False
+        return all(column.table == self.alias for column in condition.find_all(exp.Column))
+
+    def sargable(self, condition):
+        """date_key <op> YYYYMMDD as fl_date <op> 'YYYY-MM-DD' (same rows, index-friendly)"""
+        date_key = self.mapped_sql(DIMENSION_COLUMNS["date_key"]["date_key"])
+        comparisons = (exp.EQ, exp.NEQ, exp.GT, exp.GTE, exp.LT, exp.LTE)
+        if isinstance(condition, comparisons):
+            sides = [condition.this, condition.expression]
+        elif isinstance(condition, exp.Between):
+            sides = [condition.this, condition.args["low"], condition.args["high"]]
+        elif isinstance(condition, exp.In) and not condition.args.get("query"):
+            sides = [condition.this, *condition.expressions]
+        else:
+            return condition
+        keys = [side for side in sides if side.sql(dialect=DIALECT) == date_key]
+        literals = [side for side in sides if side.sql(dialect=DIALECT) != date_key]
+        if len(keys) != 1 or not literals or any(date_key_value(literal) is None for literal in literals):
+            return condition
+        fl_date = self.expression("fl_date")
+        for side in sides:
+            value = date_key_value(side)
+            side.replace(fl_date.copy() if value is None else exp.Literal.string(value.isoformat()))
+        return condition
+
+    def date_term(self, node):
+        """'fl_date', 'month' or 'quarter' if node is that date attribute of the fact row, else None"""
+        terms = {
+            self.mapped_sql("fl_date"): "fl_date",
+            self.mapped_sql(DIMENSION_COLUMNS["date_key"]["month"]): "month",
+            self.mapped_sql(DIMENSION_COLUMNS["date_key"]["quarter"]): "quarter"
+        }
+        return terms.get(node.sql(dialect=DIALECT))
+
+    def date_range(self, condition):
+        """DateRange of the rows condition can be true for (unconstrained if it cannot tell)"""
+        if isinstance(condition, exp.Paren):
+            return self.date_range(condition.this)
+        if isinstance(condition, exp.And):
+            dates = DateRange()
+            for part in condition.flatten():
+                dates = dates.intersect(self.date_range(part))
+            return dates
+        if isinstance(condition, exp.Or):
+            months = set()
+            for part in condition.flatten():
+                months |= self.date_range(part).months_of_year()
+            return DateRange(months=months)
+
+        flipped = {exp.GT: exp.LT, exp.GTE: exp.LTE, exp.LT: exp.GT, exp.LTE: exp.GTE, exp.EQ: exp.EQ}
+        if type(condition) in flipped:
+            term, value, kind = self.date_term(condition.this), condition.expression, type(condition)
+            if term is None:
+                term, value, kind = self.date_term(condition.expression), condition.this, flipped[kind]
+            if term is not None:
+                return DateRange.compare(term, kind, value)
+        elif isinstance(condition, exp.Between):
+            term = self.date_term(condition.this)
+            if term is not None:
+                return DateRange.compare(term, exp.GTE, condition.args["low"]).intersect(
+                    DateRange.compare(term, exp.LTE, condition.args["high"]))
+        elif isinstance(condition, exp.In) and not condition.args.get("query"):
+            term = self.date_term(condition.this)
+            if term is not None:
+                months = set()
+                for value in condition.expressions:
+                    months |= DateRange.compare(term, exp.EQ, value).months_of_year()
+                return DateRange(months=months)
+        return DateRange()
+
+    def union_source(self):
+        """The fact table as UNION ALL of the scanned quarter tables, with pushed filters and projection"""
+        names = OrderedDict((column.name, True) for column in self.select.find_all(exp.Column)
+                            if column.table == self.alias)
+        projection = [exp.column(name) for name in names] or [exp.alias_(exp.Literal.number(1), "n")]
+
+        filters = [exp.condition("cancelled = 0", dialect=DIALECT)]
+        for conjunct in self.pushed:
+            conjunct = conjunct.copy()
+            for column in conjunct.find_all(exp.Column):
+                column.set("table", None)
+            filters.append(conjunct)
+        quarters = self.quarters
+        if not quarters:
+            # No quarter can match; keep one empty branch so the result still has its columns
+            quarters = QUARTER_TABLES[:1]
+            filters.append(exp.condition("1 = 0", dialect=DIALECT))
+
+        branches = [
+            exp.select(*[column.copy() for column in projection]).from_(table).where(
+                exp.and_(*[f.copy() for f in filters]))
+            for table in quarters
+        ]
+        union = branches[0]
+        for branch in branches[1:]:
+            union = exp.union(union, branch, distinct=False)
+        return exp.Subquery(this=union, alias=exp.TableAlias(this=exp.to_identifier(self.alias)))
+
+
+def literal_value(node):
+    """Python value of a number / string literal (optionally CAST), else None"""
+    if isinstance(node, exp.Cast):
+        node = node.this
+    if isinstance(node, exp.Neg):
+        value = literal_value(node.this)
+        return -value if isinstance(value, (int, float)) else None
+    if not isinstance(node, exp.Literal):
+        return None
+    if node.is_string:
+        return node.this
+    try:
+        return int(node.this)
+    except ValueError:
+        return float(node.this)
+
+
+def date_value(node):
+    value = literal_value(node)
+    if not isinstance(value, str):
+        return None
+    text = value.strip()[:10]
+    try:
+        return datetime.date.fromisoformat(text) if "-" in text else datetime.datetime.strptime(text[:8], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def date_key_value(node):
+    """The date a YYYYMMDD integer literal stands for, else None"""
+    value = literal_value(node)
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    try:
+        return datetime.date(value // 10000, value // 100 % 100, value % 100)
+    except ValueError:
+        return None
+
+
+class DateRange:
+    """fl_date bounds (inclusive, None = open) and months of the year a set of rows can fall in"""
+
+    def __init__(self, low=None, high=None, months=ALL_MONTHS):
+        self.low = low
+        self.high = high
+        self.months = frozenset(months)
+
+    @classmethod
+    def compare(cls, term, kind, node):
+        """Range of rows where <term> <kind> <literal node> holds"""
+        if term == "fl_date":
+            value = date_value(node)
+            if value is None:
+                return cls()
+            one_day = datetime.timedelta(days=1)
+            return {
+                exp.EQ: cls(low=value, high=value),
+                exp.GT: cls(low=value + one_day),
+                exp.GTE: cls(low=value),
+                exp.LT: cls(high=value - one_day),
+                exp.LTE: cls(high=value)
+            }[kind]
+
+        value = literal_value(node)
+        if not isinstance(value, (int, float)):
+            return cls()
+        test = {
+            exp.EQ: lambda x: x == value,
+            exp.GT: lambda x: x > value,
+            exp.GTE: lambda x: x >= value,
+            exp.LT: lambda x: x < value,
+            exp.LTE: lambda x: x <= value
+        }[kind]
+        if term == "month":
+            return cls(months={month for month in ALL_MONTHS if test(month)})
+        quarters = [i + 1 for i in range(len(QUARTER_TABLES)) if test(i + 1)]
+        return cls(months=set().union(*[QUARTER_MONTHS[QUARTER_TABLES[q - 1]] for q in quarters]))
+
+    def intersect(self, other):
+        low = max([bound for bound in (self.low, other.low) if bound is not None], default=None)
+        high = min([bound for bound in (self.high, other.high) if bound is not None], default=None)
+        return DateRange(low, high, self.months & other.months)
+
+    def months_of_year(self):
+        if self.low is not None and self.high is not None:
+            if self.low > self.high:
+                return frozenset()
+            first = self.low.year * 12 + self.low.month - 1
+            last = self.high.year * 12 + self.high.month - 1
+            if last - first < 12:
+                return self.months & {index % 12 + 1 for index in range(first, last + 1)}
+        return self.months
+
+
+def translate(query):
+    """Normalized-schema SQL equivalent to a warehouse query; raises UntranslatableQuery"""
+    select = parse_select(query)
+    star = StarQuery(select)
+    star.read_joins()
+    star.map_columns()
+    star.merge_group_by()
+    star.push_down()
+    select.set("from_", exp.From(this=star.union_source()))
+    return select.sql(dialect=DIALECT)
+
+
+def fingerprint(query):
+    return hashlib.sha1(normalize_sql(query).encode()).hexdigest()
+
+
+class QueryTranslator:
+    """translate() memoized by query fingerprint (LRU), failures included"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._translations = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def translate(self, query):
+        key = fingerprint(query)
+        with self._lock:
+            entry = self._translations.get(key)
+            if entry is not None:
+                self._translations.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            try:
+                entry = (translate(query), None)
+            except UntranslatableQuery as e:
+                entry = (None, str(e))
+            with self._lock:
+                self.misses += 1
+                self._translations[key] = entry
+                while len(self._translations) > self.max_entries:
+                    self._translations.popitem(last=False)
+
+        sql, error = entry
+        if error is not None:
+            raise UntranslatableQuery(error)
+        return sql
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._translations),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,262 @@
+"""
+Pagination of /api/query/execute results.
+
+Only queries with an ORDER BY can be paged: without one the row order may
+change between requests, so pages would repeat or skip rows.
+
+Keyset pages are used when every ORDER BY item is a named column of the
+select list. The token carries the sort-key values of the last row sent, and
+the next page seeks past them instead of re-reading earlier rows:
+
+    SELECT TOP (ties + page_size + 1) * FROM (<query>) AS page_source
+    WHERE <sort keys at or after the last row's> ORDER BY <sort keys>
+
+The ORDER BY moves out of the derived table, unless TOP / OFFSET ... FETCH
+inside it depends on it. Rows tying with the last row on every key may not
+all have fitted on the previous page; the token counts those already sent
+(ties) and they are skipped. NULLs compare the way SQL Server sorts them:
+first ascending, last descending.
+
+Any other ORDER BY pages by row offset, re-running the query and skipping
+the earlier rows, and is refused past max_offset rows.
+
+Tokens are stateless (base64 JSON) and carry a fingerprint of the normalized
+SQL, so a token cannot be replayed against another query.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import uuid
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+
+import sqlglot
+from sqlglot import exp
+
+from result_cache import normalize_sql
+
+DIALECT = "tsql"
+PAGE_SOURCE = "page_source"
+
+
+class PaginationError(ValueError):
+    """The query cannot be paged as requested"""
+
+
+class PageTokenError(PaginationError):
+    """The page token is malformed or belongs to a different query"""
+
+
+def query_fingerprint(query):
+    return hashlib.sha256(normalize_sql(query).encode()).hexdigest()[:16]
+
+
+# Sort-key values keep their pyodbc type through the token, so the seek
+# compares them with the column type rather than a float or string
+_TAGGED_TYPES = [
+    ("decimal", Decimal, str, Decimal),
+    ("datetime", datetime, datetime.isoformat, datetime.fromisoformat),
+    ("date", date, date.isoformat, date.fromisoformat),
+    ("time", time_of_day, time_of_day.isoformat, time_of_day.fromisoformat),
+    ("bytes", (bytes, bytearray), lambda value: bytes(value).hex(), bytes.fromhex),
+    ("uuid", uuid.UUID, str, uuid.UUID)
+]
+
+
+def encode_value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    for tag, types, encode, _ in _TAGGED_TYPES:
+        if isinstance(value, types):
+            return {tag: encode(value)}
+    raise PaginationError(f"Cannot page on a {type(value).__name__} sort key")
+
+
+def decode_value(value):
+    if isinstance(value, dict):
+        (tag, text), = value.items()
+        for name, _, _, decode in _TAGGED_TYPES:
+            if name == tag:
+                return decode(text)
+        raise ValueError(f"unknown value tag {tag}")
+    return value
+
+
+def encode_page_token(query, position):
+    """position: {"offset": rows} or {"after": sort-key values, "ties": rows}"""
+    payload = json.dumps({**position, "query": query_fingerprint(query)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_page_token(query, token):
+    """The position encoded in a token issued for this query"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        fingerprint = payload.pop("query")
+        if "after" in payload:
+            position = {"after": [decode_value(value) for value in payload["after"]], "ties": int(payload["ties"])}
+            valid = position["ties"] >= 0
+        else:
+            position = {"offset": int(payload["offset"])}
+            valid = position["offset"] >= 0
+    except (ValueError, KeyError, TypeError, AttributeError, binascii.Error):
+        raise PageTokenError("Malformed page_token")
+    if fingerprint != query_fingerprint(query) or not valid:
+        raise PageTokenError("page_token was issued for a different query")
+    return position
+
+
+def quote(name):
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def output_name(projection):
+    """Column name a select-list item has in the result, or None when it has none"""
+    if isinstance(projection, exp.Alias):
+        return projection.alias or None
+    if isinstance(projection, exp.Column) and not isinstance(projection.this, exp.Star):
+        return projection.name
+    return None
+
+
+def sort_keys(select):
+    """
+    [(output column, descending)] for the ORDER BY items of select, or None when
+    one of them is not a named column of the select list (offset paging)
+    """
+    names = [output_name(projection) for projection in select.expressions]
+    if None in names or len({name.lower() for name in names}) != len(names):
+        return None
+    keys = []
+    for ordered in select.args["order"].expressions:
+        item = ordered.this
+        name = None
+        if isinstance(item, exp.Literal) and not item.is_string:
+            position = int(item.this)
+            name = names[position - 1] if 0 < position <= len(names) else None
+        elif isinstance(item, exp.Column) and not item.table:
+            name = next((n for n in names if n.lower() == item.name.lower()), None)
+        if name is None:
+            name = next((n for n, projection in zip(names, select.expressions) if projection.unalias() == item), None)
+        if name is None:
+            return None
+        keys.append((name, bool(ordered.args.get("desc"))))
+    return keys
+
+
+def seek_condition(keys, values):
+    """
+    SQL and parameters for "sorts at or after the row with these key values",
+    expanded per key since T-SQL has no row-value comparison
+    """
+
+    def equal(column, value):
+        return (f"{column} IS NULL", []) if value is None else (f"{column} = ?", [value])
+
+    def after(column, value, descending):
+        if descending:
+            return ("1 = 0", []) if value is None else (f"({column} < ? OR {column} IS NULL)", [value])
+        return (f"{column} IS NOT NULL", []) if value is None else (f"{column} > ?", [value])
+
+    columns = [f"{PAGE_SOURCE}.{quote(name)}" for name, _ in keys]
+    branches, params = [], []
+    for i, ((_, descending), column, value) in enumerate(zip(keys, columns, values)):
+        terms = [equal(c, v) for c, v in zip(columns[:i], values[:i])] + [after(column, value, descending)]
+        branches.append("(" + " AND ".join(sql for sql, _ in terms) + ")")
+        params.extend(p for _, term_params in terms for p in term_params)
+    ties = [equal(c, v) for c, v in zip(columns, values)]
+    branches.append("(" + " AND ".join(sql for sql, _ in ties) + ")")
+    params.extend(p for _, term_params in ties for p in term_params)
+    return " OR ".join(branches), params
+
+
+class PagePlan:
+    """
+    How to read one page: the SQL and parameters to run, the rows to skip
+    before it, and the token of the page after it
+    """
+
+    def __init__(self, request_query, sql, params, skip, keys=None, position=None):
+        self.request_query = request_query
+        self.sql = sql
+        self.params = params
+        self.skip = skip
+        self.keys = keys
+        self.position = position or {}
+
+    @property
+    def mode(self):
+        return "keyset" if self.keys is not None else "offset"
+
+    @property
+    def offset(self):
+        return self.skip if self.keys is None else None
+
+    def next_page_token(self, columns, page):
+        """Token of the page following page (the rows sent for this one)"""
+        if self.keys is None:
+            return encode_page_token(self.request_query, {"offset": self.skip + len(page)})
+        by_name = {column.lower(): column for column in columns}
+        names = [by_name[name.lower()] for name, _ in self.keys]
+        last = [page[-1][name] for name in names]
+        ties = 0
+        for row in reversed(page):
+            if [row[name] for name in names] != last:
+                break
+            ties += 1
+        if ties == len(page) and self.position.get("after") == last:
+            ties += self.position["ties"]
+        return encode_page_token(self.request_query, {"after": [encode_value(v) for v in last], "ties": ties})
+
+
+def parse_ordered_select(query):
+    try:
+        statements = [statement for statement in sqlglot.parse(query, read=DIALECT) if statement is not None]
+    except sqlglot.errors.SqlglotError:
+        raise PaginationError("Pagination needs a query that can be parsed")
+    if len(statements) != 1 or not isinstance(statements[0], exp.Query):
+        raise PaginationError("Pagination needs a single query")
+    if statements[0].args.get("order") is None:
+        raise PaginationError("Pagination needs a query with an ORDER BY; without one pages are not stable")
+    return statements[0]
+
+
+def plan_page(request_query, query, page_token, page_size, max_offset):
+    """
+    PagePlan for one page of query (the SQL to run for request_query, e.g. after
+    aggregate routing), starting at page_token or at the first row
+    """
+    statement = parse_ordered_select(query)
+    position = decode_page_token(request_query, page_token) if page_token else None
+    keys = sort_keys(statement) if isinstance(statement, exp.Select) else None
+
+    if keys is None:
+        if position is not None and "after" in position:
+            raise PageTokenError("page_token was issued for a different query")
+        offset = position["offset"] if position else 0
+        if offset > max_offset:
+            raise PaginationError(f"Offset pages stop after {max_offset:,} rows; order by columns of the "
+                                  "select list to page further")
+        return PagePlan(request_query, query, [], offset)
+
+    if position is not None and ("after" not in position or len(position["after"]) != len(keys)):
+        raise PageTokenError("page_token was issued for a different query")
+    if position is not None and position["ties"] > max_offset:
+        raise PaginationError(f"More than {max_offset:,} rows share the same sort keys; add a more selective "
+                              "ORDER BY column to page further")
+
+    # Rows of the query, in any order, then sorted and limited outside
+    statement = statement.copy()
+    with_ = statement.args.get("with_")
+    statement.set("with_", None)
+    if statement.args.get("limit") is None and statement.args.get("offset") is None:
+        statement.set("order", None)
+    order = ", ".join(f"{PAGE_SOURCE}.{quote(name)}{' DESC' if descending else ''}" for name, descending in keys)
+    skip = position["ties"] if position else 0
+    where, params = seek_condition(keys, position["after"]) if position else ("", [])
+    sql = (f"{with_.sql(dialect=DIALECT) + ' ' if with_ else ''}"
+           f"SELECT TOP ({skip + page_size + 1}) * FROM ({statement.sql(dialect=DIALECT)}) AS {PAGE_SOURCE}"
+           f"{' WHERE ' + where if where else ''} ORDER BY {order}")
+    return PagePlan(request_query, sql, params, skip, keys, position)
@@ -0,0 +1,125 @@
+"""
+Runs blocking pyodbc work off the asyncio event loop.
+
+Calls are dispatched to one bounded thread pool. Each database has its own
+concurrency limit and a bounded wait queue in front of it, so a burst of slow
+normalized queries cannot starve the warehouse or hold up the event loop.
+When a database's queue is full the call is rejected at once (QueueFull, 429);
+a call that waits longer than queue_timeout gives up (QueueTimeout, 503).
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    """The query was not admitted; status_code is the HTTP status to return"""
+    status_code = 503
+
+
+class QueueFull(Overloaded):
+    status_code = 429
+
+
+class QueueTimeout(Overloaded):
+    status_code = 503
+
+
+class DatabaseLimiter:
+    def __init__(self, name, max_concurrent, max_queue):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.running = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+
+    def finish(self, future):
+        self.running -= 1
+        if future is None or future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+        self.semaphore.release()
+
+    def stats(self):
+        admitted = self.completed + self.failed + self.running
+        return {
+            'database': self.name,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'running': self.running,
+            'queued': self.queued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'avg_queue_ms': round(self.total_queue_ms / admitted, 2) if admitted else 0.0,
+            'max_queue_ms': round(self.max_queue_ms, 2)
+        }
+
+
+class QueryExecutor:
+    def __init__(self, limits, max_queue=50, queue_timeout=30.0):
+        """limits: {database: max concurrent queries}; the thread pool is sized to their sum"""
+        self.queue_timeout = queue_timeout
+        self.max_workers = sum(limits.values())
+        self._limiters = {database: DatabaseLimiter(database, limit, max_queue) for database, limit in limits.items()}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-query")
+
+    async def run(self, database, func, *args):
+        """Run func(*args) in the thread pool once the database admits it"""
+        limiter = self._limiters[database]
+        if limiter.queued >= limiter.max_queue:
+            limiter.rejected += 1
+            raise QueueFull(f"{database} query queue is full ({limiter.queued} waiting, "
+                            f"{limiter.running} running) - retry later")
+
+        queued_at = time.monotonic()
+        limiter.queued += 1
+        try:
+            await asyncio.wait_for(limiter.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            limiter.timed_out += 1
+            raise QueueTimeout(f"{database} query waited more than {self.queue_timeout}s for a slot")
+        finally:
+            limiter.queued -= 1
+
+        queue_ms = (time.monotonic() - queued_at) * 1000
+        limiter.total_queue_ms += queue_ms
+        limiter.max_queue_ms = max(limiter.max_queue_ms, queue_ms)
+        limiter.running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            limiter.finish(None)
+            raise
+        # The slot is freed when the thread finishes, even if the request was cancelled meanwhile
+        future.add_done_callback(lambda done: self._finish_threadsafe(loop, limiter, done))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _finish_threadsafe(loop, limiter, future):
+        try:
+            loop.call_soon_threadsafe(limiter.finish, future)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'queue_timeout_s': self.queue_timeout,
+            'databases': [limiter.stats() for limiter in self._limiters.values()]
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
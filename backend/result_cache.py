@@ -0,0 +1,159 @@
+"""
+In-process cache of query results, keyed on (database, normalized SQL).
+
+Entries are evicted least-recently-used once max_entries or max_bytes is
+exceeded, and expire after ttl_seconds. Each database has its own data
+version (the warehouse: the latest ETL_Runs.run_id, the normalized database:
+the latest Import_Runs.import_id): when one moves, that database's entries are
+dropped. A database whose version is unknown is not cached at all.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import sqlglot
+from sqlglot import exp
+
+DIALECT = "tsql"
+
+# Quoted literals are kept verbatim; everything else is case/whitespace-folded
+_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_SIZE_SAMPLE_ROWS = 100
+
+
+def normalize_sql(sql):
+    """Canonical text for cache keys: no comments, single spaces, lower case outside literals"""
+    parts = _LITERAL.split(sql)
+    for i in range(0, len(parts), 2):
+        code = _BLOCK_COMMENT.sub(" ", _LINE_COMMENT.sub(" ", parts[i]))
+        parts[i] = " ".join(code.split()).lower()
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def is_cacheable(sql):
+    """
+    Only read-only statements are cached: a single SELECT (or WITH/UNION query)
+    that writes nothing - no SELECT ... INTO, no batch of several statements
+    """
+    try:
+        statements = [statement for statement in sqlglot.parse(sql, read=DIALECT) if statement is not None]
+    except sqlglot.errors.SqlglotError:
+        return False
+    if len(statements) != 1 or not isinstance(statements[0], exp.Query):
+        return False
+    return statements[0].find(exp.Into) is None
+
+
+def estimate_result_bytes(columns, rows):
+    """Approximate in-memory size of a list of row dicts, sampled from the first rows"""
+    sample = rows[:_SIZE_SAMPLE_ROWS]
+    if not sample:
+        return sys.getsizeof(rows)
+    sample_bytes = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values()) for row in sample)
+    return sys.getsizeof(rows) + sample_bytes * len(rows) // len(sample) + sum(sys.getsizeof(col) for col in columns)
+
+
+class CacheEntry:
+    def __init__(self, value, size):
+        self.value = value
+        self.size = size
+        self.created_at = time.time()
+
+    def age(self):
+        return time.time() - self.created_at
+
+
+class ResultCache:
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024, ttl_seconds=3600.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.versions = {}
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def set_version(self, database, version):
+        """Drop database's entries if its data version changed (a new ETL run or import finished)"""
+        with self._lock:
+            if database not in self.versions or version != self.versions[database]:
+                self._drop_database(database)
+                self.versions[database] = version
+
+    def forget_version(self, database):
+        """Drop database's entries and stop caching it until its version is known again"""
+        with self._lock:
+            self._drop_database(database)
+            self.versions.pop(database, None)
+
+    def has_version(self, database):
+        with self._lock:
+            return database in self.versions
+
+    def version(self, database):
+        with self._lock:
+            return self.versions.get(database)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.age() > self.ttl_seconds:
+                self._remove(key)
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+
+    def put(self, key, value, size):
+        """Store a result; results bigger than a quarter of the byte budget are not cached"""
+        if size > self.max_bytes // 4:
+            return None
+        entry = CacheEntry(value, size)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'data_versions': dict(self.versions),
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0,
+                **self._stats
+            }
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key).size
+
+    def _drop_database(self, database):
+        keys = [key for key in self._entries if key[0] == database]
+        if keys:
+            self._stats['invalidations'] += 1
+        for key in keys:
+            self._remove(key)
@@ -0,0 +1,232 @@
+"""
+Column-oriented result formats, chosen by content negotiation.
+
+    Accept: application/vnd.apache.arrow.stream        Arrow IPC stream
+    Accept: application/vnd.flightdw.columnar+json     {"columns": [...], "data": [[col values], ...]}
+    anything else (application/json, */*)              the row-per-object JSON envelope
+
+A ?format=arrow|columnar|rows query parameter overrides the Accept header.
+Both columnar formats are built from fetchmany batches by transposing each
+batch into columns, with no per-row dicts. Arrow types come from the
+cursor description (pyodbc reports the Python type of each column).
+"""
+
+import datetime
+import decimal
+import time
+
+from streaming import dumps
+
+try:
+    import pyarrow as pa
+except ImportError:  # optional: Arrow responses return 406 without it
+    pa = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.flightdw.columnar+json"
+FORMATS = {
+    "rows": "application/json",
+    "columnar": COLUMNAR_JSON_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE
+}
+
+
+class UnsupportedFormat(ValueError):
+    """Requested format is unknown or its library is not installed (406)"""
+
+
+def negotiate_format(accept=None, requested=None):
+    """'rows', 'columnar' or 'arrow' from an explicit format name or the Accept header"""
+    if requested:
+        if requested not in FORMATS:
+            raise UnsupportedFormat(f"Unknown format '{requested}' (choose from {', '.join(FORMATS)})")
+        result_format = requested
+    else:
+        media_types = [part.split(";")[0].strip().lower() for part in (accept or "").split(",")]
+        if ARROW_MEDIA_TYPE in media_types:
+            result_format = "arrow"
+        elif COLUMNAR_JSON_MEDIA_TYPE in media_types:
+            result_format = "columnar"
+        else:
+            result_format = "rows"
+    if result_format == "arrow" and pa is None:
+        raise UnsupportedFormat("Arrow responses require the 'pyarrow' package")
+    return result_format
+
+
+def transpose(rows):
+    return [list(values) for values in zip(*rows)]
+
+
+def column_batches(cursor, limit, chunk_size):
+    """Each fetchmany batch, at most limit rows in total, as a list of column lists"""
+    remaining = limit
+    while remaining > 0:
+        rows = cursor.fetchmany(min(chunk_size, remaining))
+        if not rows:
+            return
+        remaining -= len(rows)
+        yield transpose(rows)
+
+
+def has_more_rows(cursor, row_count, limit):
+    return row_count >= limit and cursor.fetchone() is not None
+
+
+def run_columnar_query(pool, query, limit, chunk_size):
+    """Blocking - execute and collect the result column-wise. Returns (columns, column values, execution ms, truncated)"""
+    with pool.connection() as conn:
+        start = time.time()
+        cursor = conn.cursor()
+        cursor.execute(query)
+        columns = [col[0] for col in cursor.description]
+        values = [[] for _ in columns]
+        for batch in column_batches(cursor, limit, chunk_size):
+            for column, batch_values in zip(values, batch):
+                column.extend(batch_values)
+        truncated = has_more_rows(cursor, len(values[0]), limit)
+        exec_time = (time.time() - start) * 1000
+        cursor.close()
+    return columns, values, exec_time, truncated
+
+
+def run_arrow_query(pool, query, limit, chunk_size):
+    """Blocking - execute and build one Arrow RecordBatch per fetchmany batch. Returns (table, execution ms, truncated)"""
+    with pool.connection() as conn:
+        start = time.time()
+        cursor = conn.cursor()
+        cursor.execute(query)
+        description = cursor.description
+        schema = None
+        record_batches = []
+        for batch in column_batches(cursor, limit, chunk_size):
+            if schema is None:
+                schema = arrow_schema(description, batch)
+            record_batches.append(arrow_record_batch(schema, batch))
+        truncated = has_more_rows(cursor, sum(batch.num_rows for batch in record_batches), limit)
+        exec_time = (time.time() - start) * 1000
+        cursor.close()
+    if schema is None:
+        schema = arrow_schema(description, None)
+    return pa.Table.from_batches(record_batches, schema=schema), exec_time, truncated
+
+
+def columnar_json_bytes(columns, values, exec_time, truncated):
+    return dumps({
+        "success": True,
+        "format": "columnar",
+        "columns": columns,
+        "data": values,
+        "row_count": len(values[0]) if values else 0,
+        "truncated": truncated,
+        "execution_time_ms": round(exec_time, 2)
+    }).encode()
+
+
+def run_formatted_query(pool, query, result_format, limit, chunk_size):
+    """
+    Blocking - fetch column-wise and encode, so serialization also stays off the
+    event loop. Returns (body bytes, row count, execution ms, truncated)
+    """
+    if result_format == "arrow":
+        table, exec_time, truncated = run_arrow_query(pool, query, limit, chunk_size)
+        return arrow_ipc_bytes(table), table.num_rows, exec_time, truncated
+    columns, values, exec_time, truncated = run_columnar_query(pool, query, limit, chunk_size)
+    body = columnar_json_bytes(columns, values, exec_time, truncated)
+    return body, len(values[0]) if values else 0, exec_time, truncated
+
+
+_ARROW_TYPES = {
+    bool: lambda col: pa.bool_(),
+    int: lambda col: pa.int64(),
+    float: lambda col: pa.float64(),
+    str: lambda col: pa.string(),
+    bytes: lambda col: pa.binary(),
+    bytearray: lambda col: pa.binary(),
+    datetime.datetime: lambda col: pa.timestamp("us"),
+    datetime.date: lambda col: pa.date32(),
+    datetime.time: lambda col: pa.time64("us"),
+    decimal.Decimal: lambda col: pa.decimal128(min(col[4] or 38, 38), col[5] or 0)
+}
+
+
+def arrow_schema(description, first_batch):
+    """Schema from the cursor description; columns of unknown type are inferred from the first batch"""
+    fields = []
+    for i, col in enumerate(description):
+        to_type = _ARROW_TYPES.get(col[1])
+        if to_type is not None:
+            arrow_type = to_type(col)
+        elif first_batch is not None:
+            arrow_type = pa.array(first_batch[i]).type
+        else:
+            arrow_type = pa.string()
+        if pa.types.is_null(arrow_type):
+            arrow_type = pa.string()
+        fields.append(pa.field(col[0], arrow_type))
+    return pa.schema(fields)
+
+
+def arrow_record_batch(schema, column_values):
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(column_values, schema)],
+        schema=schema
+    )
+
+
+def arrow_ipc_bytes(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class ChunkSink:
+    """File-like target for an Arrow IPC writer; take() returns the bytes written since the last call"""
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def arrow_stream_body(stream, description):
+    """Arrow IPC stream written batch by batch from a RowStream (schema message first)"""
+    sink = ChunkSink()
+    schema = None
+    writer = None
+    try:
+        while True:
+            item = await stream.next()
+            if item[0] == "rows":
+                batch = transpose(item[1])
+                if writer is None:
+                    schema = arrow_schema(description, batch)
+                    writer = pa.ipc.new_stream(sink, schema)
+                writer.write_batch(arrow_record_batch(schema, batch))
+                yield sink.take()
+            elif item[0] == "end":
+                if writer is None:
+                    writer = pa.ipc.new_stream(sink, arrow_schema(description, None))
+                writer.close()
+                yield sink.take()
+                return
+            else:
+                # Ending without the end-of-stream marker makes readers fail instead of seeing a short result
+                raise item[1]
+    finally:
+        stream.stop()
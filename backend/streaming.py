@@ -0,0 +1,138 @@
+"""
+Chunked delivery of large query results.
+
+A RowStream runs its producer inside one query-executor slot: it holds a pooled
+connection, reads the result with fetchmany and hands chunks to the event loop
+through a small bounded queue. When the client reads slowly the producer
+blocks (backpressure); when the client disconnects it stops at the next chunk.
+At most max_chunks chunks are buffered at any time, whatever the result size.
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+_PUT_POLL_SECONDS = 0.5
+
+
+def json_default(value):
+    """JSON encoding for the pyodbc value types the stdlib encoder does not handle"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    return json.dumps(value, default=json_default, separators=(",", ":"))
+
+
+class RowStream:
+    def __init__(self, loop, max_chunks=4):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_chunks)
+        self.stopped = False
+        self.task = None
+
+    def produce(self, pool, query, chunk_size, max_rows):
+        """
+        Blocking producer. Queue items: ('columns', names, cursor description),
+        ('rows', list of tuples)..., then ('end', row count, truncated,
+        execution ms) or ('error', exception)
+        """
+        try:
+            with pool.connection() as conn:
+                start = time.time()
+                cursor = conn.cursor()
+                cursor.execute(query)
+                if cursor.description is None:
+                    raise ValueError("Query returned no result set")
+                if not self._put(("columns", [col[0] for col in cursor.description], cursor.description)):
+                    return
+                row_count = 0
+                truncated = False
+                while row_count < max_rows:
+                    rows = cursor.fetchmany(min(chunk_size, max_rows - row_count))
+                    if not rows:
+                        break
+                    row_count += len(rows)
+                    if not self._put(("rows", rows)):
+                        return
+                else:
+                    truncated = cursor.fetchone() is not None
+                cursor.close()
+                self._put(("end", row_count, truncated, (time.time() - start) * 1000))
+        except Exception as e:
+            self._put(("error", e))
+
+    def _put(self, item):
+        """Hand an item to the event loop, waiting while the queue is full; False once stopped"""
+        future = asyncio.run_coroutine_threadsafe(self.queue.put(item), self.loop)
+        while True:
+            if self.stopped:
+                future.cancel()
+                return False
+            try:
+                future.result(timeout=_PUT_POLL_SECONDS)
+                return True
+            except FutureTimeout:
+                continue
+
+    async def next(self):
+        return await self.queue.get()
+
+    def stop(self):
+        self.stopped = True
+
+
+async def ndjson_body(stream, columns):
+    """First line {"columns": [...]}, one JSON object per row, last line the totals (or an error)"""
+    try:
+        yield dumps({"columns": columns}) + "\n"
+        while True:
+            item = await stream.next()
+            if item[0] == "rows":
+                yield "".join(dumps(dict(zip(columns, row))) + "\n" for row in item[1])
+            elif item[0] == "end":
+                _, row_count, truncated, exec_time = item
+                yield dumps({"row_count": row_count, "truncated": truncated,
+                             "execution_time_ms": round(exec_time, 2)}) + "\n"
+                return
+            else:
+                yield dumps({"error": str(item[1])}) + "\n"
+                return
+    finally:
+        stream.stop()
+
+
+async def json_array_body(stream, columns):
+    """The regular response envelope, written incrementally with "data" as a streamed array"""
+    try:
+        yield '{"success":true,"columns":' + dumps(columns) + ',"data":['
+        separator = ""
+        while True:
+            item = await stream.next()
+            if item[0] == "rows":
+                yield separator + ",".join(dumps(dict(zip(columns, row))) for row in item[1])
+                separator = ","
+            elif item[0] == "end":
+                _, row_count, truncated, exec_time = item
+                yield '],"complete":true,"row_count":' + dumps(row_count) + ',"truncated":' + dumps(truncated) + \
+                      ',"execution_time_ms":' + dumps(round(exec_time, 2)) + '}'
+                return
+            else:
+                # Headers are already sent, so a failure mid-result is reported in the body
+                yield '],"complete":false,"error":' + dumps(str(item[1])) + '}'
+                return
+    finally:
+        stream.stop()
@@ -0,0 +1,107 @@
+"""
+Sidecar manifests: <file>.manifest.json next to a data file, written by the
+tool that produced or fully read it (split.py, the test.py fallback):
+
+    {"file": "2024_Q1.csv", "rows": 1234, "undated_rows": 0,
+     "min_date": "2024-01-01", "max_date": "2024-03-31",
+     "bytes": 5678, "mtime_ns": ..., "checksum": "sha256:..."}
+
+A manifest is fresh while the file still has the recorded size and mtime,
+so checking it costs one stat; checksum is the SHA-256 of the file bytes.
+pandas is only imported by the functions that parse dates, keeping the
+fresh-manifest check of test.py free of it.
+"""
+
+import hashlib
+import io
+import json
+import os
+
+MANIFEST_SUFFIX = '.manifest.json'
+CHUNK_SIZE = 250000
+
+
+def manifest_path(path):
+    return path + MANIFEST_SUFFIX
+
+
+class HashingReader(io.RawIOBase):
+    """Binary file wrapper that hashes every byte read through it"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            self.hash.update(memoryview(buffer)[:count])
+        return count
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+    def checksum(self):
+        return f"sha256:{self.hash.hexdigest()}"
+
+
+def open_hashed(path):
+    """Buffered binary reader over path plus the HashingReader behind it"""
+    hashing = HashingReader(open(path, 'rb'))
+    return io.BufferedReader(hashing, buffer_size=1 << 20), hashing
+
+
+def write_manifest(path, rows, min_date, max_date, checksum, undated_rows=0):
+    """Record path's stats; call after the file is closed so size/mtime are final"""
+    import pandas as pd
+    stat = os.stat(path)
+    manifest = {
+        'file': os.path.basename(path),
+        'rows': int(rows),
+        'undated_rows': int(undated_rows),
+        'min_date': None if min_date is None else str(pd.Timestamp(min_date).date()),
+        'max_date': None if max_date is None else str(pd.Timestamp(max_date).date()),
+        'bytes': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'checksum': checksum
+    }
+    with open(manifest_path(path), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path):
+    """The manifest of path, or None when it is missing or stale"""
+    try:
+        with open(manifest_path(path), encoding='utf-8') as f:
+            manifest = json.load(f)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('bytes') != stat.st_size or manifest.get('mtime_ns') != stat.st_mtime_ns:
+        return None
+    return manifest
+
+
+def scan_dates(path, chunk_size=CHUNK_SIZE):
+    """
+    Stream fl_date of a CSV in chunks, hashing the file on the way, and write its
+    manifest. Returns the manifest.
+    """
+    import pandas as pd
+    rows = undated_rows = 0
+    min_date = max_date = None
+    reader, hashing = open_hashed(path)
+    with reader:
+        for chunk in pd.read_csv(reader, usecols=['fl_date'], dtype=str, chunksize=chunk_size):
+            dates = pd.to_datetime(chunk['fl_date'], errors='coerce')
+            rows += len(dates)
+            undated_rows += int(dates.isna().sum())
+            if dates.notna().any():
+                min_date = dates.min() if min_date is None else min(min_date, dates.min())
+                max_date = dates.max() if max_date is None else max(max_date, dates.max())
+    return write_manifest(path, rows, min_date, max_date, hashing.checksum(), undated_rows)
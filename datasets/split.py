@@ -1,41 +1,81 @@
+import hashlib
 import pandas as pd
+from manifest import open_hashed, write_manifest
 
-def split_csv_by_quarter(input_file, output_prefix='2024_Q'):
+CHUNK_SIZE = 250000
+
+def split_csv_by_quarter(input_file, output_prefix='{year}_Q', chunk_size=CHUNK_SIZE):
     
-    # Read the main CSV file
-    print(f"Reading {input_file}...")
-    df = pd.read_csv(input_file)
+    # Stream the main CSV in chunks and route every row to its quarter file in
+    # one pass. Values are kept as the original text; only fl_date is parsed,
+    # and year/quarter come from the dates themselves, so multi-year input
+    # gives one file per year and quarter. Memory stays at one chunk.
+    # Every output, and the input, gets a manifest (manifest.py) for test.py.
+    print(f"Streaming {input_file} in chunks of {chunk_size:,} rows...")
     
-    # Display basic info
-    print(f"Total rows: {len(df)}")
-    print(f"Date range: {df['fl_date'].min()} to {df['fl_date'].max()}")
+    outputs = {}      # (year, quarter) -> open output file
+    hashes = {}       # (year, quarter) -> sha256 of the bytes written
+    stats = {}        # (year, quarter) -> [rows, min date, max date]
+    total_rows = 0
+    undated_rows = 0
+    input_dates = None
     
-    # Convert fl_date to datetime if it's not already
-    df['fl_date'] = pd.to_datetime(df['fl_date'])
+    source, input_hash = open_hashed(input_file)
+    try:
+        with source, pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                total_rows += len(chunk)
+                dates = pd.to_datetime(chunk['fl_date'], errors='coerce')
+                dated = dates.notna()
+                undated_rows += int((~dated).sum())
+                
+                dates = dates[dated]
+                if len(dates):
+                    chunk_range = [dates.min(), dates.max()]
+                    input_dates = chunk_range if input_dates is None else [
+                        min(input_dates[0], chunk_range[0]), max(input_dates[1], chunk_range[1])]
+                keys = [dates.dt.year, dates.dt.quarter]
+                for (year, quarter), quarter_dates in dates.groupby(keys, sort=True):
+                    key = (int(year), int(quarter))
+                    output = outputs.get(key)
+                    if output is None:
+                        # Create output filename and write the header once
+                        output_file = f"{output_prefix.format(year=key[0])}{key[1]}.csv"
+                        output = outputs[key] = open(output_file, 'wb')
+                        hashes[key] = hashlib.sha256()
+                        stats[key] = [0, quarter_dates.min(), quarter_dates.max()]
+                        header = chunk.iloc[:0].to_csv(index=False).encode('utf-8')
+                        output.write(header)
+                        hashes[key].update(header)
+                    
+                    data = chunk.loc[quarter_dates.index].to_csv(header=False, index=False).encode('utf-8')
+                    output.write(data)
+                    hashes[key].update(data)
+                    key_stats = stats[key]
+                    key_stats[0] += len(quarter_dates)
+                    key_stats[1] = min(key_stats[1], quarter_dates.min())
+                    key_stats[2] = max(key_stats[2], quarter_dates.max())
+                
+                print(f"  {total_rows:,} rows routed")
+    finally:
+        for output in outputs.values():
+            output.close()
     
-    # Define quarter date ranges for 2024
-    quarters = {
-        'Q1': ('2024-01-01', '2024-03-31'),
-        'Q2': ('2024-04-01', '2024-06-30'),
-        'Q3': ('2024-07-01', '2024-09-30'),
-        'Q4': ('2024-10-01', '2024-12-31')
-    }
+    for key, output in outputs.items():
+        rows, min_date, max_date = stats[key]
+        write_manifest(output.name, rows, min_date, max_date, f"sha256:{hashes[key].hexdigest()}")
+    write_manifest(input_file, total_rows, *(input_dates or [None, None]),
+                   input_hash.checksum(), undated_rows)
     
-    # Split and save each quarter
-    for quarter, (start_date, end_date) in quarters.items():
-        # Filter data for the quarter
-        mask = (df['fl_date'] >= start_date) & (df['fl_date'] <= end_date)
-        quarter_df = df[mask]
-        
-        # Create output filename
-        output_file = f"{output_prefix}{quarter}.csv"
-        
-        # Save to CSV
-        quarter_df.to_csv(output_file, index=False)
-        
-        print(f"{quarter}: {len(quarter_df)} rows -> {output_file}")
+    # Display basic info
+    print(f"Total rows: {total_rows}")
+    if undated_rows:
+        print(f"Rows without a valid fl_date (not written): {undated_rows}")
+    for (year, quarter), (rows, min_date, max_date) in sorted(stats.items()):
+        print(f"{year} Q{quarter}: {rows} rows ({min_date.date()} to {max_date.date()}) -> {outputs[year, quarter].name}")
     
     print("\nSplit complete!")
 
 # Run the function with your file
-split_csv_by_quarter('flight_data_2024.csv')
\ No newline at end of file
+if __name__ == '__main__':
+    split_csv_by_quarter('flight_data_2024.csv')
@@ -0,0 +1,210 @@
+"""
+Convert flight_data_2024.csv once into a Parquet dataset partitioned by
+quarter and month (hive layout: quarter=1/month=1/part-0.parquet), holding
+the 25 source columns in compact types. test.py and the importer read the
+staged dataset instead of re-parsing the CSV, loading only the columns and
+partitions they need. split.py keeps streaming the CSV: its quarter files
+carry the original text of every column and are split by year as well.
+
+The staging folder also holds _source.json, the path, size and mtime of the
+CSV it was staged from. Readers use the staged copy only while the CSV still
+matches it (staged_is_fresh); a changed CSV has to be staged again.
+
+    python stage_parquet.py [flight_data_2024.csv] [flight_data_2024_parquet]
+"""
+
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+INPUT_FILE = 'flight_data_2024.csv'
+STAGING_FOLDER = 'flight_data_2024_parquet'
+CHUNK_SIZE = 250000
+
+# The 25 source columns (flight_etl_pipeline.SELECT_COLUMNS). Codes are stored
+# as strings (dictionary encoded on disk) and read back as categoricals;
+# minutes/miles as float32, hhmm times as int16 and 0/1 flags as int8
+SCHEMA = pa.schema([
+    ('fl_date', pa.date32()),
+    ('op_unique_carrier', pa.string()),
+    ('op_carrier_fl_num', pa.string()),
+    ('origin', pa.string()),
+    ('dest', pa.string()),
+    ('crs_dep_time', pa.int16()),
+    ('dep_time', pa.int16()),
+    ('crs_arr_time', pa.int16()),
+    ('arr_time', pa.int16()),
+    ('dep_delay', pa.float32()),
+    ('arr_delay', pa.float32()),
+    ('taxi_out', pa.float32()),
+    ('taxi_in', pa.float32()),
+    ('crs_elapsed_time', pa.float32()),
+    ('actual_elapsed_time', pa.float32()),
+    ('air_time', pa.float32()),
+    ('distance', pa.float32()),
+    ('cancelled', pa.int8()),
+    ('cancellation_code', pa.string()),
+    ('diverted', pa.int8()),
+    ('carrier_delay', pa.float32()),
+    ('weather_delay', pa.float32()),
+    ('nas_delay', pa.float32()),
+    ('security_delay', pa.float32()),
+    ('late_aircraft_delay', pa.float32())
+])
+SELECT_COLUMNS = SCHEMA.names
+CODE_COLUMNS = [f.name for f in SCHEMA if pa.types.is_string(f.type)]
+INT_COLUMNS = [f.name for f in SCHEMA if pa.types.is_integer(f.type)]
+PARTITION_SCHEMA = pa.schema([('quarter', pa.int8()), ('month', pa.int8())])
+PARTITIONING = ds.partitioning(PARTITION_SCHEMA, flavor='hive')
+STAGED_SCHEMA = pa.schema(list(SCHEMA) + list(PARTITION_SCHEMA))
+# Integer columns with nulls stay integers in pandas (Int16/Int8) instead of float64
+NULLABLE_INTEGERS = {pa.int16(): pd.Int16Dtype(), pa.int8(): pd.Int8Dtype()}
+# Partition files are written with row groups of this many rows (the last one may be smaller)
+ROWS_PER_GROUP = 128 * 1024
+# Identity of the staged CSV; pyarrow skips '_' files when discovering the dataset
+SOURCE_STAMP = '_source.json'
+
+
+def to_staged_table(chunk):
+    """One CSV chunk -> table of STAGED_SCHEMA (the columns plus quarter/month)"""
+    # fl_date arrives as text: values that are not dates become NaT (the rule of
+    # split.py and manifest.py) rather than turning the whole column into strings
+    dates = pd.to_datetime(chunk['fl_date'], errors='coerce')
+    arrays = [pa.array(dates.dt.date, type=pa.date32())]
+    for field in SCHEMA:
+        if field.name == 'fl_date':
+            continue
+        if field.name in INT_COLUMNS:
+            # The CSV may write these as "1234.0"; round, keeping NaN/inf as null
+            values = chunk[field.name].to_numpy(dtype='float64')
+            missing = ~np.isfinite(values)
+            values = np.round(np.where(missing, 0, values)).astype(field.type.to_pandas_dtype())
+            arrays.append(pa.array(values, mask=missing, type=field.type))
+        else:
+            arrays.append(pa.array(chunk[field.name], type=field.type, from_pandas=True))
+    # Rows without a date land in the null (__HIVE_DEFAULT_PARTITION__) partition
+    no_date = dates.isna().to_numpy()
+    month = dates.dt.month.fillna(1).to_numpy(dtype='int8')
+    arrays.append(pa.array((month - 1) // 3 + 1, mask=no_date, type=pa.int8()))
+    arrays.append(pa.array(month, mask=no_date, type=pa.int8()))
+    return pa.Table.from_arrays(arrays, schema=STAGED_SCHEMA)
+
+
+def stage_csv(input_file=INPUT_FILE, staging_folder=STAGING_FOLDER, chunk_size=CHUNK_SIZE):
+    """Stream the CSV into the partitioned dataset in one pass; returns the row count"""
+    rows = 0
+
+    def batches():
+        nonlocal rows
+        dtypes = {name: 'float32' for name in SELECT_COLUMNS if name not in CODE_COLUMNS + ['fl_date']}
+        dtypes.update({name: 'str' for name in CODE_COLUMNS + ['fl_date']})
+        with pd.read_csv(input_file, usecols=SELECT_COLUMNS, dtype=dtypes, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                rows += len(chunk)
+                print(f"  {rows:,} rows staged")
+                yield from to_staged_table(chunk).to_batches()
+
+    # Partitions the new input doesn't produce must not survive from an earlier run
+    if os.path.isdir(staging_folder):
+        shutil.rmtree(staging_folder)
+    ds.write_dataset(
+        batches(), staging_folder, schema=STAGED_SCHEMA, format='parquet',
+        partitioning=PARTITIONING, basename_template='part-{i}.parquet',
+        min_rows_per_group=ROWS_PER_GROUP, max_rows_per_group=ROWS_PER_GROUP,
+        file_options=ds.ParquetFileFormat().make_write_options(compression='zstd')
+    )
+    write_source_stamp(input_file, staging_folder)
+    return rows
+
+
+def write_source_stamp(input_file, staging_folder=STAGING_FOLDER):
+    """Record which CSV, at which size and mtime, the staging folder was built from"""
+    stat = os.stat(input_file)
+    stamp = {'source': os.path.abspath(input_file), 'bytes': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    with open(os.path.join(staging_folder, SOURCE_STAMP), 'w', encoding='utf-8') as f:
+        json.dump(stamp, f, indent=2)
+    return stamp
+
+
+def staged_is_fresh(input_file, staging_folder=STAGING_FOLDER):
+    """True while staging_folder was staged from input_file and the CSV has not changed since"""
+    try:
+        with open(os.path.join(staging_folder, SOURCE_STAMP), encoding='utf-8') as f:
+            stamp = json.load(f)
+        stat = os.stat(input_file)
+    except (OSError, ValueError):
+        return False
+    return (stamp.get('source') == os.path.abspath(input_file) and stamp.get('bytes') == stat.st_size
+            and stamp.get('mtime_ns') == stat.st_mtime_ns)
+
+
+def open_staged(staging_folder=STAGING_FOLDER):
+    """The staged dataset; code columns are read as dictionaries (pandas categoricals)"""
+    parquet_format = ds.ParquetFileFormat(read_options={'dictionary_columns': CODE_COLUMNS})
+    return ds.dataset(staging_folder, format=parquet_format, partitioning=PARTITIONING)
+
+
+def staged_filter(quarter=None, months=None):
+    """Partition filter: only the matching quarter=/month= directories are opened"""
+    condition = None
+    if quarter is not None:
+        condition = ds.field('quarter') == quarter
+    if months is not None:
+        month_filter = ds.field('month').isin(list(months))
+        condition = month_filter if condition is None else condition & month_filter
+    return condition
+
+
+def read_staged(columns=None, quarter=None, months=None, staging_folder=STAGING_FOLDER):
+    """DataFrame of the requested columns from the matching partitions only"""
+    table = open_staged(staging_folder).to_table(columns=columns or SELECT_COLUMNS,
+                                                  filter=staged_filter(quarter, months))
+    return table.to_pandas(date_as_object=False, types_mapper=NULLABLE_INTEGERS.get)
+
+
+def staged_quarters(staging_folder=STAGING_FOLDER):
+    """Quarters present in the staged dataset, from the directory names alone"""
+    quarters = set()
+    for fragment in open_staged(staging_folder).get_fragments():
+        quarters.add(ds.get_partition_keys(fragment.partition_expression).get('quarter'))
+    return sorted(quarter for quarter in quarters if quarter is not None)
+
+
+def staged_date_stats(quarter=None, staging_folder=STAGING_FOLDER):
+    """
+    (row count, undated rows, min fl_date, max fl_date) from Parquet footers, without
+    reading any data pages. Undated rows are those of the null partition; they are
+    part of the row count, as in a CSV manifest.
+    """
+    count, undated, min_date, max_date = 0, 0, None, None
+    for fragment in open_staged(staging_folder).get_fragments(filter=staged_filter(quarter)):
+        metadata = fragment.metadata
+        if ds.get_partition_keys(fragment.partition_expression).get('quarter') is None:
+            undated += metadata.num_rows
+        column = metadata.schema.names.index('fl_date')
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            count += row_group.num_rows
+            statistics = row_group.column(column).statistics
+            if statistics is None or not statistics.has_min_max:
+                continue
+            min_date = statistics.min if min_date is None else min(min_date, statistics.min)
+            max_date = statistics.max if max_date is None else max(max_date, statistics.max)
+    return count, undated, min_date, max_date
+
+
+if __name__ == '__main__':
+    input_file = sys.argv[1] if len(sys.argv) > 1 else INPUT_FILE
+    staging_folder = sys.argv[2] if len(sys.argv) > 2 else STAGING_FOLDER
+    print(f"Staging {input_file} -> {staging_folder}/ (quarter=/month= partitions)...")
+    total = stage_csv(input_file, staging_folder)
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(staging_folder) for name in names)
+    print(f"\nStaged {total:,} rows: {os.path.getsize(input_file) / 2**20:,.1f} MiB CSV "
+          f"-> {size / 2**20:,.1f} MiB Parquet")
@@ -1,34 +1,86 @@
-import pandas as pd
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from manifest import read_manifest, scan_dates
 
 # Configuration
 files = {
     'Main file': 'flight_data_2024.csv',
-    'Quarter 1': '2024_QQ1.csv',
-    'Quarter 2': '2024_QQ2.csv',
-    'Quarter 3': '2024_QQ3.csv',
-    'Quarter 4': '2024_QQ4.csv'
+    'Quarter 1': '2024_Q1.csv',
+    'Quarter 2': '2024_Q2.csv',
+    'Quarter 3': '2024_Q3.csv',
+    'Quarter 4': '2024_Q4.csv'
 }
+# Written by scripts/IMPORT_CSV_FILES.py for each table it loads
+IMPORT_MANIFEST = '{table}.import.manifest.json'
 
 # Function to get file stats without loading entire file
 def get_file_stats(filepath):
-    # Read only the fl_date column to minimize memory
-    date_col = pd.read_csv(filepath, usecols=['fl_date'])
-    record_count = len(date_col)
-    min_date = date_col['fl_date'].min()
-    max_date = date_col['fl_date'].max()
-    return record_count, min_date, max_date
-
-# Collect stats for all files
-stats = {}
-for name, filepath in files.items():
-    count, min_date, max_date = get_file_stats(filepath)
-    stats[name] = count
-    print(f"Total records in {name}: {count:,}")
-    print(f"Date range: {min_date} to {max_date}\n")
-
-# Verify sum of quarters matches main file
-quarter_sum = sum(stats[f'Quarter {i}'] for i in range(1, 5))
-if stats['Main file'] == quarter_sum:
-    print("Test passed: The sum of records in all quarters matches the main file.")
-else:
-    print("Test failed: The sum of records in all quarters does not match the main file.")
\ No newline at end of file
+    # A fresh sidecar manifest (split.py) answers with one stat
+    manifest = read_manifest(filepath)
+    if manifest is not None:
+        return manifest, 'manifest'
+    # The staged Parquet copy of the main file answers from its footers alone,
+    # while it was staged from the file as it is now
+    # (imported here: pyarrow is only needed without a manifest)
+    from stage_parquet import STAGING_FOLDER, staged_date_stats, staged_is_fresh
+    if filepath == files['Main file'] and staged_is_fresh(filepath, STAGING_FOLDER):
+        count, undated, min_date, max_date = staged_date_stats(staging_folder=STAGING_FOLDER)
+        return {'rows': count, 'undated_rows': undated, 'min_date': min_date, 'max_date': max_date,
+                'checksum': None}, 'parquet footers'
+    return None, None
+
+def collect_stats():
+    stats, sources = {}, {}
+    for name, filepath in files.items():
+        stats[name], sources[name] = get_file_stats(filepath)
+
+    # Missing or stale manifests: stream fl_date of those files in parallel
+    # (which also writes their manifests for the next run)
+    missing = [name for name in files if stats[name] is None]
+    if missing:
+        with ProcessPoolExecutor(max_workers=min(len(missing), os.cpu_count() or 1)) as executor:
+            for name, manifest in zip(missing, executor.map(scan_dates, [files[name] for name in missing])):
+                stats[name], sources[name] = manifest, 'scanned'
+    return stats, sources
+
+def read_import_manifest(table):
+    try:
+        with open(IMPORT_MANIFEST.format(table=table), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def check_imports(stats):
+    # Rows each table received, against the quarter file it came from
+    for i in range(1, 5):
+        manifest = read_import_manifest(f'Q{i}')
+        if manifest is None:
+            continue
+        quarter = stats[f'Quarter {i}']
+        if manifest['checksum'] is not None and manifest['checksum'] != quarter['checksum']:
+            print(f"Q{i}: imported {manifest['rows']:,} rows from a different {manifest['source']} "
+                  f"than the current {files[f'Quarter {i}']}")
+        elif manifest['rows'] == quarter['rows']:
+            print(f"Q{i}: all {manifest['rows']:,} rows imported")
+        else:
+            print(f"Q{i}: imported {manifest['rows']:,} rows, but {files[f'Quarter {i}']} has {quarter['rows']:,}")
+
+if __name__ == '__main__':
+    # Collect stats for all files
+    stats, sources = collect_stats()
+    for name in files:
+        print(f"Total records in {name}: {stats[name]['rows']:,} ({sources[name]})")
+        print(f"Date range: {stats[name]['min_date']} to {stats[name]['max_date']}\n")
+
+    # Verify sum of quarters matches main file (split.py leaves out rows without a date)
+    quarter_sum = sum(stats[f'Quarter {i}']['rows'] for i in range(1, 5))
+    undated = stats['Main file']['undated_rows']
+    if undated:
+        print(f"Rows without a valid fl_date in the main file (not split): {undated:,}")
+    if stats['Main file']['rows'] - undated == quarter_sum:
+        print("Test passed: The sum of records in all quarters matches the main file.")
+    else:
+        print("Test failed: The sum of records in all quarters does not match the main file.")
+
+    check_imports(stats)
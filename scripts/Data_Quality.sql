@@ -80,4 +80,28 @@ CREATE NONCLUSTERED INDEX IX_DQ_Metrics_Quarter ON DQ_Metrics(source_quarter);
 GO
 
 PRINT 'Data Quality tables created successfully!';
-GO
\ No newline at end of file
+GO
+
+-- ETL CONTROL TABLE (incremental runs)
+-- High-water mark per source table: the largest flight_id already processed
+CREATE TABLE ETL_Watermarks (
+    source_table VARCHAR(50) PRIMARY KEY,
+    last_flight_id BIGINT NOT NULL,
+    last_fl_date DATE,
+    last_run_rows INT,
+    total_rows_processed BIGINT,
+    updated_at DATETIME DEFAULT GETDATE()
+);
+GO
+
+-- One row per ETL run (success or failure). The API result cache compares
+-- MAX(run_id) against the run its cached results were read under.
+CREATE TABLE ETL_Runs (
+    run_id INT IDENTITY(1,1) PRIMARY KEY,
+    started_at DATETIME,
+    completed_at DATETIME DEFAULT GETDATE(),
+    run_mode VARCHAR(20),
+    status VARCHAR(20),
+    facts_loaded BIGINT
+);
+GO
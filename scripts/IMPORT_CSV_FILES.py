@@ -2,19 +2,66 @@
 ================================================================================
 CSV IMPORTER - FIXED VERSION (NAType issue resolved)
 ================================================================================
+Each quarter CSV is streamed in CHUNK_SIZE-row chunks read with compact dtypes
+(CSV_DTYPES); every chunk is cleaned with column operations and inserted
+before the next one is read, so memory is bounded by the chunk size rather
+than the file size.
+
+With --parallel the files are parsed in a process pool and inserted by
+threads of this process: parsers put cleaned chunks on a queue bounded at
+QUEUE_CHUNKS chunks, so parsing the next chunk overlaps inserting the
+current one and a slow database pushes back on the parsers. Busy and
+waiting time of both stages is logged to show which side is the bottleneck.
+
+With --source parquet the quarters are read from the Parquet dataset staged by
+datasets/stage_parquet.py instead: each table reads only its quarter=N
+partition, already in compact types, in row-group sized chunks. The import
+refuses a staging folder whose source CSV changed after it was staged.
+
+After each table is loaded, {table}.import.manifest.json is written to the CSV
+folder: rows inserted, fl_date range, and the size and SHA-256 checksum of the
+source file, hashed from the bytes the import actually read. datasets/test.py
+compares these with the quarter files' split manifests without touching the
+database.
+
+Every import, successful or not, is recorded in Import_Runs; the API result
+cache treats a new import_id as "normalized data changed".
 """
 
+import io
+import os
+import json
+import hashlib
+import time
+import threading
+import multiprocessing
 import pandas as pd
 import numpy as np
 import pyodbc
 import logging
+import argparse
+from contextlib import closing, contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from fast_load import WRITERS, LOCAL_WRITERS, create_writer, connect_local, log_load_stats
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # optional - only needed for --source parquet
+    pa = ds = None
 
 # Configuration
 SERVER = 'JILL\\SQLEXPRESS'
 DATABASE = 'flight_analytics'
 CSV_FOLDER = r'C:\Users\patel\OneDrive - SARDAR VALLABHBHAI PATEL INSTITUTE OF TECHNOLOGY, SVIT\Desktop\UWin\Semester 2\ADT\Project\Project\datasets'
 
+# Parquet dataset of the whole year, partitioned quarter=N/month=M (datasets/stage_parquet.py),
+# and the stamp in it recording the path, size and mtime of the CSV it was staged from
+STAGING_FOLDER = os.path.join(CSV_FOLDER, 'flight_data_2024_parquet')
+STAGING_SOURCE_STAMP = '_source.json'
+
 CSV_FILES = {
     'Q1': '2024_Q1.csv',
     'Q2': '2024_Q2.csv',
@@ -22,157 +69,481 @@ CSV_FILES = {
     'Q4': '2024_Q4.csv'
 }
 
+# Import manifests beside the CSV files (checked by datasets/test.py)
+IMPORT_MANIFEST = '{table}.import.manifest.json'
+
 BATCH_SIZE = 10000
+CHUNK_SIZE = 100000
+
+# Parallel import (--parallel): parse processes, insert threads (one connection
+# each; the local writers use one) and the bounded chunk queue between them
+PARSE_WORKERS = min(len(CSV_FILES), os.cpu_count() or 1)
+INSERT_WORKERS = 2
+QUEUE_CHUNKS = 4
+
+# The 25 source columns (flight_etl_pipeline.SELECT_COLUMNS)
+SOURCE_COLUMNS = [
+    'fl_date', 'op_unique_carrier', 'op_carrier_fl_num',
+    'origin', 'dest',
+    'crs_dep_time', 'dep_time', 'crs_arr_time', 'arr_time',
+    'dep_delay', 'arr_delay',
+    'taxi_out', 'taxi_in',
+    'crs_elapsed_time', 'actual_elapsed_time', 'air_time',
+    'distance',
+    'cancelled', 'cancellation_code', 'diverted',
+    'carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay'
+]
+CODE_COLUMNS = ['op_unique_carrier', 'op_carrier_fl_num', 'origin', 'dest', 'cancellation_code']
+# Whole minutes / miles: float32 holds them exactly (integers below 2**24)
+FLOAT_COLUMNS = ['dep_delay', 'arr_delay', 'taxi_out', 'taxi_in', 'crs_elapsed_time',
+                 'actual_elapsed_time', 'air_time', 'distance', 'carrier_delay',
+                 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay']
+# hhmm clock times and 0/1 flags, read as float32 (the CSVs may write them as "1234.0")
+# and stored as nullable integers
+INT_COLUMNS = {
+    'crs_dep_time': 'Int16', 'dep_time': 'Int16', 'crs_arr_time': 'Int16', 'arr_time': 'Int16',
+    'cancelled': 'Int8', 'diverted': 'Int8'
+}
+CSV_DTYPES = {
+    **{col: 'category' for col in CODE_COLUMNS},
+    **{col: 'float32' for col in FLOAT_COLUMNS + list(INT_COLUMNS)}
+}
+
+# Writer: executemany, fast_executemany, bulk_file, sqlite or duckdb (see fast_load.py)
+LOAD_STRATEGY = 'executemany'
+LOCAL_SOURCE_PATH = 'flight_analytics.db'
+
+# Logs go to <repo>/logs/ whatever the working directory; nothing is
+# configured on import (benchmarks), only by setup_logging()
+LOG_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+LOG_FILE = os.path.join(LOG_FOLDER, 'csv_import.log')
+
+def setup_logging():
+    os.makedirs(LOG_FOLDER, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_FILE),
+            logging.StreamHandler()
+        ]
+    )
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    handlers=[
-        logging.FileHandler('csv_import.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 def get_connection():
+    if LOAD_STRATEGY in LOCAL_WRITERS:
+        return connect_local(LOAD_STRATEGY, LOCAL_SOURCE_PATH)
     conn_str = f'DRIVER={{SQL Server}};SERVER={SERVER};DATABASE={DATABASE};Trusted_Connection=yes;'
     return pyodbc.connect(conn_str, timeout=60)
 
 def clean_data_for_sql(df):
-    """Convert pandas NA types to Python None"""
-    logger.info("Converting data types for SQL Server compatibility...")
-
-    # Replace pd.NA and np.nan with None
-    df = df.replace({pd.NA: None, np.nan: None})
-
-    # Convert Int64 (nullable int) to regular int or None
-    int_cols = ['crs_dep_time', 'dep_time', 'crs_arr_time', 'arr_time', 'cancelled', 'diverted']
-    for col in int_cols:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: int(x) if pd.notna(x) and x is not None and x is not pd.NA else None)
-
-    # Ensure strings are proper str or None
-    str_cols = ['op_unique_carrier', 'op_carrier_fl_num', 'origin', 'dest', 'cancellation_code']
-    for col in str_cols:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: str(x) if pd.notna(x) and x is not None and x is not pd.NA else None)
-
-    # Convert floats properly
-    float_cols = ['dep_delay', 'arr_delay', 'taxi_out', 'taxi_in', 'crs_elapsed_time', 
-                  'actual_elapsed_time', 'air_time', 'distance', 'carrier_delay', 
-                  'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay']
-    for col in float_cols:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: float(x) if pd.notna(x) and x is not None and x is not pd.NA else None)
-
+    """
+    Vectorized cleaning of one chunk: clock times and flags to nullable integers
+    (NaN/inf -> NA). Codes stay categorical and floats stay float32; the writers
+    encode NaN/inf and blank codes as NULL column by column (fast_load.encode_column).
+    """
+    for col, dtype in INT_COLUMNS.items():
+        if col in df.columns and df[col].dtype != dtype:
+            values = df[col].to_numpy(dtype='float64')
+            df[col] = pd.Series(np.round(values), index=df.index).where(np.isfinite(values)).astype(dtype)
     return df
 
-def import_csv_to_table(csv_path, table_name):
-    """Import CSV with CORRECT data types"""
-    logger.info(f"="*80)
-    logger.info(f"Importing {csv_path} into {table_name}")
-    logger.info(f"="*80)
-
-    start_time = datetime.now()
-
-    # Read CSV
-    logger.info("Reading CSV file...")
-
-    # Read only the 25 columns we need
-    usecols = [
-        'fl_date', 'op_unique_carrier', 'op_carrier_fl_num',
-        'origin', 'dest',
-        'crs_dep_time', 'dep_time', 'crs_arr_time', 'arr_time',
-        'dep_delay', 'arr_delay',
-        'taxi_out', 'taxi_in',
-        'crs_elapsed_time', 'actual_elapsed_time', 'air_time',
-        'distance',
-        'cancelled', 'cancellation_code', 'diverted',
-        'carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay'
-    ]
-
-    # Read with minimal dtype specification
-    df = pd.read_csv(
+def read_csv_chunks(csv_path, chunk_size=CHUNK_SIZE):
+    """Reader over typed chunk_size-row DataFrames of the source columns (csv_path may be a file object)"""
+    return pd.read_csv(
         csv_path,
-        usecols=usecols,
+        usecols=SOURCE_COLUMNS,
+        dtype=CSV_DTYPES,
         parse_dates=['fl_date'],
-        low_memory=False
+        chunksize=chunk_size
     )
 
-    total_rows = len(df)
-    logger.info(f"Loaded {total_rows:,} rows from CSV")
-
-    # Force op_unique_carrier to string
-    df['op_unique_carrier'] = df['op_unique_carrier'].astype(str)
-    df.loc[df['op_unique_carrier'] == 'nan', 'op_unique_carrier'] = None
-
-    # Show sample carriers
-    unique_carriers = df['op_unique_carrier'].unique()
-    logger.info(f"Unique carriers found: {sorted([c for c in unique_carriers if c is not None and c != 'None'])}")
-
-    # Clean data for SQL
-    df = clean_data_for_sql(df)
-
-    # Connect and insert
+def check_staging_source(staging_folder):
+    """Raise ValueError unless the CSV staging_folder was staged from is unchanged since"""
+    stamp_path = os.path.join(staging_folder, STAGING_SOURCE_STAMP)
+    try:
+        with open(stamp_path, encoding='utf-8') as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        raise ValueError(f"{staging_folder} has no readable {STAGING_SOURCE_STAMP}; "
+                         f"re-stage it with datasets/stage_parquet.py")
+    try:
+        stat = os.stat(stamp['source'])
+    except OSError:
+        raise ValueError(f"{stamp['source']}, the CSV {staging_folder} was staged from, is missing; "
+                         f"re-stage it with datasets/stage_parquet.py")
+    if stamp.get('bytes') != stat.st_size or stamp.get('mtime_ns') != stat.st_mtime_ns:
+        raise ValueError(f"{stamp['source']} changed after {staging_folder} was staged; "
+                         f"re-stage it with datasets/stage_parquet.py")
+
+def read_parquet_chunks(staging_folder, quarter, chunk_size=CHUNK_SIZE):
+    """
+    DataFrames of the source columns from the quarter=N partitions of the staged
+    dataset; codes come back categorical and clock times/flags as Int16/Int8
+    """
+    if ds is None:
+        raise ImportError("--source parquet requires the 'pyarrow' package (pip install pyarrow)")
+    check_staging_source(staging_folder)
+    dataset = ds.dataset(
+        staging_folder,
+        format=ds.ParquetFileFormat(read_options={'dictionary_columns': CODE_COLUMNS}),
+        partitioning='hive'
+    )
+    if 'quarter' not in dataset.schema.names:
+        raise ValueError(f"{staging_folder} is not a quarter-partitioned staging dataset")
+    # Staged as int16/int8: keep them nullable integers rather than float64
+    integer_types = {pa.int16(): pd.Int16Dtype(), pa.int8(): pd.Int8Dtype()}
+    for batch in dataset.to_batches(columns=SOURCE_COLUMNS, filter=ds.field('quarter') == quarter,
+                                    batch_size=chunk_size):
+        yield batch.to_pandas(date_as_object=False, types_mapper=integer_types.get)
+
+class HashingReader(io.RawIOBase):
+    """Binary file wrapper that SHA-256 hashes every byte read through it"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.hash = hashlib.sha256()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.raw.readinto(buffer)
+        if count:
+            self.hash.update(memoryview(buffer)[:count])
+        return count
+
+    def close(self):
+        self.raw.close()
+        super().close()
+
+    def checksum(self):
+        return f"sha256:{self.hash.hexdigest()}"
+
+@contextmanager
+def read_chunks(source_path, table_name, chunk_size=CHUNK_SIZE):
+    """
+    (chunk reader, source) for one table: its CSV file, hashed by source as it is
+    read, or its quarter of a staging folder (source is None)
+    """
+    if os.path.isdir(source_path):
+        with closing(read_parquet_chunks(source_path, int(table_name.lstrip('Q')), chunk_size)) as reader:
+            yield reader, None
+        return
+    with HashingReader(open(source_path, 'rb')) as source, read_csv_chunks(source, chunk_size) as reader:
+        yield reader, source
+
+def merge_date_range(date_range, dates):
+    """(min, max) of fl_date over the chunks seen so far; None until a dated row"""
+    if not dates.notna().any():
+        return date_range
+    if date_range is None:
+        return dates.min(), dates.max()
+    return min(date_range[0], dates.min()), max(date_range[1], dates.max())
+
+def write_import_manifest(folder, table_name, source_path, rows, date_range, checksum=None):
+    """Sidecar for one loaded table: rows, fl_date range and the source file identity"""
+    manifest = {
+        'table': table_name,
+        'source': os.path.basename(os.path.normpath(source_path)),
+        'rows': int(rows),
+        'min_date': None if date_range is None else str(date_range[0].date()),
+        'max_date': None if date_range is None else str(date_range[1].date()),
+        'bytes': os.path.getsize(source_path) if os.path.isfile(source_path) else None,
+        'checksum': checksum,
+        'imported_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(os.path.join(folder, IMPORT_MANIFEST.format(table=table_name)), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+def record_import_run(start_time, source, status, rows_imported):
+    """Stamp the import in Import_Runs (the API drops its cached normalized results)"""
     conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO Import_Runs (started_at, completed_at, source, status, rows_imported) VALUES (?, ?, ?, ?, ?)",
+            [start_time, datetime.now(), source, status, rows_imported]
+        )
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
 
-    # Prepare insert statement
-    columns = ', '.join(df.columns)
-    placeholders = ', '.join(['?' for _ in df.columns])
-    insert_sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+def import_csv_to_table(csv_path, table_name, chunk_size=CHUNK_SIZE, manifest_folder=None):
+    """Import CSV with CORRECT data types, one chunk at a time"""
+    logger.info(f"="*80)
+    logger.info(f"Importing {csv_path} into {table_name}")
+    logger.info(f"="*80)
 
-    logger.info(f"Starting bulk insert in batches of {BATCH_SIZE:,}...")
+    start_time = datetime.now()
+    logger.info(f"Reading in chunks of {chunk_size:,} rows...")
 
+    carriers = set()
     inserted = 0
-    for i in range(0, total_rows, BATCH_SIZE):
-        batch = df.iloc[i:i+BATCH_SIZE]
-
-        # Convert to list of tuples with proper None handling
-        batch_data = []
-        for _, row in batch.iterrows():
-            row_tuple = tuple(None if pd.isna(val) or val is pd.NA or val is np.nan else val for val in row)
-            batch_data.append(row_tuple)
-
-        try:
-            cursor.executemany(insert_sql, batch_data)
-            conn.commit()
-            inserted += len(batch_data)
-
-            if inserted % 50000 == 0 or inserted == total_rows:
-                elapsed = (datetime.now() - start_time).total_seconds()
-                rate = inserted / elapsed
-                remaining = (total_rows - inserted) / rate if rate > 0 else 0
-                logger.info(f"Progress: {inserted:,}/{total_rows:,} ({inserted/total_rows*100:.1f}%) - ETA: {remaining/60:.1f} min")
-
-        except Exception as e:
-            logger.error(f"Batch failed at row {i}: {e}")
-            conn.rollback()
-            cursor.close()
-            conn.close()
-            raise
+    date_range = None
+    checksum = None
+    conn = get_connection()
+    try:
+        writer = create_writer(LOAD_STRATEGY, conn, BATCH_SIZE)
+        with read_chunks(csv_path, table_name, chunk_size) as (reader, source):
+            for chunk_number, chunk in enumerate(reader, 1):
+                carriers.update(chunk['op_unique_carrier'].dropna().unique())
+                date_range = merge_date_range(date_range, chunk['fl_date'])
+                inserted += writer.write(table_name, clean_data_for_sql(chunk))
+                logger.info(f"Chunk {chunk_number}: {inserted:,} rows imported")
+            if source is not None:
+                checksum = source.checksum()
+    finally:
+        conn.close()
 
-    cursor.close()
-    conn.close()
+    logger.info(f"Unique carriers found: {sorted(c for c in carriers if str(c).strip())}")
 
     duration = (datetime.now() - start_time).total_seconds()
     logger.info(f"✓ {table_name} completed: {inserted:,} rows in {duration/60:.1f} minutes")
     logger.info("")
+    if manifest_folder is not None:
+        write_import_manifest(manifest_folder, table_name, csv_path, inserted, date_range, checksum)
+    return inserted
+
+# ============================================================
+# PARALLEL IMPORT
+# ============================================================
+
+def init_parse_worker(chunk_queue, abort_event):
+    """Process pool initializer - the queue and event must be inherited, not pickled per task"""
+    global CHUNK_QUEUE, ABORT_EVENT
+    setup_logging()
+    CHUNK_QUEUE = chunk_queue
+    ABORT_EVENT = abort_event
+
+def parse_csv_to_queue(csv_path, table_name, chunk_size):
+    """
+    Parse worker: put each cleaned chunk of one file on the chunk queue, then a
+    'done' message with the stage timings (also when parsing fails or is aborted)
+    """
+    stats = {'rows': 0, 'chunks': 0, 'parse_seconds': 0.0, 'blocked_seconds': 0.0,
+             'date_range': None, 'checksum': None, 'error': None}
+    try:
+        with read_chunks(csv_path, table_name, chunk_size) as (reader, source):
+            start = time.perf_counter()
+            for chunk in reader:
+                if ABORT_EVENT.is_set():
+                    break
+                chunk = clean_data_for_sql(chunk)
+                stats['date_range'] = merge_date_range(stats['date_range'], chunk['fl_date'])
+                parsed = time.perf_counter()
+                stats['parse_seconds'] += parsed - start
+                CHUNK_QUEUE.put(('chunk', table_name, chunk))
+                start = time.perf_counter()
+                stats['blocked_seconds'] += start - parsed
+                stats['rows'] += len(chunk)
+                stats['chunks'] += 1
+            stats['parse_seconds'] += time.perf_counter() - start
+            if source is not None:
+                stats['checksum'] = source.checksum()
+    except Exception as e:
+        stats['error'] = f"{type(e).__name__}: {e}"
+        ABORT_EVENT.set()
+        raise
+    finally:
+        CHUNK_QUEUE.put(('done', table_name, stats))
+    return stats
+
+class ImportPipeline:
+    """
+    Parse processes -> bounded chunk queue -> insert threads. Parsers stop early
+    once abort_event is set; inserters keep draining the queue until every file
+    has reported 'done' so no parser stays blocked on a full queue.
+    """
+
+    def __init__(self, files, chunk_size=CHUNK_SIZE, parse_workers=PARSE_WORKERS,
+                 insert_workers=INSERT_WORKERS, queue_chunks=QUEUE_CHUNKS, manifest_folder=None):
+        self.files = files
+        self.manifest_folder = manifest_folder
+        self.chunk_size = chunk_size
+        self.parse_workers = max(1, min(parse_workers, len(files)))
+        # SQLite / DuckDB files take one writer at a time
+        self.insert_workers = 1 if LOAD_STRATEGY in LOCAL_WRITERS else max(1, insert_workers)
+        self.queue_chunks = queue_chunks
+        self.chunk_queue = multiprocessing.Queue(maxsize=queue_chunks)
+        self.abort_event = multiprocessing.Event()
+        self.lock = threading.Lock()
+        self.files_done = 0
+        self.parse_stats = {}
+        self.inserted = {table: 0 for table in files}
+        self.insert_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.errors = []
+
+    def run(self):
+        logger.info(f"Parallel import: {len(self.files)} files, {self.parse_workers} parse processes, "
+                    f"{self.insert_workers} insert thread(s), queue of {self.queue_chunks} chunks")
+        start = time.perf_counter()
+        inserters = [threading.Thread(target=self._insert, name=f"insert-{i}") for i in range(self.insert_workers)]
+        for thread in inserters:
+            thread.start()
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers, initializer=init_parse_worker,
+                                 initargs=(self.chunk_queue, self.abort_event)) as executor:
+            futures = {executor.submit(parse_csv_to_queue, csv_path, table, self.chunk_size): table
+                       for table, csv_path in self.files.items()}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except BrokenProcessPool as e:
+                    # A parser died without its 'done' message; release the inserters directly
+                    self._fail(e)
+                    for _ in inserters:
+                        self.chunk_queue.put(('stop', None, None))
+                    break
+                except Exception as e:
+                    self._fail(e)
+
+        for thread in inserters:
+            thread.join()
+        self.wall_seconds = time.perf_counter() - start
+        self.log_stats()
+        if self.errors:
+            raise self.errors[0]
+        if self.manifest_folder is not None:
+            for table, source_path in self.files.items():
+                write_import_manifest(self.manifest_folder, table, source_path, self.inserted[table],
+                                      self.parse_stats[table]['date_range'], self.parse_stats[table]['checksum'])
+        return self.inserted
+
+    def _fail(self, error):
+        with self.lock:
+            if not self.errors:
+                logger.error(f"Parallel import aborted: {error}")
+            self.errors.append(error)
+        self.abort_event.set()
+
+    def _insert(self):
+        """Insert thread: one connection and writer, chunks of any table, until told to stop"""
+        conn = None
+        try:
+            conn = get_connection()
+            writer = create_writer(LOAD_STRATEGY, conn, BATCH_SIZE)
+        except Exception as e:
+            self._fail(e)
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                kind, table, payload = self.chunk_queue.get()
+                insert_start = time.perf_counter()
+                with self.lock:
+                    self.idle_seconds += insert_start - wait_start
+                if kind == 'stop':
+                    return
+                if kind == 'done':
+                    with self.lock:
+                        self.parse_stats[table] = payload
+                        self.files_done += 1
+                        last = self.files_done == len(self.files)
+                    if last:
+                        for _ in range(self.insert_workers):
+                            self.chunk_queue.put(('stop', None, None))
+                    continue
+                if self.abort_event.is_set():
+                    continue
+                try:
+                    inserted = writer.write(table, payload)
+                except Exception as e:
+                    self._fail(e)
+                    continue
+                with self.lock:
+                    self.inserted[table] += inserted
+                    self.insert_seconds += time.perf_counter() - insert_start
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def log_stats(self):
+        """Rows/sec of each stage while busy, and how long each side waited on the other"""
+        parsed_rows = sum(stats['rows'] for stats in self.parse_stats.values())
+        parse_seconds = sum(stats['parse_seconds'] for stats in self.parse_stats.values())
+        blocked_seconds = sum(stats['blocked_seconds'] for stats in self.parse_stats.values())
+        inserted_rows = sum(self.inserted.values())
+
+        def rate(rows, seconds):
+            return rows / seconds if seconds > 0 else 0
+
+        logger.info("Pipeline stage throughput:")
+        for table, stats in self.parse_stats.items():
+            logger.info(f"  parse {table}: {stats['rows']:,} rows in {stats['chunks']} chunks, "
+                        f"{stats['parse_seconds']:.1f}s busy ({rate(stats['rows'], stats['parse_seconds']):,.0f} rows/sec), "
+                        f"{stats['blocked_seconds']:.1f}s blocked on a full queue")
+        logger.info(f"  parse total ({self.parse_workers} processes): {parsed_rows:,} rows, "
+                    f"{parse_seconds:.1f}s busy ({rate(parsed_rows, parse_seconds):,.0f} rows/sec per process), "
+                    f"{blocked_seconds:.1f}s blocked")
+        logger.info(f"  insert total ({self.insert_workers} thread(s)): {inserted_rows:,} rows, "
+                    f"{self.insert_seconds:.1f}s busy ({rate(inserted_rows, self.insert_seconds):,.0f} rows/sec per thread), "
+                    f"{self.idle_seconds:.1f}s waiting for chunks")
+        logger.info(f"  end to end: {inserted_rows:,} rows in {self.wall_seconds:.1f}s "
+                    f"({rate(inserted_rows, self.wall_seconds):,.0f} rows/sec)")
+        # Per worker, so the two sides are comparable whatever the worker counts
+        parse_wait = blocked_seconds / self.parse_workers
+        insert_wait = self.idle_seconds / self.insert_workers
+        bottleneck = 'insert' if parse_wait > insert_wait else 'parse'
+        logger.info(f"  bottleneck: {bottleneck} (parsers blocked {parse_wait:.1f}s each, "
+                    f"inserters waited {insert_wait:.1f}s each)")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import quarterly CSV files into the normalized database")
+    parser.add_argument('--writer', choices=list(WRITERS), default=LOAD_STRATEGY,
+                        help="Load strategy (default: %(default)s)")
+    parser.add_argument('--local-db', default=LOCAL_SOURCE_PATH,
+                        help="Database file for the sqlite/duckdb writers (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help="CSV rows read, cleaned and inserted at a time (default: %(default)s)")
+    parser.add_argument('--csv-folder', default=CSV_FOLDER,
+                        help="Folder holding the quarter CSV files (default: %(default)s)")
+    parser.add_argument('--source', choices=['csv', 'parquet'], default='csv',
+                        help="Read the quarter CSVs or the staged Parquet dataset (default: %(default)s)")
+    parser.add_argument('--staging-folder', default=STAGING_FOLDER,
+                        help="Parquet dataset for --source parquet (default: %(default)s)")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Parse files in a process pool, pipelined with inserts")
+    parser.add_argument('--parse-workers', type=int, default=PARSE_WORKERS,
+                        help="Parse processes in --parallel mode (default: %(default)s)")
+    parser.add_argument('--insert-workers', type=int, default=INSERT_WORKERS,
+                        help="Insert threads in --parallel mode; 1 for sqlite/duckdb (default: %(default)s)")
+    parser.add_argument('--queue-chunks', type=int, default=QUEUE_CHUNKS,
+                        help="Parsed chunks allowed to wait for insertion (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global LOAD_STRATEGY, LOCAL_SOURCE_PATH
+    args = parse_args(argv)
+    setup_logging()
+    LOAD_STRATEGY = args.writer
+    LOCAL_SOURCE_PATH = args.local_db
 
-def main():
     logger.info("="*80)
     logger.info("CSV IMPORT SCRIPT STARTED (FIXED VERSION)")
     logger.info(f"Time: {datetime.now()}")
+    logger.info(f"Writer: {LOAD_STRATEGY}")
+    logger.info(f"Source: {args.source}")
+    logger.info(f"Mode: {'parallel' if args.parallel else 'sequential'}")
     logger.info("="*80)
     logger.info("")
 
     overall_start = datetime.now()
 
     try:
-        for table, filename in CSV_FILES.items():
-            csv_path = f"{CSV_FOLDER}\\{filename}"
-            import_csv_to_table(csv_path, table)
+        if args.source == 'parquet':
+            files = {table: args.staging_folder for table in CSV_FILES}
+        else:
+            files = {table: os.path.join(args.csv_folder, filename) for table, filename in CSV_FILES.items()}
+        if args.parallel:
+            imported = ImportPipeline(files, args.chunk_size, args.parse_workers, args.insert_workers,
+                                      args.queue_chunks, manifest_folder=args.csv_folder).run()
+        else:
+            imported = {table: import_csv_to_table(csv_path, table, args.chunk_size, manifest_folder=args.csv_folder)
+                        for table, csv_path in files.items()}
+        record_import_run(overall_start, args.source, 'success', sum(imported.values()))
 
         logger.info("="*80)
         logger.info("ALL IMPORTS COMPLETED SUCCESSFULLY!")
@@ -204,6 +575,7 @@ def main():
         cursor.close()
         conn.close()
 
+        log_load_stats()
         total_time = (datetime.now() - overall_start).total_seconds()
         logger.info(f"\nTotal execution time: {total_time/60:.1f} minutes")
         logger.info("="*80)
@@ -211,6 +583,11 @@ def main():
         logger.info("="*80)
 
     except Exception as e:
+        # Tables loaded before the failure changed the normalized database too
+        try:
+            record_import_run(overall_start, args.source, 'failed', None)
+        except Exception as stamp_error:
+            logger.warning(f"Could not record failed import in Import_Runs: {stamp_error}")
         logger.error(f"\n{'='*80}")
         logger.error(f"IMPORT FAILED: {e}")
         logger.error(f"{'='*80}")
@@ -131,4 +131,110 @@ CREATE NONCLUSTERED INDEX IX_Delays_Composite ON Fact_Delays(date_key, airline_k
 GO
 
 PRINT 'Star Schema Data Warehouse created successfully!';
-GO
\ No newline at end of file
+GO
+
+-- AGGREGATE TABLES (maintained by flight_etl_pipeline.py with every fact load)
+-- Grain: month (month_key = YYYYMM) x dimension keys x flags
+--   arrival_reported = 1 when arrival_delay IS NOT NULL, is_delayed as in Fact_Delays
+-- Measures are additive: rollups are SUM over rows (dep_delay_max: MAX) and
+-- averages are SUM(x_sum) / SUM(x_count). Cause sums are BIGINT like the
+-- SMALLINT columns they sum, so averaging them is integer arithmetic as AVG is.
+-- If Fact_Delays is reloaded or truncated outside the ETL, run
+--   python flight_etl_pipeline.py --rebuild-aggregates
+CREATE TABLE Agg_Delays_Carrier (
+    month_key INT NOT NULL,
+    airline_key INT NOT NULL,
+    arrival_reported BIT NOT NULL,
+    is_delayed BIT NOT NULL,
+
+    flight_count INT NOT NULL,
+    arr_delay_sum FLOAT NOT NULL,
+    on_time_count INT NOT NULL,
+    dep_delay_count INT NOT NULL,
+    dep_delay_sum FLOAT NOT NULL,
+    dep_delayed_count INT NOT NULL,
+    dep_delayed_sum FLOAT NOT NULL,
+    dep_delay_max FLOAT,
+    carrier_delay_count INT NOT NULL,
+    carrier_delay_sum BIGINT NOT NULL,
+    weather_delay_count INT NOT NULL,
+    weather_delay_sum BIGINT NOT NULL,
+    nas_delay_count INT NOT NULL,
+    nas_delay_sum BIGINT NOT NULL,
+    security_delay_count INT NOT NULL,
+    security_delay_sum BIGINT NOT NULL,
+    late_aircraft_delay_count INT NOT NULL,
+    late_aircraft_delay_sum BIGINT NOT NULL,
+
+    CONSTRAINT PK_Agg_Carrier PRIMARY KEY (month_key, airline_key, arrival_reported, is_delayed),
+    CONSTRAINT FK_Agg_Carrier_Airline FOREIGN KEY (airline_key) REFERENCES Dim_Airline(airline_key)
+);
+GO
+
+CREATE TABLE Agg_Delays_RouteCarrier (
+    month_key INT NOT NULL,
+    airline_key INT NOT NULL,
+    origin_airport_key INT NOT NULL,
+    dest_airport_key INT NOT NULL,
+    arrival_reported BIT NOT NULL,
+    is_delayed BIT NOT NULL,
+
+    flight_count INT NOT NULL,
+    arr_delay_sum FLOAT NOT NULL,
+    on_time_count INT NOT NULL,
+    dep_delay_count INT NOT NULL,
+    dep_delay_sum FLOAT NOT NULL,
+    dep_delayed_count INT NOT NULL,
+    dep_delayed_sum FLOAT NOT NULL,
+    dep_delay_max FLOAT,
+    carrier_delay_count INT NOT NULL,
+    carrier_delay_sum BIGINT NOT NULL,
+    weather_delay_count INT NOT NULL,
+    weather_delay_sum BIGINT NOT NULL,
+    nas_delay_count INT NOT NULL,
+    nas_delay_sum BIGINT NOT NULL,
+    security_delay_count INT NOT NULL,
+    security_delay_sum BIGINT NOT NULL,
+    late_aircraft_delay_count INT NOT NULL,
+    late_aircraft_delay_sum BIGINT NOT NULL,
+
+    CONSTRAINT PK_Agg_RouteCarrier PRIMARY KEY (month_key, airline_key, origin_airport_key, dest_airport_key,
+                                                arrival_reported, is_delayed),
+    CONSTRAINT FK_Agg_RouteCarrier_Airline FOREIGN KEY (airline_key) REFERENCES Dim_Airline(airline_key),
+    CONSTRAINT FK_Agg_RouteCarrier_Origin FOREIGN KEY (origin_airport_key) REFERENCES Dim_Airport(airport_key),
+    CONSTRAINT FK_Agg_RouteCarrier_Dest FOREIGN KEY (dest_airport_key) REFERENCES Dim_Airport(airport_key)
+);
+GO
+
+CREATE TABLE Agg_Delays_OriginAirport (
+    month_key INT NOT NULL,
+    origin_airport_key INT NOT NULL,
+    arrival_reported BIT NOT NULL,
+    is_delayed BIT NOT NULL,
+
+    flight_count INT NOT NULL,
+    arr_delay_sum FLOAT NOT NULL,
+    on_time_count INT NOT NULL,
+    dep_delay_count INT NOT NULL,
+    dep_delay_sum FLOAT NOT NULL,
+    dep_delayed_count INT NOT NULL,
+    dep_delayed_sum FLOAT NOT NULL,
+    dep_delay_max FLOAT,
+    carrier_delay_count INT NOT NULL,
+    carrier_delay_sum BIGINT NOT NULL,
+    weather_delay_count INT NOT NULL,
+    weather_delay_sum BIGINT NOT NULL,
+    nas_delay_count INT NOT NULL,
+    nas_delay_sum BIGINT NOT NULL,
+    security_delay_count INT NOT NULL,
+    security_delay_sum BIGINT NOT NULL,
+    late_aircraft_delay_count INT NOT NULL,
+    late_aircraft_delay_sum BIGINT NOT NULL,
+
+    CONSTRAINT PK_Agg_OriginAirport PRIMARY KEY (month_key, origin_airport_key, arrival_reported, is_delayed),
+    CONSTRAINT FK_Agg_OriginAirport_Origin FOREIGN KEY (origin_airport_key) REFERENCES Dim_Airport(airport_key)
+);
+GO
+
+PRINT 'Aggregate tables created successfully!';
+GO
@@ -134,6 +134,20 @@ CREATE TABLE Q4 (
 );
 GO
 
+-- One row per IMPORT_CSV_FILES.py run (success or failure). The API result
+-- cache compares MAX(import_id) against the import its cached normalized
+-- results were read under.
+IF OBJECT_ID('Import_Runs') IS NULL
+CREATE TABLE Import_Runs (
+    import_id INT IDENTITY(1,1) PRIMARY KEY,
+    started_at DATETIME,
+    completed_at DATETIME DEFAULT GETDATE(),
+    source VARCHAR(20),
+    status VARCHAR(20),
+    rows_imported BIGINT
+);
+GO
+
 PRINT ''
 PRINT '========================================'
 PRINT 'TABLES RECREATED SUCCESSFULLY!'
@@ -0,0 +1,542 @@
+"""
+================================================================================
+ETL BENCHMARKS - synthetic flight data, no database required
+================================================================================
+Usage:
+    python benchmark_etl.py dq --rows 500000
+    python benchmark_etl.py encode --rows 500000
+    python benchmark_etl.py writers --rows 500000
+    python benchmark_etl.py dedup --rows 500000
+    python benchmark_etl.py fk --rows 500000
+    python benchmark_etl.py delays --rows 500000
+    python benchmark_etl.py csv --rows 2000000
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows - peak RSS comes from psutil there, if installed
+    resource = None
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+import flight_etl_pipeline as etl
+import fast_load
+import IMPORT_CSV_FILES as importer
+
+CARRIERS = list(etl.AIRLINE_NAMES.keys())
+AIRPORTS = ['ATL', 'DFW', 'DEN', 'ORD', 'LAX', 'JFK', 'LAS', 'MCO', 'MIA', 'CLT',
+            'SEA', 'PHX', 'EWR', 'SFO', 'IAH', 'BOS', 'FLL', 'MSP', 'LGA', 'DTW']
+
+# ============================================================
+# SYNTHETIC DATA
+# ============================================================
+
+def make_synthetic_flights(n_rows, seed=42, null_rate=0.02):
+    """Build a DataFrame shaped like one quarter of SELECT_COLUMNS"""
+    rng = np.random.default_rng(seed)
+
+    def with_nulls(values, blank=None):
+        values = pd.Series(values, dtype=object)
+        values[rng.random(n_rows) < null_rate] = None
+        if blank is not None:
+            values[rng.random(n_rows) < null_rate / 2] = blank
+        return values
+
+    def delays():
+        values = np.round(rng.exponential(20.0, n_rows))
+        values[rng.random(n_rows) < 0.6] = np.nan
+        return values
+
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 91, n_rows), unit='D')
+
+    def hhmm():
+        return rng.integers(0, 24, n_rows) * 100 + rng.integers(0, 60, n_rows)
+
+    dep_time = hhmm().astype(float)
+    dep_time[rng.random(n_rows) < null_rate] = np.nan
+    arr_time = hhmm().astype(float)
+    arr_time[rng.random(n_rows) < null_rate] = np.nan
+
+    df = pd.DataFrame({
+        'fl_date': with_nulls(dates.date),
+        'op_unique_carrier': with_nulls(rng.choice(CARRIERS, n_rows), blank=' '),
+        'op_carrier_fl_num': rng.integers(1, 3000, n_rows).astype(str),
+        'origin': with_nulls(rng.choice(AIRPORTS, n_rows), blank=''),
+        'dest': with_nulls(rng.choice(AIRPORTS, n_rows), blank='  '),
+        'crs_dep_time': hhmm(),
+        'dep_time': dep_time,
+        'crs_arr_time': hhmm(),
+        'arr_time': arr_time,
+        'dep_delay': np.round(rng.normal(10.0, 40.0, n_rows)),
+        'arr_delay': np.round(rng.normal(5.0, 45.0, n_rows)),
+        'taxi_out': rng.integers(5, 40, n_rows).astype(float),
+        'taxi_in': rng.integers(2, 20, n_rows).astype(float),
+        'crs_elapsed_time': rng.integers(45, 400, n_rows).astype(float),
+        'actual_elapsed_time': rng.integers(40, 420, n_rows).astype(float),
+        'air_time': rng.integers(30, 380, n_rows).astype(float),
+        'distance': rng.integers(80, 2800, n_rows).astype(float),
+        'cancelled': (rng.random(n_rows) < 0.02).astype(int),
+        'cancellation_code': with_nulls(rng.choice(['A', 'B', 'C', 'D'], n_rows)),
+        'diverted': (rng.random(n_rows) < 0.003).astype(int),
+        'carrier_delay': delays(),
+        'weather_delay': delays(),
+        'nas_delay': delays(),
+        'security_delay': delays(),
+        'late_aircraft_delay': delays()
+    })
+    return df
+
+def report(label, n_rows, seconds):
+    rate = n_rows / seconds if seconds > 0 else float('inf')
+    print(f"  {label:<28} {seconds:>9.3f} s  {rate:>14,.0f} rows/sec")
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+
+def validate_record(row):
+    """
+    Original per-row mandatory-field check the vectorized null rules replaced
+    Mandatory: fl_date, origin, dest, carrier, dep_time, arr_time
+    Returns: (is_valid, rejection_reason)
+    """
+    reasons = []
+
+    # Check mandatory fields
+    if pd.isna(row.get('fl_date')) or row.get('fl_date') is None:
+        reasons.append('NULL fl_date')
+
+    origin_val = row.get('origin')
+    if pd.isna(origin_val) or origin_val is None or str(origin_val).strip() == '':
+        reasons.append('NULL origin')
+
+    dest_val = row.get('dest')
+    if pd.isna(dest_val) or dest_val is None or str(dest_val).strip() == '':
+        reasons.append('NULL dest')
+
+    carrier_val = row.get('op_unique_carrier')
+    if pd.isna(carrier_val) or carrier_val is None or str(carrier_val).strip() == '':
+        reasons.append('NULL carrier')
+
+    if pd.isna(row.get('dep_time')) or row.get('dep_time') is None:
+        reasons.append('NULL dep_time')
+
+    if pd.isna(row.get('arr_time')) or row.get('arr_time') is None:
+        reasons.append('NULL arr_time')
+
+    if len(reasons) > 0:
+        return False, '; '.join(reasons)
+    return True, None
+
+def legacy_mandatory_field_checks(df):
+    """Original per-row loop: validate_record through iterrows / df.at"""
+    df['is_valid'] = True
+    df['rejection_reason'] = None
+    null_violations = 0
+    for idx, row in df.iterrows():
+        is_valid, reason = validate_record(row)
+        df.at[idx, 'is_valid'] = is_valid
+        if reason:
+            df.at[idx, 'rejection_reason'] = reason
+            null_violations += 1
+    return df, null_violations
+
+def bench_dq(n_rows):
+    print(f"Mandatory-field DQ checks on {n_rows:,} synthetic rows")
+    df = make_synthetic_flights(n_rows)
+
+    start = time.perf_counter()
+    legacy_df, legacy_nulls = legacy_mandatory_field_checks(df.copy())
+    report('legacy (iterrows)', n_rows, time.perf_counter() - start)
+
+    null_rules = [rule for rule in etl.DQ_RULES if rule['category'] == 'null']
+    start = time.perf_counter()
+    is_valid, rejection_reason, counts = etl.evaluate_dq_rules(df, null_rules)
+    report('vectorized (null rules)', n_rows, time.perf_counter() - start)
+
+    assert np.array_equal(legacy_df['is_valid'].to_numpy(dtype=bool), is_valid)
+    assert list(legacy_df['rejection_reason']) == list(rejection_reason)
+    assert legacy_nulls == counts['null']
+    print(f"  identical results: {legacy_nulls:,} null violations")
+
+    start = time.perf_counter()
+    is_valid, rejection_reason, counts = etl.evaluate_dq_rules(df)
+    report(f'registry ({len(etl.DQ_RULES)} rules)', n_rows, time.perf_counter() - start)
+    print(f"  violations by category: {counts}")
+
+def legacy_encode_batches(df, batch_size):
+    """Original bulk_insert path: clean_dataframe_for_insert + per-row isinstance loop"""
+    df_clean = df.replace([np.inf, -np.inf, np.nan], None)
+    df_clean = df_clean.where(pd.notnull(df_clean), None)
+    for col in df_clean.columns:
+        if df_clean[col].dtype == 'object':
+            df_clean[col] = df_clean[col].apply(
+                lambda x: None if (x == '' or (isinstance(x, str) and x.strip() == '')) else x
+            )
+        elif df_clean[col].dtype in ['float64', 'float32']:
+            df_clean[col] = df_clean[col].apply(lambda x: None if pd.isna(x) or np.isinf(x) else x)
+
+    batches = []
+    for i in range(0, len(df_clean), batch_size):
+        batch_data = []
+        for _, row in df_clean.iloc[i:i+batch_size].iterrows():
+            row_list = []
+            for val in row:
+                if val is None or pd.isna(val):
+                    row_list.append(None)
+                elif isinstance(val, np.integer):
+                    row_list.append(int(val))
+                elif isinstance(val, np.floating):
+                    row_list.append(None if np.isnan(val) or np.isinf(val) else float(val))
+                else:
+                    row_list.append(val)
+            batch_data.append(tuple(row_list))
+        batches.append(batch_data)
+    return batches
+
+def bench_encode(n_rows, batch_size=etl.BATCH_SIZE):
+    print(f"bulk_insert batch encoding on {n_rows:,} synthetic rows (batch size {batch_size:,})")
+    df = make_synthetic_flights(n_rows)
+    df.loc[df.index[::97], 'air_time'] = np.inf
+    n_batches = -(-n_rows // batch_size)
+
+    start = time.perf_counter()
+    legacy = legacy_encode_batches(df, batch_size)
+    elapsed = time.perf_counter() - start
+    report('legacy (apply + iterrows)', n_rows, elapsed)
+    print(f"  {'':<28} {elapsed / n_batches * 1000:>9.1f} ms/batch")
+
+    start = time.perf_counter()
+    encoded = [fast_load.encode_batch(df.iloc[i:i+batch_size]) for i in range(0, n_rows, batch_size)]
+    elapsed = time.perf_counter() - start
+    report('columnar encode_batch', n_rows, elapsed)
+    print(f"  {'':<28} {elapsed / n_batches * 1000:>9.1f} ms/batch")
+
+    assert legacy == encoded
+    print("  identical parameter tuples")
+
+def bench_writers(n_rows):
+    print(f"Local writer throughput on {n_rows:,} synthetic rows")
+    df = make_synthetic_flights(n_rows)
+    df['fl_date'] = pd.to_datetime(df['fl_date'])
+    for strategy in fast_load.LOCAL_WRITERS:
+        if strategy == 'duckdb' and fast_load.duckdb is None:
+            print(f"  {strategy:<28} skipped (duckdb not installed)")
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = fast_load.connect_local(strategy, os.path.join(tmp, f'bench.{strategy}'))
+            writer = fast_load.create_writer(strategy, conn)
+            start = time.perf_counter()
+            writer.write('Q1', df)
+            report(strategy, n_rows, time.perf_counter() - start)
+            conn.close()
+
+def measure(func, *args):
+    """
+    Return (result, seconds, peak traced bytes). Timing and tracing are separate
+    runs because tracemalloc slows down allocation-heavy code disproportionately.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+def legacy_duplicate_mask(df):
+    """Original _temp_key approach: astype(str) on five columns, concatenated"""
+    temp_key = (
+        df['fl_date'].astype(str) + '_' +
+        df['op_unique_carrier'].astype(str) + '_' +
+        df['op_carrier_fl_num'].astype(str) + '_' +
+        df['origin'].astype(str) + '_' +
+        df['dest'].astype(str)
+    )
+    return temp_key.duplicated(keep=False).to_numpy()
+
+def frame_duplicate_mask(df):
+    return df[etl.DUPLICATE_KEY_COLUMNS].duplicated(keep=False).to_numpy()
+
+def hashed_duplicate_mask(df):
+    return etl.duplicated_key(df[etl.DUPLICATE_KEY_COLUMNS], None)
+
+DEDUP_VARIANTS = {
+    'legacy (string _temp_key)': legacy_duplicate_mask,
+    'DataFrame.duplicated': frame_duplicate_mask,
+    'hashed uint64 keys': hashed_duplicate_mask
+}
+
+def dedup_frame(n_rows):
+    df = make_synthetic_flights(n_rows, null_rate=0.0)
+    return pd.concat([df, df.sample(frac=0.01, random_state=1)], ignore_index=True)
+
+def dedup_rss_child(label, n_rows, results):
+    """
+    Runs in a fresh (spawned) process: RSS growth while one variant runs. Unlike
+    tracemalloc this counts Arrow buffers (pandas string columns) as well.
+    """
+    logging.disable(logging.INFO)
+    df = dedup_frame(n_rows)
+    if not reset_peak_rss():
+        results.put(None)
+        return
+    baseline = current_rss_bytes()
+    DEDUP_VARIANTS[label](df)
+    results.put(peak_rss_bytes() - baseline)
+
+def bench_dedup(n_rows):
+    print(f"Duplicate detection on {n_rows:,} synthetic rows")
+    df = dedup_frame(n_rows)
+    context = multiprocessing.get_context('spawn')
+
+    results = {}
+    for label, func in DEDUP_VARIANTS.items():
+        results[label], seconds, peak = measure(func, df)
+        rss_results = context.Queue()
+        child = context.Process(target=dedup_rss_child, args=(label, n_rows, rss_results))
+        child.start()
+        rss = rss_results.get()
+        child.join()
+        report(label, len(df), seconds)
+        print(f"  {'':<28} {peak / 2**20:>9.1f} MiB peak traced"
+              f"  {rss / 2**20 if rss is not None else float('nan'):>9.1f} MiB peak RSS growth")
+
+    masks = list(results.values())
+    assert all(np.array_equal(masks[0], mask) for mask in masks[1:])
+    print(f"  identical results: {int(masks[0].sum()):,} duplicate rows")
+
+    index = etl.DuplicateKeyIndex()
+    index.add(etl.natural_key_hashes(df))
+    print(f"  cross-quarter key index: {len(index):,} keys in {index.hashes.nbytes / 2**20:.1f} MiB")
+
+def legacy_merge_keys(df, date_lookup, airline_lookup, airport_lookup):
+    """Original FK resolution: four DataFrame.merge hash joins"""
+    df = df.assign(fl_date=pd.to_datetime(df['fl_date']))
+    df = df.merge(date_lookup, left_on='fl_date', right_on='full_date', how='left')
+    df = df.merge(airline_lookup, left_on='op_unique_carrier', right_on='carrier_code', how='left')
+    df = df.merge(airport_lookup, left_on='origin', right_on='airport_code', how='left', suffixes=('', '_orig'))
+    df = df.merge(airport_lookup, left_on='dest', right_on='airport_code', how='left', suffixes=('', '_dest'))
+    return df.rename(columns={'airport_key': 'origin_airport_key', 'airport_key_dest': 'dest_airport_key'})
+
+def bench_fk(n_rows):
+    print(f"FK resolution on {n_rows:,} synthetic rows")
+    df = make_synthetic_flights(n_rows, null_rate=0.0)
+
+    dates = pd.to_datetime(pd.Series(df['fl_date'].unique()))
+    date_lookup = pd.DataFrame({'date_key': dates.dt.strftime('%Y%m%d').astype(int), 'full_date': dates})
+    airline_lookup = pd.DataFrame({'airline_key': range(1, len(CARRIERS) + 1), 'carrier_code': CARRIERS})
+    airport_lookup = pd.DataFrame({'airport_key': range(1, len(AIRPORTS) + 1), 'airport_code': AIRPORTS})
+    key_cache = etl.DimensionKeyCache(
+        date_lookup['date_key'].tolist(),
+        dict(zip(CARRIERS, airline_lookup['airline_key'])),
+        dict(zip(AIRPORTS, airport_lookup['airport_key'])),
+        allocate_new=False
+    )
+
+    start = time.perf_counter()
+    merged = legacy_merge_keys(df, date_lookup, airline_lookup, airport_lookup)
+    report('legacy (4x merge)', n_rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    keys = key_cache.resolve(df, None)
+    report('DimensionKeyCache', n_rows, time.perf_counter() - start)
+
+    for col, values in keys.items():
+        assert np.array_equal(merged[col].to_numpy(dtype=float), values)
+    print("  identical keys")
+
+def legacy_safe_sum_delays(row):
+    delays = [row['carrier_delay'], row['weather_delay'], row['nas_delay'],
+             row['security_delay'], row['late_aircraft_delay']]
+    valid = [d for d in delays if pd.notna(d) and d is not None and not np.isinf(d)]
+    return sum(valid) if valid else None
+
+def legacy_categorize_delay(delay):
+    if pd.isna(delay) or delay is None or np.isinf(delay) or delay <= 0:
+        return 'On-Time'
+    elif delay <= 60:
+        return 'Minor'
+    elif delay <= 180:
+        return 'Moderate'
+    else:
+        return 'Severe'
+
+def legacy_delay_columns(df):
+    """Per-row apply derivations that load_fact_chunk used before vectorization"""
+    return pd.DataFrame({
+        'total_delay_minutes': df.apply(legacy_safe_sum_delays, axis=1),
+        'is_delayed': df['arr_delay'].apply(lambda x: 1 if pd.notna(x) and not np.isinf(x) and x > 15 else 0),
+        'delay_category': df['arr_delay'].apply(legacy_categorize_delay)
+    })
+
+def vectorized_delay_columns(df):
+    return pd.DataFrame({
+        'total_delay_minutes': etl.total_delay_minutes(df),
+        'is_delayed': etl.is_delayed(df['arr_delay']),
+        'delay_category': etl.categorize_delays(df['arr_delay'])
+    })
+
+def bench_delays(n_rows):
+    print(f"Fact_Delays derived columns on {n_rows:,} synthetic rows")
+    df = make_synthetic_flights(n_rows)
+    # Edge cases: bin boundaries, non-finite arrival delays, all-NULL and inf causes
+    edges = [-np.inf, -1, 0, 0.5, 15, 15.5, 60, 60.5, 180, 180.5, np.inf, np.nan]
+    df.loc[:len(edges) - 1, 'arr_delay'] = edges
+    df.loc[:3, etl.DELAY_CAUSE_COLUMNS] = np.nan
+    df.loc[4, 'carrier_delay'] = np.inf
+    df.loc[5, etl.DELAY_CAUSE_COLUMNS] = [np.inf, -np.inf, np.nan, np.inf, np.nan]
+
+    start = time.perf_counter()
+    expected = legacy_delay_columns(df)
+    report('legacy (row apply)', n_rows, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    actual = vectorized_delay_columns(df)
+    report('vectorized', n_rows, time.perf_counter() - start)
+
+    pd.testing.assert_frame_equal(actual, expected)
+    print("  identical output")
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far, or None where it cannot be read"""
+    # Linux: VmHWM starts over at exec, while ru_maxrss keeps the forking parent's peak
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    return None
+
+def current_rss_bytes():
+    """Resident set size of this process now (Linux), or None"""
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    return None
+
+def reset_peak_rss():
+    """Restart the VmHWM peak at the current RSS (Linux); False where that is not possible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return current_rss_bytes() is not None
+
+def legacy_clean_data_for_sql(df):
+    """Original IMPORT_CSV_FILES cleaning: per-element apply over 24 columns"""
+    df = df.replace({pd.NA: None, np.nan: None})
+    for col in ['crs_dep_time', 'dep_time', 'crs_arr_time', 'arr_time', 'cancelled', 'diverted']:
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: int(x) if pd.notna(x) and x is not None and x is not pd.NA else None)
+    for col in ['op_unique_carrier', 'op_carrier_fl_num', 'origin', 'dest', 'cancellation_code']:
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: str(x) if pd.notna(x) and x is not None and x is not pd.NA else None)
+    for col in importer.FLOAT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].apply(lambda x: float(x) if pd.notna(x) and x is not None and x is not pd.NA else None)
+    return df
+
+def legacy_import_csv(csv_path, table_name):
+    """Original import_csv_to_table: whole file in one untyped DataFrame, then one write"""
+    df = pd.read_csv(csv_path, usecols=importer.SOURCE_COLUMNS, parse_dates=['fl_date'], low_memory=False)
+    df['op_unique_carrier'] = df['op_unique_carrier'].astype(str)
+    df.loc[df['op_unique_carrier'] == 'nan', 'op_unique_carrier'] = None
+    df = legacy_clean_data_for_sql(df)
+    conn = importer.get_connection()
+    try:
+        return fast_load.create_writer(importer.LOAD_STRATEGY, conn, importer.BATCH_SIZE).write(table_name, df)
+    finally:
+        conn.close()
+
+def csv_import_child(variant, csv_path, db_path, results):
+    """Runs in a fresh (spawned) process so its peak RSS belongs to one import only"""
+    logging.disable(logging.INFO)
+    importer.LOAD_STRATEGY = 'sqlite'
+    importer.LOCAL_SOURCE_PATH = db_path
+    start = time.perf_counter()
+    if variant == 'legacy':
+        rows = legacy_import_csv(csv_path, 'Q1')
+    elif variant == 'chunked':
+        rows = importer.import_csv_to_table(csv_path, 'Q1')
+    else:
+        rows = 0
+    results.put((rows, time.perf_counter() - start, peak_rss_bytes()))
+
+def bench_csv(n_rows):
+    print(f"CSV import into SQLite, {n_rows:,} synthetic rows (chunk size {importer.CHUNK_SIZE:,})")
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'quarter.csv')
+        make_synthetic_flights(n_rows).to_csv(csv_path, index=False)
+        print(f"  CSV file: {os.path.getsize(csv_path) / 2**20:.1f} MiB")
+
+        for label, variant in [('interpreter + imports', 'idle'), ('legacy (whole file)', 'legacy'),
+                               ('chunked, typed', 'chunked')]:
+            results = context.Queue()
+            child = context.Process(target=csv_import_child,
+                                    args=(variant, csv_path, os.path.join(tmp, f'{variant}.db'), results))
+            child.start()
+            rows, seconds, peak = results.get()
+            child.join()
+            if variant == 'idle':
+                print(f"  {label:<28} {'':>9}    {'':>14}  {peak / 2**20 if peak else float('nan'):>9.1f} MiB peak RSS")
+                continue
+            rate = rows / seconds if seconds > 0 else float('inf')
+            print(f"  {label:<28} {seconds:>9.3f} s  {rate:>14,.0f} rows/sec"
+                  f"  {peak / 2**20 if peak else float('nan'):>9.1f} MiB peak RSS")
+
+        tables = []
+        for variant in ['legacy', 'chunked']:
+            conn = fast_load.connect_local('sqlite', os.path.join(tmp, f'{variant}.db'))
+            tables.append(conn.execute("SELECT * FROM Q1 ORDER BY flight_id").fetchall())
+            conn.close()
+        assert tables[0] == tables[1]
+        print(f"  identical tables: {len(tables[0]):,} rows")
+
+BENCHMARKS = {
+    'dq': bench_dq,
+    'encode': bench_encode,
+    'writers': bench_writers,
+    'dedup': bench_dedup,
+    'fk': bench_fk,
+    'delays': bench_delays,
+    'csv': bench_csv
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=list(BENCHMARKS) + ['all'])
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS) if args.benchmark == 'all' else [args.benchmark]
+    for name in names:
+        BENCHMARKS[name](args.rows)
+        print()
+
+if __name__ == "__main__":
+    main()
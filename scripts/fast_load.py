@@ -0,0 +1,477 @@
+"""
+================================================================================
+FAST LOAD WRITERS - shared by flight_etl_pipeline.py and IMPORT_CSV_FILES.py
+================================================================================
+Strategies (selectable per run with --writer):
+    executemany        pyodbc executemany, commit per batch (original behaviour)
+    fast_executemany   pyodbc executemany with cursor.fast_executemany = True
+    bulk_file          stage batches to a CSV file, then server-side BULK INSERT
+    sqlite             local SQLite database file, no SQL Server required
+    duckdb             local DuckDB database file, no SQL Server required
+"""
+
+import os
+import sqlite3
+import tempfile
+import logging
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # optional - only needed for the duckdb writer
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 25000
+MAX_RETRIES = 3
+STAGING_DIR = os.path.join(tempfile.gettempdir(), 'flight_etl_staging')
+
+# Rows and seconds per table for this process, filled by every writer
+LOAD_STATS = {}
+
+# ============================================================
+# BATCH ENCODING
+# ============================================================
+
+def encode_column(series):
+    """
+    Encode one column for pyodbc with column-level operations:
+    NaN/NaT/NA/inf and blank strings -> None, numpy scalars -> native Python types.
+    Returns: list of parameter values
+    """
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Encode each category once and gather by code; code -1 (NaN) picks the trailing None
+        categories = np.empty(len(dtype.categories) + 1, dtype=object)
+        categories[:-1] = encode_column(pd.Series(dtype.categories))
+        categories[-1] = None
+        return categories[series.cat.codes.to_numpy()].tolist()
+
+    if pd.api.types.is_bool_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+        return series.to_numpy().tolist()
+
+    if pd.api.types.is_float_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+        values = series.to_numpy()
+        encoded = values.astype(object)
+        encoded[~np.isfinite(values)] = None
+        return encoded.tolist()
+
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        # numpy ints can't hold NULLs; nullable Int64/boolean map NA -> None natively
+        return series.to_numpy(dtype=object, na_value=None).tolist()
+
+    if pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_float_dtype(dtype):
+        return encode_column(series.astype('float64'))
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        encoded = series.astype(object).to_numpy().copy()
+        encoded[series.isna().to_numpy()] = None
+        return encoded.tolist()
+
+    # Object / string columns: decide once per column what they actually hold
+    inferred = pd.api.types.infer_dtype(series, skipna=True)
+    if inferred == 'integer':
+        return encode_column(series.astype('Int64'))
+    if inferred in ('floating', 'mixed-integer-float', 'decimal'):
+        return encode_column(pd.to_numeric(series, errors='coerce').astype('float64'))
+
+    encoded = series.to_numpy(dtype=object, na_value=None).copy()
+    null_mask = series.isna().to_numpy().copy()
+    if inferred == 'string':
+        null_mask |= series.eq('').to_numpy(dtype=bool, na_value=False)
+        null_mask |= series.str.isspace().to_numpy(dtype=bool, na_value=False)
+    elif inferred not in ('empty', 'date', 'datetime', 'time', 'bytes'):
+        # Rare: heterogeneous column - normalize the odd numpy scalar / inf / blank
+        for i, val in enumerate(encoded):
+            if isinstance(val, np.generic):
+                val = val.item()
+                encoded[i] = val
+            if isinstance(val, float) and not np.isfinite(val):
+                null_mask[i] = True
+            elif isinstance(val, str) and val.strip() == '':
+                null_mask[i] = True
+    encoded[null_mask] = None
+    return encoded.tolist()
+
+def encode_batch(df):
+    """Convert a DataFrame slice straight into pyodbc parameter tuples, column by column"""
+    columns = [encode_column(df[col]) for col in df.columns]
+    return list(zip(*columns))
+
+
+# ============================================================
+# WRITERS
+# ============================================================
+
+class TableWriter:
+    """
+    Base writer: write() times the load and records rows/sec per table.
+    With commit_per_batch=False nothing is committed (and failed batches are
+    not retried) so the caller can wrap several tables in one transaction.
+    """
+    name = None
+
+    def __init__(self, conn, batch_size=DEFAULT_BATCH_SIZE, commit_per_batch=True):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.commit_per_batch = commit_per_batch
+
+    def write(self, table_name, dataframe):
+        total_rows = len(dataframe)
+        logger.info(f"Starting bulk insert ({self.name}): {total_rows:,} rows into {table_name}")
+        start = datetime.now()
+
+        inserted = self._write(table_name, dataframe) if total_rows > 0 else 0
+
+        seconds = (datetime.now() - start).total_seconds()
+        stats = LOAD_STATS.setdefault(table_name, {'rows': 0, 'seconds': 0.0})
+        stats['rows'] += inserted
+        stats['seconds'] += seconds
+        rate = inserted / seconds if seconds > 0 else 0
+        logger.info(f"Bulk insert completed: {inserted:,} rows into {table_name} in {seconds:.1f}s ({rate:,.0f} rows/sec)")
+        return inserted
+
+    def _write(self, table_name, dataframe):
+        raise NotImplementedError
+
+    def _executemany_batches(self, cursor, insert_query, dataframe, table_name):
+        """Encode and send batches, committing (and retrying) each one when commit_per_batch is set"""
+        total_rows = len(dataframe)
+        max_retries = MAX_RETRIES if self.commit_per_batch else 1
+        inserted_count = 0
+        for i in range(0, total_rows, self.batch_size):
+            batch_data = encode_batch(dataframe.iloc[i:i+self.batch_size])
+
+            retry_count = 0
+            while retry_count < max_retries:
+                try:
+                    cursor.executemany(insert_query, batch_data)
+                    if self.commit_per_batch:
+                        self.conn.commit()
+                    inserted_count += len(batch_data)
+
+                    if inserted_count % 50000 == 0 or inserted_count == total_rows:
+                        logger.info(f"Progress: {inserted_count:,}/{total_rows:,} rows ({inserted_count/total_rows*100:.1f}%)")
+                    break
+                except Exception as e:
+                    retry_count += 1
+                    if retry_count < max_retries:
+                        self.conn.rollback()
+                        logger.warning(f"Batch failed, retry {retry_count}/{max_retries}: {e}")
+                    else:
+                        logger.error(f"Batch failed after {max_retries} attempt(s) at row {i} of {table_name}: {e}")
+                        raise
+        return inserted_count
+
+class ExecuteManyWriter(TableWriter):
+    """Plain pyodbc executemany, one round trip per row"""
+    name = 'executemany'
+
+    def _write(self, table_name, dataframe):
+        cursor = self.conn.cursor()
+        try:
+            return self._executemany_batches(cursor, insert_statement(table_name, dataframe.columns), dataframe, table_name)
+        finally:
+            cursor.close()
+
+class FastExecuteManyWriter(ExecuteManyWriter):
+    """pyodbc fast_executemany: parameters are bound as arrays and sent in one round trip per batch"""
+    name = 'fast_executemany'
+
+    def _write(self, table_name, dataframe):
+        cursor = self.conn.cursor()
+        cursor.fast_executemany = True
+        try:
+            return self._executemany_batches(cursor, insert_statement(table_name, dataframe.columns), dataframe, table_name)
+        finally:
+            cursor.close()
+
+class BulkFileWriter(TableWriter):
+    """
+    Stage the DataFrame to a CSV file and load it with server-side BULK INSERT.
+    The file goes through a #temp table so identity / default columns of the
+    target are left alone. STAGING_DIR must be readable by the SQL Server service.
+    """
+    name = 'bulk_file'
+
+    def _write(self, table_name, dataframe):
+        os.makedirs(STAGING_DIR, exist_ok=True)
+        staging_file = os.path.join(STAGING_DIR, f"{table_name}_{os.getpid()}.csv")
+        columns = ','.join(dataframe.columns)
+        stage_table = f"#stage_{table_name}"
+
+        with open(staging_file, 'w', newline='', encoding='utf-8') as f:
+            for i in range(0, len(dataframe), self.batch_size):
+                staging_frame(dataframe.iloc[i:i+self.batch_size]).to_csv(
+                    f, header=False, index=False, na_rep='', float_format='%.15g',
+                    date_format='%Y-%m-%d %H:%M:%S', lineterminator='\n'
+                )
+
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"SELECT TOP 0 {columns} INTO {stage_table} FROM {table_name}")
+            cursor.execute(
+                f"BULK INSERT {stage_table} FROM '{staging_file}' "
+                f"WITH (FORMAT = 'CSV', FIELDTERMINATOR = ',', ROWTERMINATOR = '0x0a', "
+                f"KEEPNULLS, TABLOCK, CODEPAGE = '65001', BATCHSIZE = {self.batch_size})"
+            )
+            cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {stage_table}")
+            inserted = cursor.rowcount
+            cursor.execute(f"DROP TABLE {stage_table}")
+            if self.commit_per_batch:
+                self.conn.commit()
+        except Exception as e:
+            logger.error(f"BULK INSERT into {table_name} failed: {e}")
+            if self.commit_per_batch:
+                self.conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            os.remove(staging_file)
+        return inserted if inserted >= 0 else len(dataframe)
+
+class SQLiteWriter(TableWriter):
+    """Local SQLite target - one transaction per table, executemany over encoded batches"""
+    name = 'sqlite'
+
+    def _write(self, table_name, dataframe):
+        insert_query = insert_statement(table_name, dataframe.columns)
+        inserted_count = 0
+        try:
+            for i in range(0, len(dataframe), self.batch_size):
+                batch_data = encode_batch(dataframe.iloc[i:i+self.batch_size])
+                self.conn.executemany(insert_query, batch_data)
+                inserted_count += len(batch_data)
+        except Exception:
+            if self.commit_per_batch:
+                self.conn.rollback()
+            raise
+        if self.commit_per_batch:
+            self.conn.commit()
+        return inserted_count
+
+class DuckDBWriter(TableWriter):
+    """Local DuckDB target - batches are scanned straight from the DataFrame, one transaction per table"""
+    name = 'duckdb'
+
+    def _write(self, table_name, dataframe):
+        columns = ','.join(dataframe.columns)
+        inserted_count = 0
+        try:
+            for i in range(0, len(dataframe), self.batch_size):
+                batch = staging_frame(dataframe.iloc[i:i+self.batch_size])
+                self.conn.register('batch_df', batch)
+                try:
+                    self.conn.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM batch_df")
+                finally:
+                    self.conn.unregister('batch_df')
+                inserted_count += len(batch)
+        except Exception:
+            if self.commit_per_batch:
+                self.conn.rollback()
+            raise
+        if self.commit_per_batch:
+            self.conn.commit()
+        return inserted_count
+
+WRITERS = {
+    writer.name: writer
+    for writer in [ExecuteManyWriter, FastExecuteManyWriter, BulkFileWriter, SQLiteWriter, DuckDBWriter]
+}
+LOCAL_WRITERS = ['sqlite', 'duckdb']
+
+def create_writer(strategy, conn, batch_size=DEFAULT_BATCH_SIZE, commit_per_batch=True):
+    if strategy not in WRITERS:
+        raise ValueError(f"Unknown writer strategy '{strategy}' (choose from {', '.join(WRITERS)})")
+    return WRITERS[strategy](conn, batch_size, commit_per_batch)
+
+def insert_statement(table_name, columns):
+    placeholders = ','.join(['?' for _ in columns])
+    return f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+
+def staging_frame(df):
+    """Same NULL semantics as encode_batch, but kept as a DataFrame for file/DuckDB staging"""
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_float_dtype(series.dtype):
+            df[col] = series.where(np.isfinite(series.astype('float64')))
+        elif pd.api.types.is_bool_dtype(series.dtype):
+            df[col] = series.astype('Int8')
+        elif not pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_datetime64_any_dtype(series.dtype):
+            df[col] = pd.Series(encode_column(series), index=series.index, dtype=object)
+    return df
+
+def merge_load_stats(stats):
+    """Fold LOAD_STATS collected in another process into this one"""
+    for table_name, table_stats in stats.items():
+        merged = LOAD_STATS.setdefault(table_name, {'rows': 0, 'seconds': 0.0})
+        merged['rows'] += table_stats['rows']
+        merged['seconds'] += table_stats['seconds']
+
+def log_load_stats():
+    """Log rows/sec for every table loaded by this process"""
+    logger.info("Load throughput by table:")
+    for table_name, stats in LOAD_STATS.items():
+        rate = stats['rows'] / stats['seconds'] if stats['seconds'] > 0 else 0
+        logger.info(f"  {table_name}: {stats['rows']:,} rows in {stats['seconds']:.1f}s ({rate:,.0f} rows/sec)")
+
+# ============================================================
+# LOCAL (SQLITE / DUCKDB) TARGETS
+# ============================================================
+
+# Identity column + remaining columns per table, mirroring Star_Schema.sql,
+# Data_Quality.sql and Table_Creation.sql closely enough for local runs
+LOCAL_SCHEMA = {
+    'Dim_Date': (None, [
+        'date_key INTEGER PRIMARY KEY', 'full_date DATE', 'year SMALLINT', 'quarter SMALLINT',
+        'month SMALLINT', 'month_name VARCHAR(20)', 'day_of_month SMALLINT', 'day_of_week SMALLINT',
+        'day_name VARCHAR(20)', 'is_weekend SMALLINT'
+    ]),
+    'Dim_Airline': ('airline_key', ['carrier_code VARCHAR(10) UNIQUE', 'carrier_name VARCHAR(100)']),
+    'Dim_Airport': ('airport_key', ['airport_code VARCHAR(10) UNIQUE', 'city_name VARCHAR(100)', 'state_name VARCHAR(50)']),
+    'Fact_FlightPerformance': ('flight_performance_key', [
+        'date_key INTEGER', 'airline_key INTEGER', 'origin_airport_key INTEGER', 'dest_airport_key INTEGER',
+        'flight_number VARCHAR(20)', 'scheduled_dep_time SMALLINT', 'actual_dep_time FLOAT',
+        'scheduled_arr_time SMALLINT', 'actual_arr_time FLOAT', 'scheduled_elapsed_time FLOAT',
+        'actual_elapsed_time FLOAT', 'air_time FLOAT', 'taxi_out FLOAT', 'taxi_in FLOAT', 'distance FLOAT',
+        'cancelled SMALLINT', 'cancellation_code VARCHAR(1)', 'diverted SMALLINT'
+    ]),
+    'Fact_Delays': ('delay_key', [
+        'date_key INTEGER', 'airline_key INTEGER', 'origin_airport_key INTEGER', 'dest_airport_key INTEGER',
+        'flight_number VARCHAR(20)', 'departure_delay FLOAT', 'arrival_delay FLOAT',
+        'carrier_delay SMALLINT', 'weather_delay SMALLINT', 'nas_delay SMALLINT', 'security_delay SMALLINT',
+        'late_aircraft_delay SMALLINT', 'total_delay_minutes FLOAT', 'is_delayed SMALLINT',
+        'delay_category VARCHAR(20)'
+    ]),
+    'FlightData_Quarantine': ('quarantine_id', [
+        'quarantine_date TIMESTAMP', 'source_quarter VARCHAR(10)', 'rejection_reason VARCHAR(500)',
+        'fl_date DATE', 'op_unique_carrier VARCHAR(10)', 'op_carrier_fl_num VARCHAR(20)',
+        'origin VARCHAR(10)', 'dest VARCHAR(10)'
+    ]),
+    'DQ_Metrics': ('metric_id', [
+        'etl_run_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP', 'source_quarter VARCHAR(10)',
+        'total_records_processed INTEGER', 'records_passed INTEGER', 'records_quarantined INTEGER',
+        'null_violations_count INTEGER', 'duplicate_violations_count INTEGER',
+        'range_violations_count INTEGER', 'format_violations_count INTEGER'
+    ]),
+    'ETL_Watermarks': (None, [
+        'source_table VARCHAR(50) PRIMARY KEY', 'last_flight_id BIGINT NOT NULL', 'last_fl_date DATE',
+        'last_run_rows INTEGER', 'total_rows_processed BIGINT',
+        'updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP'
+    ]),
+    'ETL_Runs': ('run_id', [
+        'started_at TIMESTAMP', 'completed_at TIMESTAMP', 'run_mode VARCHAR(20)', 'status VARCHAR(20)',
+        'facts_loaded BIGINT'
+    ])
+}
+
+SOURCE_TABLE_COLUMNS = [
+    'fl_date DATE', 'op_unique_carrier VARCHAR(10)', 'op_carrier_fl_num VARCHAR(20)',
+    'origin VARCHAR(10)', 'dest VARCHAR(10)', 'crs_dep_time INTEGER', 'dep_time INTEGER',
+    'crs_arr_time INTEGER', 'arr_time INTEGER', 'dep_delay FLOAT', 'arr_delay FLOAT',
+    'taxi_out FLOAT', 'taxi_in FLOAT', 'crs_elapsed_time FLOAT', 'actual_elapsed_time FLOAT',
+    'air_time FLOAT', 'distance FLOAT', 'cancelled INTEGER', 'cancellation_code VARCHAR(5)',
+    'diverted INTEGER', 'carrier_delay FLOAT', 'weather_delay FLOAT', 'nas_delay FLOAT',
+    'security_delay FLOAT', 'late_aircraft_delay FLOAT'
+]
+for _quarter in ['Q1', 'Q2', 'Q3', 'Q4']:
+    LOCAL_SCHEMA[_quarter] = ('flight_id', SOURCE_TABLE_COLUMNS)
+LOCAL_SCHEMA['Import_Runs'] = ('import_id', [
+    'started_at TIMESTAMP', 'completed_at TIMESTAMP', 'source VARCHAR(20)', 'status VARCHAR(20)',
+    'rows_imported BIGINT'
+])
+
+AGGREGATE_MEASURE_COLUMNS = [
+    'flight_count INTEGER', 'arr_delay_sum FLOAT', 'on_time_count INTEGER',
+    'dep_delay_count INTEGER', 'dep_delay_sum FLOAT', 'dep_delayed_count INTEGER', 'dep_delayed_sum FLOAT',
+    'dep_delay_max FLOAT'
+] + [f'{cause}_{column}' for cause in ['carrier_delay', 'weather_delay', 'nas_delay', 'security_delay',
+                                        'late_aircraft_delay'] for column in ('count INTEGER', 'sum BIGINT')]
+for _table, _keys in [
+    ('Agg_Delays_Carrier', ['airline_key']),
+    ('Agg_Delays_RouteCarrier', ['airline_key', 'origin_airport_key', 'dest_airport_key']),
+    ('Agg_Delays_OriginAirport', ['origin_airport_key'])
+]:
+    _grain = ['month_key'] + _keys + ['arrival_reported', 'is_delayed']
+    LOCAL_SCHEMA[_table] = (None, [f'{col} INTEGER NOT NULL' for col in _grain] + AGGREGATE_MEASURE_COLUMNS +
+                            [f"PRIMARY KEY ({', '.join(_grain)})"])
+
+# sqlite3 has no adapter for pandas Timestamps; dates/datetimes are stored as ISO text
+sqlite3.register_adapter(pd.Timestamp, lambda ts: ts.isoformat(sep=' '))
+sqlite3.register_adapter(datetime, lambda dt: dt.isoformat(sep=' '))
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+
+class DuckDBConnection:
+    """
+    DB-API transaction semantics for a duckdb connection, which otherwise
+    autocommits every statement: a transaction is always open, commit() and
+    rollback() end it and begin the next, and cursors run on this connection
+    (duckdb's own cursor() would be a separate connection and transaction)
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.begin()
+
+    def cursor(self):
+        return DuckDBCursor(self.conn)
+
+    def commit(self):
+        self.conn.commit()
+        self.conn.begin()
+
+    def rollback(self):
+        self.conn.rollback()
+        self.conn.begin()
+
+    def close(self):
+        # Like sqlite3/pyodbc: work not committed is discarded
+        self.conn.close()
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+class DuckDBCursor:
+    """Cursor over a DuckDBConnection's own transaction; close() leaves the connection open"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        self.conn.execute(query, params)
+        return self
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+def connect_local(strategy, path):
+    """Open (and create the schema of) a local SQLite or DuckDB database"""
+    if strategy == 'sqlite':
+        conn = sqlite3.connect(path)
+        identity = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+    elif strategy == 'duckdb':
+        if duckdb is None:
+            raise ImportError("The duckdb writer requires the 'duckdb' package (pip install duckdb)")
+        conn = duckdb.connect(path)
+    else:
+        raise ValueError(f"'{strategy}' is not a local writer (choose from {', '.join(LOCAL_WRITERS)})")
+
+    for table_name, (identity_col, columns) in LOCAL_SCHEMA.items():
+        column_defs = list(columns)
+        if identity_col is not None:
+            if strategy == 'duckdb':
+                conn.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_{table_name}")
+                identity = f"BIGINT PRIMARY KEY DEFAULT nextval('seq_{table_name}')"
+            column_defs.insert(0, f"{identity_col} {identity}")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(column_defs)})")
+    conn.commit()
+    logger.info(f"Local {strategy} database ready: {path}")
+    return DuckDBConnection(conn) if strategy == 'duckdb' else conn
@@ -3,7 +3,13 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
+import argparse
+import os
+import multiprocessing
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import fast_load
+from fast_load import WRITERS, LOCAL_WRITERS, create_writer, connect_local, log_load_stats
 
 # ============================================================
 # CONFIGURATION
@@ -17,6 +23,36 @@ SOURCE_CONN_STR = f'DRIVER={{SQL Server}};SERVER={SERVER};DATABASE={SOURCE_DATAB
 TARGET_CONN_STR = f'DRIVER={{SQL Server}};SERVER={SERVER};DATABASE={TARGET_DATABASE};Trusted_Connection=yes;'
 
 BATCH_SIZE = 25000
+
+# Target writer: executemany, fast_executemany, bulk_file, sqlite or duckdb (see fast_load.py)
+LOAD_STRATEGY = 'executemany'
+LOCAL_TARGET_PATH = 'FlightDataWarehouse.db'
+# Source for the sqlite/duckdb writers: the Q1-Q4 tables IMPORT_CSV_FILES.py
+# loads with the same writer (its --local-db)
+LOCAL_SOURCE_PATH = 'flight_analytics.db'
+
+# Fact loading: 1 = sequential, >1 = quarters loaded in parallel worker processes
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+PARALLEL_WORKERS = 1
+
+# Streaming extraction: rows per chunk, None = whole quarter in memory
+EXTRACT_CHUNK_SIZE = None
+
+# Incremental runs: only source rows above each table's high-water mark
+# (ETL_Watermarks.last_flight_id, recorded by full runs too) are extracted;
+# dimensions are upserted rather than rebuilt and facts are appended
+INCREMENTAL = False
+
+# Dimension key cache (loaded once per run / per worker process). New dimension
+# members found in fact data are inserted unless allocation is disabled.
+DIM_KEY_CACHE = None
+ALLOCATE_NEW_MEMBERS = True
+
+# Fact loads turn this off: each quarter becomes one transaction (committed
+# only after its DQ threshold check), and in parallel workers the shared event
+# tells running quarters to roll back when another one fails
+COMMIT_PER_BATCH = True
+ABORT_EVENT = None
 MIN_CLEAN_DATA_PERCENTAGE = 70.0
 
 # Airline code to name mapping (15 airlines)
@@ -51,24 +87,87 @@ SELECT_COLUMNS = [
     'carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay'
 ]
 
+# DQ rule bounds (minutes)
+DELAY_BOUNDS = (-1440, 4320)
+CAUSE_DELAY_BOUNDS = (0, 4320)
+
+# Natural key used for duplicate detection
+DUPLICATE_KEY_COLUMNS = ['fl_date', 'op_unique_carrier', 'op_carrier_fl_num', 'origin', 'dest']
+# Column hashes are folded as hash = hash * KEY_HASH_MULTIPLIER ^ column_hash (mod 2**64)
+KEY_HASH_MULTIPLIER = np.uint64(1000003)
+
+# Fact_Delays derived columns: cause columns summed into total_delay_minutes,
+# arrival delay threshold for is_delayed, and delay_category upper bin edges
+DELAY_CAUSE_COLUMNS = ['carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay']
+IS_DELAYED_THRESHOLD = 15
+DELAY_CATEGORY_EDGES = [0, 60, 180]
+DELAY_CATEGORY_LABELS = ['On-Time', 'Minor', 'Moderate', 'Severe']
+
+# Fact_Delays aggregate tables, maintained with every fact load. Each row is one
+# month (month_key = YYYYMM) x dimension keys x flags, holding additive measures
+# only, so any coarser rollup is a SUM (dep_delay_max: MAX) over the rows
+AGGREGATE_TABLES = {
+    'Agg_Delays_Carrier': ['airline_key'],
+    'Agg_Delays_RouteCarrier': ['airline_key', 'origin_airport_key', 'dest_airport_key'],
+    'Agg_Delays_OriginAirport': ['origin_airport_key']
+}
+AGGREGATE_FLAGS = ['arrival_reported', 'is_delayed']
+AGGREGATE_MEASURES = [
+    'flight_count', 'arr_delay_sum', 'on_time_count',
+    'dep_delay_count', 'dep_delay_sum', 'dep_delayed_count', 'dep_delayed_sum', 'dep_delay_max'
+] + [f'{cause}_{measure}' for cause in DELAY_CAUSE_COLUMNS for measure in ('count', 'sum')]
+
 # ============================================================
 # LOGGING
 # ============================================================
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('etl_pipeline.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Run logs go to <repo>/logs/ whatever the working directory; importing this
+# module (benchmarks, workers) configures nothing until setup_logging() runs
+LOG_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+LOG_FILE = os.path.join(LOG_FOLDER, 'etl_pipeline.log')
+
+def setup_logging():
+    os.makedirs(LOG_FOLDER, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOG_FILE),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
 logger = logging.getLogger(__name__)
 
 # ============================================================
 # UTILITY FUNCTIONS
 # ============================================================
 
+def get_target_connection():
+    """Warehouse connection for the selected writer: SQL Server, or a local SQLite/DuckDB file"""
+    if LOAD_STRATEGY in LOCAL_WRITERS:
+        return connect_local(LOAD_STRATEGY, LOCAL_TARGET_PATH)
+    return get_db_connection(TARGET_CONN_STR)
+
+def get_source_connection():
+    """Source connection for the selected writer: SQL Server, or the local file IMPORT_CSV_FILES.py loaded"""
+    if LOAD_STRATEGY in LOCAL_WRITERS:
+        if not os.path.exists(LOCAL_SOURCE_PATH):
+            raise FileNotFoundError(f"Local source database {LOCAL_SOURCE_PATH} not found "
+                                    f"(load it with IMPORT_CSV_FILES.py --writer {LOAD_STRATEGY})")
+        return connect_local(LOAD_STRATEGY, LOCAL_SOURCE_PATH)
+    return get_db_connection(SOURCE_CONN_STR)
+
+def source_table(quarter_name):
+    """A quarter's source table: flight_analytics.dbo.Qn on SQL Server, plain Qn in a local file"""
+    if LOAD_STRATEGY in LOCAL_WRITERS:
+        return quarter_name
+    return f"flight_analytics.dbo.{quarter_name}"
+
+def source_union(select, where):
+    """SELECT ... UNION over the quarter source tables (portable SQL)"""
+    return "\n    UNION ".join(f"{select} FROM {source_table(quarter)} WHERE {where}" for quarter in QUARTERS)
+
 def get_db_connection(connection_string):
     try:
         conn = pyodbc.connect(connection_string, timeout=30)
@@ -78,173 +177,231 @@ def get_db_connection(connection_string):
         logger.error(f"Connection failed: {e}")
         raise
 
-def clean_dataframe_for_insert(df):
-    """Clean dataframe for SQL Server - handle NULLs and invalid floats"""
-    df_clean = df.copy()
+def bulk_insert(conn, table_name, dataframe, batch_size=BATCH_SIZE):
+    """Bulk insert through the writer strategy selected for this run (LOAD_STRATEGY)"""
+    check_abort()
+    writer = create_writer(LOAD_STRATEGY, conn, batch_size, commit_per_batch=COMMIT_PER_BATCH)
+    return writer.write(table_name, dataframe)
 
-    # Replace infinity and NaN with None
-    df_clean = df_clean.replace([np.inf, -np.inf, np.nan], None)
+def check_abort():
+    if ABORT_EVENT is not None and ABORT_EVENT.is_set():
+        raise RuntimeError("Aborted: another quarter failed")
 
-    # Handle NULLs
-    df_clean = df_clean.where(pd.notnull(df_clean), None)
+# ============================================================
+# DATA QUALITY FUNCTIONS
+# ============================================================
 
-    for col in df_clean.columns:
-        if df_clean[col].dtype == 'object':
-            df_clean[col] = df_clean[col].apply(
-                lambda x: None if (x == '' or (isinstance(x, str) and x.strip() == '')) else x
-            )
-        elif df_clean[col].dtype in ['float64', 'float32']:
-            # Extra check for floats - replace any remaining invalid values
-            df_clean[col] = df_clean[col].apply(
-                lambda x: None if pd.isna(x) or np.isinf(x) else x
-            )
+# Registry of vectorized DQ rules. Each rule is a dict:
+#   name, category (null/range/format/duplicate), columns, kind, reason, predicate
+# predicate(values, missing) returns a boolean violation mask. For range and
+# format rules, rows whose column is missing are never counted as violations
+# (that is the null rules' job). Rules are evaluated in registration order,
+# which is also the order of reasons inside rejection_reason.
+DQ_RULES = []
+DQ_CATEGORIES = ['null', 'range', 'format', 'duplicate']
+
+def register_dq_rule(name, category, columns, reason, predicate, kind='raw'):
+    """Add a rule to DQ_RULES. kind selects the column view: raw, float, str or frame"""
+    if category not in DQ_CATEGORIES:
+        raise ValueError(f"Unknown DQ category: {category}")
+    if isinstance(columns, str):
+        columns = [columns]
+    DQ_RULES.append({
+        'name': name,
+        'category': category,
+        'columns': tuple(columns),
+        'kind': kind,
+        'reason': reason,
+        'predicate': predicate
+    })
 
-    return df_clean
+def is_missing(values, missing):
+    return missing
 
-def bulk_insert(conn, table_name, dataframe, batch_size=BATCH_SIZE):
-    """Bulk insert with NUCLEAR float conversion"""
-    total_rows = len(dataframe)
-    logger.info(f"Starting bulk insert: {total_rows:,} rows into {table_name}")
-    
-    df_clean = clean_dataframe_for_insert(dataframe)
-    cursor = conn.cursor()
-    
-    columns = ','.join(df_clean.columns)
-    placeholders = ','.join(['?' for _ in df_clean.columns])
-    insert_query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-    
-    inserted_count = 0
-    for i in range(0, total_rows, batch_size):
-        batch = df_clean.iloc[i:i+batch_size]
-        
-        # NUCLEAR: Convert each row explicitly
-        batch_data = []
-        for _, row in batch.iterrows():
-            row_list = []
-            for val in row:
-                if val is None or pd.isna(val):
-                    row_list.append(None)
-                elif isinstance(val, (np.integer, np.int64, np.int32)):
-                    row_list.append(int(val))
-                elif isinstance(val, (np.floating, np.float64, np.float32)):
-                    if np.isnan(val) or np.isinf(val):
-                        row_list.append(None)
-                    else:
-                        row_list.append(float(val))
-                else:
-                    row_list.append(val)
-            batch_data.append(tuple(row_list))
-        
-        retry_count = 0
-        max_retries = 3
-        
-        while retry_count < max_retries:
-            try:
-                cursor.executemany(insert_query, batch_data)
-                conn.commit()
-                inserted_count += len(batch_data)
-                
-                if inserted_count % 50000 == 0 or inserted_count == total_rows:
-                    logger.info(f"Progress: {inserted_count:,}/{total_rows:,} rows ({inserted_count/total_rows*100:.1f}%)")
-                break
-            except Exception as e:
-                retry_count += 1
-                if retry_count < max_retries:
-                    logger.warning(f"Batch failed, retry {retry_count}/{max_retries}: {e}")
-                else:
-                    logger.error(f"Batch failed after {max_retries} retries at row {i}: {e}")
-                    cursor.close()
-                    raise
-    
-    cursor.close()
-    logger.info(f"Bulk insert completed: {inserted_count:,} rows into {table_name}")
+def out_of_bounds(low, high):
+    return lambda values, missing: (values < low) | (values > high)
 
-# ============================================================
-# DATA QUALITY FUNCTIONS
-# ============================================================
+def not_positive(values, missing):
+    return ~(values > 0)
 
-def validate_record(row):
+def invalid_hhmm(values, missing):
+    """HHMM clock times: integral, 0000-2400, minutes below 60"""
+    return (values != np.floor(values)) | (values < 0) | (values > 2400) | (values % 100 >= 60)
+
+def pattern_mismatch(pattern):
+    return lambda values, missing: ~values.str.fullmatch(pattern).to_numpy(dtype=bool, na_value=False)
+
+def natural_key_hashes(keys):
+    """
+    64-bit hash per row of the typed DUPLICATE_KEY_COLUMNS (no per-row string keys).
+    Column by column: factorize, hash the distinct values (pd.util.hash_array),
+    gather the hashes by code and fold them into one uint64 array, so neither a
+    copy of the key frame nor per-row strings are built. fl_date values are
+    normalized to datetime64 so date objects, strings and timestamps from
+    different chunks/sources hash identically.
     """
-    Validate single record - 100% validation
-    Mandatory: fl_date, origin, dest, carrier, dep_time, arr_time
-    Returns: (is_valid, rejection_reason)
+    hashes = np.zeros(len(keys), dtype=np.uint64)
+    for col in DUPLICATE_KEY_COLUMNS:
+        # NULLs become one of the uniques, so they hash like any other value
+        codes, uniques = pd.factorize(keys[col], use_na_sentinel=False)
+        if col == 'fl_date':
+            uniques = pd.to_datetime(uniques, errors='coerce')
+        hashes *= KEY_HASH_MULTIPLIER
+        hashes ^= pd.util.hash_array(np.asarray(uniques))[codes]
+    return hashes
+
+def sorted_contains(sorted_hashes, hashes):
+    """Vectorized membership test against a sorted uint64 array"""
+    if len(sorted_hashes) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    pos = np.searchsorted(sorted_hashes, hashes)
+    pos[pos == len(sorted_hashes)] = 0
+    return sorted_hashes[pos] == hashes
+
+class DuplicateKeyIndex:
+    """
+    Compact hash set of natural keys: a sorted uint64 array, 8 bytes per key.
+    RUN_KEY_INDEX holds every key already processed by earlier quarters of
+    this run, so repeats across quarters are caught as well. Parallel workers
+    are reset to the keys their quarter shares with earlier quarters, which
+    the parent pre-scans (cross_quarter_key_hashes).
     """
-    reasons = []
 
-    # Check mandatory fields
-    if pd.isna(row.get('fl_date')) or row.get('fl_date') is None:
-        reasons.append('NULL fl_date')
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
 
-    origin_val = row.get('origin')
-    if pd.isna(origin_val) or origin_val is None or str(origin_val).strip() == '':
-        reasons.append('NULL origin')
+    def reset(self, hashes=()):
+        self.hashes = np.unique(np.asarray(hashes, dtype=np.uint64))
 
-    dest_val = row.get('dest')
-    if pd.isna(dest_val) or dest_val is None or str(dest_val).strip() == '':
-        reasons.append('NULL dest')
+    def __len__(self):
+        return len(self.hashes)
 
-    carrier_val = row.get('op_unique_carrier')
-    if pd.isna(carrier_val) or carrier_val is None or str(carrier_val).strip() == '':
-        reasons.append('NULL carrier')
+    def contains(self, hashes):
+        return sorted_contains(self.hashes, hashes)
 
-    if pd.isna(row.get('dep_time')) or row.get('dep_time') is None:
-        reasons.append('NULL dep_time')
+    def add(self, hashes):
+        self.hashes = np.union1d(self.hashes, hashes)
 
-    if pd.isna(row.get('arr_time')) or row.get('arr_time') is None:
-        reasons.append('NULL arr_time')
+RUN_KEY_INDEX = DuplicateKeyIndex()
 
-    if len(reasons) > 0:
-        return False, '; '.join(reasons)
-    return True, None
+def duplicated_key(values, missing):
+    hashes = natural_key_hashes(values)
+    return pd.Series(hashes).duplicated(keep=False).to_numpy() | RUN_KEY_INDEX.contains(hashes)
 
-def apply_data_quality_checks(df, quarter):
-    """Apply DQ checks - 100% validation on every row"""
-    logger.info(f"Applying DQ checks to {quarter}: {len(df):,} records (100% validation)")
+# Mandatory fields (NULL rules keep the reasons/order of the original per-row check,
+# benchmark_etl.validate_record)
+register_dq_rule('fl_date_not_null', 'null', 'fl_date', 'NULL fl_date', is_missing)
+register_dq_rule('origin_not_null', 'null', 'origin', 'NULL origin', is_missing, kind='str')
+register_dq_rule('dest_not_null', 'null', 'dest', 'NULL dest', is_missing, kind='str')
+register_dq_rule('carrier_not_null', 'null', 'op_unique_carrier', 'NULL carrier', is_missing, kind='str')
+register_dq_rule('dep_time_not_null', 'null', 'dep_time', 'NULL dep_time', is_missing, kind='float')
+register_dq_rule('arr_time_not_null', 'null', 'arr_time', 'NULL arr_time', is_missing, kind='float')
 
-    dq_stats = {
-        'total_records': len(df),
-        'null_violations': 0,
-        'duplicate_violations': 0
-    }
+# Range rules
+for _col in ['dep_delay', 'arr_delay']:
+    register_dq_rule(f'{_col}_range', 'range', _col, f'Out of range {_col}', out_of_bounds(*DELAY_BOUNDS), kind='float')
+for _col in ['carrier_delay', 'weather_delay', 'nas_delay', 'security_delay', 'late_aircraft_delay']:
+    register_dq_rule(f'{_col}_range', 'range', _col, f'Out of range {_col}', out_of_bounds(*CAUSE_DELAY_BOUNDS), kind='float')
+register_dq_rule('distance_positive', 'range', 'distance', 'Non-positive distance', not_positive, kind='float')
 
-    df['is_valid'] = True
-    df['rejection_reason'] = None
+# Format rules
+for _col in ['crs_dep_time', 'dep_time', 'crs_arr_time', 'arr_time']:
+    register_dq_rule(f'{_col}_hhmm', 'format', _col, f'Invalid HHMM {_col}', invalid_hhmm, kind='float')
+for _col in ['origin', 'dest']:
+    register_dq_rule(f'{_col}_iata', 'format', _col, f'Invalid IATA code {_col}', pattern_mismatch(r'[A-Z0-9]{3}'), kind='str')
+register_dq_rule('carrier_code_format', 'format', 'op_unique_carrier', 'Invalid carrier code', pattern_mismatch(r'[A-Z0-9]{2}'), kind='str')
 
-    # Validate EVERY row
-    validation_start = datetime.now()
-    for idx, row in df.iterrows():
-        is_valid, reason = validate_record(row)
-        df.at[idx, 'is_valid'] = is_valid
-        if reason:
-            df.at[idx, 'rejection_reason'] = reason
-            dq_stats['null_violations'] += 1
-
-        # Progress logging every 50k validations
-        if (idx + 1) % 50000 == 0:
-            elapsed = (datetime.now() - validation_start).total_seconds()
-            rate = (idx + 1) / elapsed
-            remaining = (len(df) - idx - 1) / rate
-            logger.info(f"Validation progress: {idx+1:,}/{len(df):,} ({(idx+1)/len(df)*100:.1f}%) - ETA: {remaining/60:.1f} min")
+# Duplicate rule (runs last so its reason is appended after the others)
+register_dq_rule('natural_key_unique', 'duplicate', DUPLICATE_KEY_COLUMNS, 'Duplicate record', duplicated_key, kind='frame')
 
-    validation_time = (datetime.now() - validation_start).total_seconds()
-    logger.info(f"Validation completed in {validation_time:.1f} seconds")
-
-    # Duplicate check
-    df['_temp_key'] = (
-        df['fl_date'].astype(str) + '_' + 
-        df['op_unique_carrier'].astype(str) + '_' + 
-        df['op_carrier_fl_num'].astype(str) + '_' + 
-        df['origin'].astype(str) + '_' + 
-        df['dest'].astype(str)
-    )
+def column_view(df, columns, kind):
+    """
+    Prepare one column (or column set) once for every rule that reads it.
+    Returns: (values, missing) - missing is a boolean numpy array
+    """
+    if kind == 'frame':
+        return df[list(columns)], np.zeros(len(df), dtype=bool)
+
+    col = columns[0]
+    if col not in df.columns:
+        return None, np.ones(len(df), dtype=bool)
+
+    series = df[col]
+    missing = series.isna().to_numpy()
+    if kind == 'float':
+        return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float), missing
+    if kind == 'str':
+        if pd.api.types.is_numeric_dtype(series):
+            return series.astype(str), missing
+        values = series.astype(str).str.strip()
+        return values, missing | values.eq('').to_numpy()
+    return series, missing
+
+def evaluate_dq_rules(df, rules=None):
+    """
+    Evaluate DQ rules column-wise in a single pass: each column view is built
+    once and shared by all rules on it, so adding rules does not add scans.
+    Returns: (is_valid, rejection_reason, violation_counts)
+      violation_counts - rows with at least one violation, per category
+    """
+    rules = DQ_RULES if rules is None else rules
+    if len(rules) > 64:
+        raise ValueError(f"At most 64 DQ rules can be evaluated together, got {len(rules)}")
+    n_rows = len(df)
+    codes = np.zeros(n_rows, dtype=np.uint64)
+    category_masks = {category: np.zeros(n_rows, dtype=bool) for category in DQ_CATEGORIES}
+
+    views = {}
+    for bit, rule in enumerate(rules):
+        view_key = (rule['columns'], rule['kind'])
+        if view_key not in views:
+            views[view_key] = column_view(df, rule['columns'], rule['kind'])
+        values, missing = views[view_key]
+
+        if values is None:
+            mask = missing if rule['category'] == 'null' else np.zeros(n_rows, dtype=bool)
+        else:
+            mask = np.asarray(rule['predicate'](values, missing), dtype=bool)
+            if rule['category'] != 'null':
+                mask = mask & ~missing
+
+        category_masks[rule['category']] |= mask
+        codes |= mask.astype(np.uint64) << np.uint64(bit)
+
+    # One reason string per distinct combination of failed rules
+    combo_ids, combos = pd.factorize(codes, sort=False)
+    reason_table = np.empty(len(combos), dtype=object)
+    for i, code in enumerate(combos):
+        reasons = [rule['reason'] for bit, rule in enumerate(rules) if int(code) >> bit & 1]
+        reason_table[i] = '; '.join(reasons) if reasons else None
 
-    duplicate_mask = df.duplicated(subset=['_temp_key'], keep=False)
-    dq_stats['duplicate_violations'] = duplicate_mask.sum()
+    violation_counts = {category: int(mask.sum()) for category, mask in category_masks.items()}
+    return codes == 0, reason_table[combo_ids], violation_counts
 
-    df.loc[duplicate_mask & df['is_valid'], 'is_valid'] = False
-    df.loc[duplicate_mask & df['is_valid'], 'rejection_reason'] = 'Duplicate record'
+def apply_data_quality_checks(df, quarter, rules=None):
+    """Apply DQ checks - 100% validation on every row"""
+    rules = DQ_RULES if rules is None else rules
+    logger.info(f"Applying DQ checks to {quarter}: {len(df):,} records, {len(rules)} rules (100% validation)")
+
+    # Validate EVERY row (column-wise, all registered rules)
+    validation_start = datetime.now()
+    is_valid, rejection_reason, violation_counts = evaluate_dq_rules(df, rules)
+    df['is_valid'] = is_valid
+    df['rejection_reason'] = rejection_reason
 
-    df = df.drop(columns=['_temp_key'])
+    dq_stats = {
+        'total_records': len(df),
+        'null_violations': violation_counts['null'],
+        'duplicate_violations': violation_counts['duplicate'],
+        'range_violations': violation_counts['range'],
+        'format_violations': violation_counts['format']
+    }
+
+    validation_time = (datetime.now() - validation_start).total_seconds()
+    rate = len(df) / validation_time if validation_time > 0 else float('inf')
+    logger.info(f"Validation completed in {validation_time:.1f} seconds ({rate:,.0f} rows/sec)")
+    logger.info(f"Violations - null: {dq_stats['null_violations']:,}, range: {dq_stats['range_violations']:,}, "
+                f"format: {dq_stats['format_violations']:,}, duplicate: {dq_stats['duplicate_violations']:,}")
 
     # Split clean vs quarantine
     clean_df = df[df['is_valid'] == True].copy()
@@ -258,13 +415,19 @@ def apply_data_quality_checks(df, quarter):
     clean_pct = (len(clean_df) / len(df) * 100) if len(df) > 0 else 0
     logger.info(f"{quarter} DQ Results: {len(clean_df):,} clean ({clean_pct:.2f}%), {len(quarantine_df):,} quarantined ({100-clean_pct:.2f}%)")
 
-    # Check 70% threshold
+    return clean_df, quarantine_df, dq_stats
+
+def check_clean_threshold(quarter, total_records, quarantined):
+    """
+    The 70% rule, applied to a whole quarter (all of its chunks when streaming).
+    The caller rolls the quarter back when it fails.
+    """
+    clean_pct = ((total_records - quarantined) / total_records * 100) if total_records > 0 else 0
     if clean_pct < MIN_CLEAN_DATA_PERCENTAGE:
-        logger.error(f"QUALITY THRESHOLD VIOLATION: Only {clean_pct:.2f}% clean data (required: {MIN_CLEAN_DATA_PERCENTAGE}%)")
+        logger.error(f"QUALITY THRESHOLD VIOLATION: Only {clean_pct:.2f}% clean data in {quarter} "
+                     f"(required: {MIN_CLEAN_DATA_PERCENTAGE}%)")
         raise ValueError(f"Data quality below acceptable threshold: {clean_pct:.2f}% < {MIN_CLEAN_DATA_PERCENTAGE}%")
 
-    return clean_df, quarantine_df, dq_stats
-
 # ============================================================
 # DIMENSION LOADING
 # ============================================================
@@ -272,30 +435,17 @@ def apply_data_quality_checks(df, quarter):
 def load_dim_date(conn):
     logger.info("Loading Dim_Date (only dates with flights)...")
 
-    query = """
-    SELECT DISTINCT 
-        CAST(CONVERT(VARCHAR(8), fl_date, 112) AS INT) as date_key,
-        fl_date as full_date,
-        DATEPART(YEAR, fl_date) as year,
-        DATEPART(QUARTER, fl_date) as quarter,
-        DATEPART(MONTH, fl_date) as month,
-        DATENAME(MONTH, fl_date) as month_name,
-        DATEPART(DAY, fl_date) as day_of_month,
-        DATEPART(WEEKDAY, fl_date) as day_of_week,
-        DATENAME(WEEKDAY, fl_date) as day_name,
-        CASE WHEN DATEPART(WEEKDAY, fl_date) IN (1, 7) THEN 1 ELSE 0 END as is_weekend
-    FROM (
-        SELECT fl_date FROM flight_analytics.dbo.Q1 WHERE fl_date IS NOT NULL
-        UNION SELECT fl_date FROM flight_analytics.dbo.Q2 WHERE fl_date IS NOT NULL
-        UNION SELECT fl_date FROM flight_analytics.dbo.Q3 WHERE fl_date IS NOT NULL
-        UNION SELECT fl_date FROM flight_analytics.dbo.Q4 WHERE fl_date IS NOT NULL
-    ) dates
-    """
+    # Distinct dates only; the attributes come from dim_date_rows (no T-SQL
+    # DATEPART/DATENAME, so the same code reads SQL Server and local sources)
+    query = source_union("SELECT fl_date", "fl_date IS NOT NULL")
 
-    source_conn = get_db_connection(SOURCE_CONN_STR)
-    df = pd.read_sql(query, source_conn)
+    source_conn = get_source_connection()
+    dates = pd.read_sql(query, source_conn)['fl_date']
     source_conn.close()
 
+    dates = pd.DatetimeIndex(pd.to_datetime(dates, errors='coerce')).normalize().dropna().unique().sort_values()
+    df = dim_date_rows(dates)
+
     logger.info(f"Extracted {len(df):,} unique dates")
     bulk_insert(conn, 'Dim_Date', df)
     logger.info("Dim_Date loaded successfully")
@@ -303,17 +453,14 @@ def load_dim_date(conn):
 def load_dim_airline(conn):
     logger.info("Loading Dim_Airline (with full names)...")
 
-    query = """
+    query = f"""
     SELECT DISTINCT op_unique_carrier as carrier_code
     FROM (
-        SELECT op_unique_carrier FROM flight_analytics.dbo.Q1 WHERE op_unique_carrier IS NOT NULL
-        UNION SELECT op_unique_carrier FROM flight_analytics.dbo.Q2 WHERE op_unique_carrier IS NOT NULL
-        UNION SELECT op_unique_carrier FROM flight_analytics.dbo.Q3 WHERE op_unique_carrier IS NOT NULL
-        UNION SELECT op_unique_carrier FROM flight_analytics.dbo.Q4 WHERE op_unique_carrier IS NOT NULL
+    {source_union("SELECT op_unique_carrier", "op_unique_carrier IS NOT NULL")}
     ) carriers
     """
 
-    source_conn = get_db_connection(SOURCE_CONN_STR)
+    source_conn = get_source_connection()
     df = pd.read_sql(query, source_conn)
     source_conn.close()
 
@@ -334,31 +481,19 @@ def load_dim_airport(conn):
     """
     logger.info("Loading Dim_Airport (airport codes only)...")
 
-    query = """
+    query = f"""
     SELECT DISTINCT 
         airport_code,
         CAST(NULL AS VARCHAR(100)) as city_name,
         CAST(NULL AS VARCHAR(50)) as state_name
     FROM (
-        SELECT origin as airport_code FROM flight_analytics.dbo.Q1 WHERE origin IS NOT NULL
-        UNION
-        SELECT dest FROM flight_analytics.dbo.Q1 WHERE dest IS NOT NULL
-        UNION
-        SELECT origin FROM flight_analytics.dbo.Q2 WHERE origin IS NOT NULL
-        UNION
-        SELECT dest FROM flight_analytics.dbo.Q2 WHERE dest IS NOT NULL
-        UNION
-        SELECT origin FROM flight_analytics.dbo.Q3 WHERE origin IS NOT NULL
-        UNION
-        SELECT dest FROM flight_analytics.dbo.Q3 WHERE dest IS NOT NULL
-        UNION
-        SELECT origin FROM flight_analytics.dbo.Q4 WHERE origin IS NOT NULL
-        UNION
-        SELECT dest FROM flight_analytics.dbo.Q4 WHERE dest IS NOT NULL
+    {source_union("SELECT origin as airport_code", "origin IS NOT NULL")}
+    UNION
+    {source_union("SELECT dest", "dest IS NOT NULL")}
     ) airports
     """
 
-    source_conn = get_db_connection(SOURCE_CONN_STR)
+    source_conn = get_source_connection()
     df = pd.read_sql(query, source_conn)
     source_conn.close()
 
@@ -366,28 +501,365 @@ def load_dim_airport(conn):
     bulk_insert(conn, 'Dim_Airport', df)
     logger.info("Dim_Airport loaded successfully")
 
+# ============================================================
+# DIMENSION KEY CACHE
+# ============================================================
+
+class DimensionKeyCache:
+    """
+    Surrogate keys of Dim_Date, Dim_Airline and Dim_Airport, read once per run.
+    FK resolution factorizes each column and looks up only its distinct values,
+    then gathers keys with an array index instead of DataFrame.merge hash joins.
+    date_key is computed arithmetically (YYYYMMDD). Members not yet in a
+    dimension are inserted and their keys added to the cache (allocate_new).
+    """
+
+    def __init__(self, date_keys, airline_keys, airport_keys, allocate_new=True):
+        self.date_keys = set(date_keys)
+        self.airline_keys = airline_keys
+        self.airport_keys = airport_keys
+        self.allocate_new = allocate_new
+
+    @classmethod
+    def load(cls, target_conn, allocate_new=True):
+        logger.info("Loading dimension key cache...")
+        cursor = target_conn.cursor()
+        cursor.execute("SELECT date_key FROM Dim_Date")
+        date_keys = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT carrier_code, airline_key FROM Dim_Airline")
+        airline_keys = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.execute("SELECT airport_code, airport_key FROM Dim_Airport")
+        airport_keys = {row[0]: row[1] for row in cursor.fetchall()}
+        cursor.close()
+        logger.info(f"Cached {len(date_keys):,} dates, {len(airline_keys):,} airlines, {len(airport_keys):,} airports")
+        return cls(date_keys, airline_keys, airport_keys, allocate_new)
+
+    def resolve(self, df, target_conn):
+        """
+        Surrogate keys for a fact batch.
+        Returns: dict of float arrays (NaN where no key could be resolved)
+        """
+        return {
+            'date_key': self._resolve_dates(df['fl_date'], target_conn),
+            'airline_key': self._resolve_codes(df['op_unique_carrier'], self.airline_keys, self._add_airlines, target_conn),
+            'origin_airport_key': self._resolve_codes(df['origin'], self.airport_keys, self._add_airports, target_conn),
+            'dest_airport_key': self._resolve_codes(df['dest'], self.airport_keys, self._add_airports, target_conn)
+        }
+
+    def add_missing_members(self, dates, carriers, airports, target_conn):
+        """
+        Insert the given members that are not in the dimensions yet (whatever
+        allocate_new says). Returns: dict of added counts per dimension
+        """
+        unique_dates = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates).dropna().unique(), errors='coerce')).dropna()
+        unique_keys = unique_dates.year * 10000 + unique_dates.month * 100 + unique_dates.day
+        new_dates = unique_dates[~np.isin(unique_keys, list(self.date_keys))]
+        new_carriers = [code for code in present_codes(carriers) if code not in self.airline_keys]
+        new_airports = [code for code in present_codes(airports) if code not in self.airport_keys]
+
+        if len(new_dates) > 0:
+            self._add_dates(new_dates, target_conn)
+        if new_carriers:
+            self._add_airlines(new_carriers, target_conn)
+        if new_airports:
+            self._add_airports(new_airports, target_conn)
+        return {'dates': len(new_dates), 'airlines': len(new_carriers), 'airports': len(new_airports)}
+
+    def _resolve_dates(self, dates, target_conn):
+        codes, uniques = pd.factorize(dates)
+        unique_dates = pd.DatetimeIndex(pd.to_datetime(uniques, errors='coerce'))
+        unique_keys = (unique_dates.year * 10000 + unique_dates.month * 100 + unique_dates.day).to_numpy(dtype=float)
+
+        new_dates = unique_dates[~np.isnan(unique_keys) & ~np.isin(unique_keys, list(self.date_keys))]
+        if len(new_dates) > 0 and self.allocate_new:
+            self._add_dates(new_dates, target_conn)
+        unique_keys[~np.isin(unique_keys, list(self.date_keys))] = np.nan
+        return gather_keys(codes, unique_keys)
+
+    def _resolve_codes(self, values, key_map, add_members, target_conn):
+        codes, uniques = pd.factorize(values)
+        new_codes = [code for code in uniques if code not in key_map]
+        if new_codes and self.allocate_new:
+            add_members(new_codes, target_conn)
+        unique_keys = np.array([key_map.get(code, np.nan) for code in uniques], dtype=float)
+        return gather_keys(codes, unique_keys)
+
+    def _add_dates(self, new_dates, target_conn):
+        logger.info(f"Adding {len(new_dates):,} new dates to Dim_Date")
+        dim_rows = dim_date_rows(new_dates)
+        bulk_insert(target_conn, 'Dim_Date', dim_rows)
+        self.date_keys.update(dim_rows['date_key'].tolist())
+
+    def _add_airlines(self, new_codes, target_conn):
+        logger.info(f"Adding {len(new_codes):,} new airlines to Dim_Airline: {new_codes}")
+        bulk_insert(target_conn, 'Dim_Airline', pd.DataFrame({
+            'carrier_code': new_codes,
+            'carrier_name': [AIRLINE_NAMES.get(code) for code in new_codes]
+        }))
+        self.airline_keys.update(fetch_member_keys(target_conn, 'Dim_Airline', 'carrier_code', 'airline_key', new_codes))
+
+    def _add_airports(self, new_codes, target_conn):
+        logger.info(f"Adding {len(new_codes):,} new airports to Dim_Airport: {new_codes}")
+        bulk_insert(target_conn, 'Dim_Airport', pd.DataFrame({
+            'airport_code': new_codes,
+            'city_name': None,
+            'state_name': None
+        }))
+        self.airport_keys.update(fetch_member_keys(target_conn, 'Dim_Airport', 'airport_code', 'airport_key', new_codes))
+
+def present_codes(values):
+    """Distinct non-NULL, non-blank codes (blanks are NULL violations, never dimension members)"""
+    values = pd.Series(values).dropna().astype(str)
+    return values[values.str.strip() != ''].unique().tolist()
+
+def gather_keys(codes, unique_keys):
+    """Index per-unique keys by factorize codes; code -1 (NULL) maps to NaN"""
+    return np.append(unique_keys, np.nan)[codes]
+
+def dim_date_rows(dates):
+    """Dim_Date attributes for the given dates (day_of_week as SQL Server DATEFIRST 7: Sunday = 1)"""
+    dates = pd.DatetimeIndex(dates).normalize()
+    day_of_week = (dates.dayofweek + 1) % 7 + 1
+    return pd.DataFrame({
+        'date_key': dates.year * 10000 + dates.month * 100 + dates.day,
+        'full_date': dates,
+        'year': dates.year,
+        'quarter': dates.quarter,
+        'month': dates.month,
+        'month_name': dates.month_name(),
+        'day_of_month': dates.day,
+        'day_of_week': day_of_week,
+        'day_name': dates.day_name(),
+        'is_weekend': np.isin(day_of_week, [1, 7]).astype(int)
+    })
+
+def fetch_member_keys(target_conn, table_name, code_col, key_col, codes):
+    placeholders = ','.join(['?' for _ in codes])
+    cursor = target_conn.cursor()
+    cursor.execute(f"SELECT {code_col}, {key_col} FROM {table_name} WHERE {code_col} IN ({placeholders})", list(codes))
+    keys = {row[0]: row[1] for row in cursor.fetchall()}
+    cursor.close()
+    return keys
+
+def get_dimension_key_cache(target_conn):
+    """The run's DimensionKeyCache, loaded on first use"""
+    global DIM_KEY_CACHE
+    if DIM_KEY_CACHE is None:
+        DIM_KEY_CACHE = DimensionKeyCache.load(target_conn, allocate_new=ALLOCATE_NEW_MEMBERS)
+    return DIM_KEY_CACHE
+
 # ============================================================
 # FACT LOADING
 # ============================================================
 
-def load_facts_for_quarter(quarter_name, target_conn):
+def source_filter(since_flight_id):
+    """WHERE clause and params restricting a source query to rows above a high-water mark"""
+    if since_flight_id is None:
+        return "", None
+    return " WHERE flight_id > ?", [since_flight_id]
+
+def extract_quarter(quarter_name, chunk_size=None, since_flight_id=None):
+    """
+    Yield flight_id and the quarter's 25 columns from the source - as one
+    DataFrame, or as bounded chunks of chunk_size rows (streaming mode).
+    Incremental runs pass since_flight_id: only newer rows are read.
+    """
+    columns = ['flight_id'] + SELECT_COLUMNS
+    where, params = source_filter(since_flight_id)
+    query = f"SELECT {', '.join(columns)} FROM {source_table(quarter_name)}{where}"
+
+    source_conn = get_source_connection()
+    try:
+        if chunk_size:
+            logger.info(f"Streaming {len(SELECT_COLUMNS)} columns from {quarter_name} in chunks of {chunk_size:,}...")
+            for chunk in pd.read_sql(query, source_conn, params=params, chunksize=chunk_size):
+                yield chunk
+        else:
+            logger.info(f"Extracting {len(SELECT_COLUMNS)} columns from {quarter_name}...")
+            yield pd.read_sql(query, source_conn, params=params)
+    finally:
+        source_conn.close()
+
+def read_key_hashes(quarter_name, chunk_size=None, since_flight_id=None):
+    """natural_key_hashes of every source row of the quarter, reading the key columns only"""
+    key_cols = ', '.join(DUPLICATE_KEY_COLUMNS)
+    where, params = source_filter(since_flight_id)
+    query = f"SELECT {key_cols} FROM {source_table(quarter_name)}{where}"
+
+    source_conn = get_source_connection()
+    try:
+        if chunk_size:
+            hash_chunks = [natural_key_hashes(keys)
+                           for keys in pd.read_sql(query, source_conn, params=params, chunksize=chunk_size)]
+        else:
+            hash_chunks = [natural_key_hashes(pd.read_sql(query, source_conn, params=params))]
+    finally:
+        source_conn.close()
+    return np.concatenate(hash_chunks) if hash_chunks else np.empty(0, dtype=np.uint64)
+
+def scan_duplicate_key_hashes(quarter_name, chunk_size, since_flight_id=None):
+    """
+    Streaming pre-pass over the key columns only. Returns the sorted hashes of
+    natural keys that occur more than once in the quarter (8 bytes per row held)
+    """
+    hashes = read_key_hashes(quarter_name, chunk_size, since_flight_id)
+    unique_hashes, counts = np.unique(hashes, return_counts=True)
+    duplicate_hashes = unique_hashes[counts > 1]
+    logger.info(f"{quarter_name}: {len(duplicate_hashes):,} duplicated natural keys across {len(hashes):,} rows")
+    return duplicate_hashes
+
+def cross_quarter_key_hashes(quarters, chunk_size=None, watermarks=None):
+    """
+    For parallel runs: per quarter, the sorted hashes of its keys that earlier
+    quarters also contain - exactly the part of RUN_KEY_INDEX a sequential run
+    would match for it. Workers are separate processes, so the parent
+    pre-scans the key columns once and hands these to them.
+    """
+    seen = DuplicateKeyIndex()
+    shared = {}
+    for quarter in quarters:
+        hashes = np.unique(read_key_hashes(quarter, chunk_size, (watermarks or {}).get(quarter)))
+        shared[quarter] = hashes[seen.contains(hashes)]
+        seen.add(hashes)
+        logger.info(f"{quarter}: {len(shared[quarter]):,} natural keys also in earlier quarters")
+    return shared
+
+def with_duplicate_hashes(rules, duplicate_hashes):
+    """
+    Copy of rules whose duplicate rule checks membership in a precomputed hash set,
+    so a chunk's rows are flagged even when their duplicates live in other chunks
+    """
+    def in_duplicate_hashes(values, missing):
+        hashes = natural_key_hashes(values)
+        return sorted_contains(duplicate_hashes, hashes) | RUN_KEY_INDEX.contains(hashes)
+
+    return [dict(rule, predicate=in_duplicate_hashes) if rule['category'] == 'duplicate' else rule
+            for rule in rules]
+
+def load_facts_for_quarter(quarter_name, target_conn, chunk_size=None, since_flight_id=None):
+    """
+    Extract, check and load one quarter's facts and fold them into the
+    aggregate tables. With since_flight_id (incremental run) only rows above
+    the high-water mark are processed. Full and incremental runs both record
+    the quarter's watermark in the same transaction, so the first incremental
+    run after a full load starts where it ended.
+    """
     logger.info(f"{'='*80}")
     logger.info(f"Processing Quarter: {quarter_name}")
     logger.info(f"{'='*80}")
+    if since_flight_id is not None:
+        logger.info(f"Incremental: rows with flight_id > {since_flight_id:,}")
+
+    key_cache = get_dimension_key_cache(target_conn)
+
+    # Streaming: duplicates are resolved against the whole quarter up front
+    rules = DQ_RULES
+    if chunk_size:
+        rules = with_duplicate_hashes(DQ_RULES, scan_duplicate_key_hashes(quarter_name, chunk_size, since_flight_id))
+
+    extracted = 0
+    loaded = 0
+    quarantined = 0
+    dq_stats = {}
+    quarter_key_hashes = []
+    high_water = {'flight_id': since_flight_id or 0, 'fl_date': None}
+    aggregates = AggregateDelta()
+    for chunk in extract_quarter(quarter_name, chunk_size, since_flight_id):
+        logger.info(f"Extracted {len(chunk):,} records")
+        if chunk.empty:
+            continue
+        extracted += len(chunk)
+        advance_high_water(high_water, chunk)
+        quarter_key_hashes.append(np.unique(natural_key_hashes(chunk)))
+        chunk_result = load_fact_chunk(chunk, quarter_name, target_conn, key_cache, rules, aggregates)
+        del chunk
+
+        loaded += chunk_result['loaded']
+        quarantined += chunk_result['quarantined']
+        for key, value in chunk_result['dq_stats'].items():
+            dq_stats[key] = dq_stats.get(key, 0) + value
+
+    if extracted == 0 and since_flight_id is not None:
+        logger.info(f"{quarter_name}: no new rows since flight_id {since_flight_id:,}")
+        return {
+            'quarter': quarter_name,
+            'extracted': 0,
+            'loaded': 0,
+            'quarantined': 0,
+            'dq_stats': {}
+        }
+
+    if extracted == 0:
+        logger.error(f"ZERO records extracted for {quarter_name}! Stopping ETL.")
+        raise ValueError(f"No records in {quarter_name} - cannot continue")
+
+    check_clean_threshold(quarter_name, extracted, quarantined)
+
+    # Later quarters treat this quarter's keys as already seen
+    RUN_KEY_INDEX.add(np.concatenate(quarter_key_hashes))
+
+    if loaded == 0:
+        logger.error(f"ZERO records loaded for {quarter_name}! Stopping ETL.")
+        raise ValueError(f"No clean, non-cancelled records with valid FKs in {quarter_name} - cannot continue")
 
-    # Extract only 25 columns
-    cols_str = ', '.join(SELECT_COLUMNS)
-    query = f"SELECT {cols_str} FROM flight_analytics.dbo.{quarter_name}"
+    # Save DQ metrics
+    logger.info("Saving DQ metrics...")
+    dq_record = pd.DataFrame([{
+        'source_quarter': quarter_name,
+        'total_records_processed': dq_stats['total_records'],
+        'records_passed': loaded,
+        'records_quarantined': quarantined,
+        'null_violations_count': dq_stats['null_violations'],
+        'duplicate_violations_count': dq_stats['duplicate_violations'],
+        'range_violations_count': dq_stats['range_violations'],
+        'format_violations_count': dq_stats['format_violations']
+    }])
+    bulk_insert(target_conn, 'DQ_Metrics', dq_record)
 
-    source_conn = get_db_connection(SOURCE_CONN_STR)
-    logger.info(f"Extracting {len(SELECT_COLUMNS)} columns from {quarter_name}...")
-    df = pd.read_sql(query, source_conn)
-    source_conn.close()
+    merge_aggregates(target_conn, aggregates)
 
-    logger.info(f"Extracted {len(df):,} records")
+    save_watermark(target_conn, quarter_name, high_water, extracted)
 
+    logger.info(f"{quarter_name} completed: {loaded:,} loaded, {quarantined:,} quarantined")
+
+    return {
+        'quarter': quarter_name,
+        'extracted': extracted,
+        'loaded': loaded,
+        'quarantined': quarantined,
+        'dq_stats': dq_stats
+    }
+
+def total_delay_minutes(df):
+    """Row sum of the finite cause delays; NaN (NULL) where none is finite"""
+    causes = df[DELAY_CAUSE_COLUMNS].to_numpy(dtype=float)
+    finite = np.isfinite(causes)
+    totals = np.where(finite, causes, 0.0).sum(axis=1)
+    return pd.Series(np.where(finite.any(axis=1), totals, np.nan), index=df.index)
+
+def is_delayed(arrival_delay):
+    """1 if the arrival delay exceeds IS_DELAYED_THRESHOLD minutes, else 0"""
+    values = arrival_delay.to_numpy(dtype=float)
+    return pd.Series((np.isfinite(values) & (values > IS_DELAYED_THRESHOLD)).astype(int), index=arrival_delay.index)
+
+def categorize_delays(arrival_delay):
+    """
+    Custom categories: On-Time (<=0, NULL or inf), Minor (1-60), Moderate (61-180),
+    Severe (>180). Bins are right-closed, so searchsorted(side='left') gives the label.
+    """
+    values = arrival_delay.to_numpy(dtype=float)
+    bins = np.searchsorted(DELAY_CATEGORY_EDGES, values, side='left')
+    bins[~np.isfinite(values)] = 0
+    return pd.Series(np.array(DELAY_CATEGORY_LABELS, dtype=object)[bins], index=arrival_delay.index)
+
+def load_fact_chunk(df, quarter_name, target_conn, key_cache, rules, aggregates=None):
+    """
+    DQ -> quarantine -> FK lookup -> Fact_FlightPerformance / Fact_Delays for one
+    chunk; the loaded Fact_Delays rows are added to aggregates (an AggregateDelta)
+    """
     # Apply DQ checks (100% validation)
-    clean_df, quarantine_df, dq_stats = apply_data_quality_checks(df, quarter_name)
+    clean_df, quarantine_df, dq_stats = apply_data_quality_checks(df, quarter_name, rules)
+    result = {'loaded': 0, 'quarantined': len(quarantine_df), 'dq_stats': dq_stats}
 
     # Save quarantine records (summary only)
     if len(quarantine_df) > 0:
@@ -401,11 +873,12 @@ def load_facts_for_quarter(quarter_name, target_conn):
 
         bulk_insert(target_conn, 'FlightData_Quarantine', quarantine_summary)
         logger.info("Quarantined records saved")
+    del df, quarantine_df
 
     # Check if we have clean data
     if len(clean_df) == 0:
-        logger.error(f"ZERO clean records for {quarter_name}! Stopping ETL.")
-        raise ValueError(f"No clean records in {quarter_name} - cannot continue")
+        logger.warning(f"ZERO clean records in this {quarter_name} batch")
+        return result
 
     # Exclude cancelled flights
     original_count = len(clean_df)
@@ -414,35 +887,19 @@ def load_facts_for_quarter(quarter_name, target_conn):
     logger.info(f"Excluded {cancelled_count:,} cancelled flights, {len(clean_df):,} remaining")
 
     if len(clean_df) == 0:
-        logger.error("All clean records were cancelled flights!")
-        raise ValueError(f"No non-cancelled records in {quarter_name}")
-
-    # Get dimension lookups
-    logger.info("Building dimension key lookups...")
-    date_lookup = pd.read_sql("SELECT date_key, full_date FROM Dim_Date", target_conn)
-    date_lookup['full_date'] = pd.to_datetime(date_lookup['full_date'])
-    airline_lookup = pd.read_sql("SELECT airline_key, carrier_code FROM Dim_Airline", target_conn)
-    airport_lookup = pd.read_sql("SELECT airport_key, airport_code FROM Dim_Airport", target_conn)
-
-    # Join FK lookups
-    clean_df['fl_date'] = pd.to_datetime(clean_df['fl_date'])
-    clean_df = clean_df.merge(date_lookup, left_on='fl_date', right_on='full_date', how='left')
-    clean_df = clean_df.merge(airline_lookup, left_on='op_unique_carrier', right_on='carrier_code', how='left')
-    clean_df = clean_df.merge(airport_lookup, left_on='origin', right_on='airport_code', how='left', suffixes=('', '_orig'))
-    clean_df = clean_df.merge(airport_lookup, left_on='dest', right_on='airport_code', how='left', suffixes=('', '_dest'))
-
-    clean_df.rename(columns={
-        'airport_key': 'origin_airport_key',
-        'airport_key_dest': 'dest_airport_key'
-    }, inplace=True)
+        logger.warning(f"All clean records in this {quarter_name} batch were cancelled flights")
+        return result
+
+    # Resolve FKs from the dimension key cache
+    clean_df = clean_df.assign(**key_cache.resolve(clean_df, target_conn))
 
     # Remove rows without valid FKs
     clean_df = clean_df.dropna(subset=['date_key', 'airline_key', 'origin_airport_key', 'dest_airport_key'])
     logger.info(f"Records with valid FKs: {len(clean_df):,}")
 
     if len(clean_df) == 0:
-        logger.error(f"No records with valid foreign keys for {quarter_name}!")
-        raise ValueError(f"No valid FK matches in {quarter_name}")
+        logger.warning(f"No records with valid foreign keys in this {quarter_name} batch")
+        return result
 
     # Clean infinity/NaN from numeric columns BEFORE creating fact tables
     logger.info("Cleaning invalid float values...")
@@ -488,23 +945,6 @@ def load_facts_for_quarter(quarter_name, target_conn):
     # Load Fact_Delays with custom categories
     logger.info("Loading Fact_Delays...")
 
-    def safe_sum_delays(row):
-        delays = [row['carrier_delay'], row['weather_delay'], row['nas_delay'], 
-                 row['security_delay'], row['late_aircraft_delay']]
-        valid = [d for d in delays if pd.notna(d) and d is not None and not np.isinf(d)]
-        return sum(valid) if valid else None
-
-    def categorize_delay(delay):
-        """Custom categories: On-Time (≤0), Minor (1-60), Moderate (61-180), Severe (>180)"""
-        if pd.isna(delay) or delay is None or np.isinf(delay) or delay <= 0:
-            return 'On-Time'
-        elif delay <= 60:
-            return 'Minor'
-        elif delay <= 180:
-            return 'Moderate'
-        else:
-            return 'Severe'
-
     fact_delays = pd.DataFrame({
         'date_key': clean_df['date_key'].astype(int),
         'airline_key': clean_df['airline_key'].astype(int),
@@ -520,61 +960,450 @@ def load_facts_for_quarter(quarter_name, target_conn):
         'late_aircraft_delay': clean_df['late_aircraft_delay']
     })
 
-    fact_delays['total_delay_minutes'] = clean_df.apply(safe_sum_delays, axis=1)
-    fact_delays['is_delayed'] = fact_delays['arrival_delay'].apply(lambda x: 1 if pd.notna(x) and not np.isinf(x) and x > 15 else 0)
-    fact_delays['delay_category'] = fact_delays['arrival_delay'].apply(categorize_delay)
+    fact_delays['total_delay_minutes'] = total_delay_minutes(clean_df)
+    fact_delays['is_delayed'] = is_delayed(fact_delays['arrival_delay'])
+    fact_delays['delay_category'] = categorize_delays(fact_delays['arrival_delay'])
 
     # Extra safety check
     fact_delays = fact_delays.replace([np.inf, -np.inf], None)
 
     bulk_insert(target_conn, 'Fact_Delays', fact_delays)
+    if aggregates is not None:
+        aggregates.add(fact_delays)
 
-    # Save DQ metrics
-    logger.info("Saving DQ metrics...")
-    dq_record = pd.DataFrame([{
-        'source_quarter': quarter_name,
-        'total_records_processed': dq_stats['total_records'],
-        'records_passed': len(clean_df),
-        'records_quarantined': len(quarantine_df),
-        'null_violations_count': dq_stats['null_violations'],
-        'duplicate_violations_count': dq_stats['duplicate_violations'],
-        'range_violations_count': 0,
-        'format_violations_count': 0
-    }])
-    bulk_insert(target_conn, 'DQ_Metrics', dq_record)
+    result['loaded'] = len(clean_df)
+    return result
 
-    logger.info(f"{quarter_name} completed: {len(clean_df):,} loaded, {len(quarantine_df):,} quarantined")
+# ============================================================
+# AGGREGATE TABLES
+# ============================================================
+
+def aggregate_measure_rows(fact_delays):
+    """
+    Per-fact-row grain columns and measure contributions. Filters the scorecard
+    queries put on Fact_Delays become flags (arrival_reported = arrival_delay IS
+    NOT NULL, is_delayed) or conditional counts/sums, so SUM/COUNT/AVG over the
+    facts can be rebuilt exactly from the aggregate rows
+    """
+    def numeric(column):
+        values = pd.to_numeric(fact_delays[column], errors='coerce').to_numpy(dtype=float)
+        return np.where(np.isfinite(values), values, np.nan)
+
+    arrival = numeric('arrival_delay')
+    departure = numeric('departure_delay')
+    has_departure = ~np.isnan(departure)
+    dep_delayed = has_departure & (departure > IS_DELAYED_THRESHOLD)
+    rows = {
+        'month_key': pd.to_numeric(fact_delays['date_key']).to_numpy(dtype=np.int64) // 100,
+        'airline_key': fact_delays['airline_key'].to_numpy(dtype=np.int64),
+        'origin_airport_key': fact_delays['origin_airport_key'].to_numpy(dtype=np.int64),
+        'dest_airport_key': fact_delays['dest_airport_key'].to_numpy(dtype=np.int64),
+        'arrival_reported': (~np.isnan(arrival)).astype(np.int64),
+        'is_delayed': pd.to_numeric(fact_delays['is_delayed']).to_numpy(dtype=np.int64),
+        'flight_count': np.ones(len(fact_delays), dtype=np.int64),
+        'arr_delay_sum': np.nan_to_num(arrival),
+        'on_time_count': (arrival <= 0).astype(np.int64),
+        'dep_delay_count': has_departure.astype(np.int64),
+        'dep_delay_sum': np.nan_to_num(departure),
+        'dep_delayed_count': dep_delayed.astype(np.int64),
+        'dep_delayed_sum': np.where(dep_delayed, departure, 0.0),
+        'dep_delay_max': departure
+    }
+    for cause in DELAY_CAUSE_COLUMNS:
+        # Stored as SMALLINT in Fact_Delays, so AVG over them is integer arithmetic
+        values = np.trunc(numeric(cause))
+        rows[f'{cause}_count'] = (~np.isnan(values)).astype(np.int64)
+        rows[f'{cause}_sum'] = np.nan_to_num(values).astype(np.int64)
+    return pd.DataFrame(rows)
+
+def fold_aggregate(rows, grain):
+    """Collapse measure rows to one row per grain (SUM, MAX for dep_delay_max)"""
+    functions = {measure: 'max' if measure == 'dep_delay_max' else 'sum' for measure in AGGREGATE_MEASURES}
+    return rows.groupby(grain, as_index=False, sort=False).agg(functions)[grain + AGGREGATE_MEASURES]
+
+def aggregate_grain(table_name):
+    return ['month_key'] + AGGREGATE_TABLES[table_name] + AGGREGATE_FLAGS
+
+class AggregateDelta:
+    """
+    Aggregate rows for the facts loaded in one quarter run. Each chunk is folded
+    in as it loads, so memory is bounded by the number of groups, not facts.
+    """
+    def __init__(self):
+        self.tables = {table_name: None for table_name in AGGREGATE_TABLES}
+
+    def add(self, fact_delays):
+        if len(fact_delays) == 0:
+            return
+        rows = aggregate_measure_rows(fact_delays)
+        for table_name, current in self.tables.items():
+            grain = aggregate_grain(table_name)
+            folded = fold_aggregate(rows, grain)
+            self.tables[table_name] = folded if current is None else fold_aggregate(pd.concat([current, folded]), grain)
+
+def fetch_aggregate_rows(target_conn, table_name, month_keys):
+    columns = aggregate_grain(table_name) + AGGREGATE_MEASURES
+    placeholders = ','.join(['?' for _ in month_keys])
+    cursor = target_conn.cursor()
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table_name} WHERE month_key IN ({placeholders})",
+                   [int(month_key) for month_key in month_keys])
+    rows = pd.DataFrame.from_records([tuple(row) for row in cursor.fetchall()], columns=columns)
+    cursor.close()
+    return rows.apply(pd.to_numeric)
+
+def merge_aggregates(target_conn, aggregates):
+    """
+    Add a quarter's AggregateDelta to the aggregate tables: the months it touches
+    are read back, combined with the delta and replaced. Fact loads run each
+    quarter as one transaction (load_facts_sequential, run_quarter_worker), so
+    the merge commits or rolls back with the quarter's facts. Parallel quarters
+    assume each source table holds its own months; if quarters overlap, or
+    Fact_Delays was changed outside the ETL, recompute with --rebuild-aggregates.
+    """
+    for table_name, delta in aggregates.tables.items():
+        if delta is None or delta.empty:
+            continue
+        grain = aggregate_grain(table_name)
+        month_keys = sorted(delta['month_key'].unique())
+        existing = fetch_aggregate_rows(target_conn, table_name, month_keys)
+        merged = fold_aggregate(pd.concat([existing, delta]), grain) if len(existing) else delta
+
+        cursor = target_conn.cursor()
+        placeholders = ','.join(['?' for _ in month_keys])
+        cursor.execute(f"DELETE FROM {table_name} WHERE month_key IN ({placeholders})",
+                       [int(month_key) for month_key in month_keys])
+        cursor.close()
+        bulk_insert(target_conn, table_name, merged)
+        logger.info(f"{table_name}: {len(delta):,} groups merged into {len(month_keys)} month(s)")
+
+def rebuild_aggregates(target_conn, chunk_size=BATCH_SIZE * 4):
+    """Recompute every aggregate table from Fact_Delays (first run after adding them, or after repairs)"""
+    columns = ['date_key', 'airline_key', 'origin_airport_key', 'dest_airport_key',
+               'departure_delay', 'arrival_delay', 'is_delayed'] + DELAY_CAUSE_COLUMNS
+    aggregates = AggregateDelta()
+    cursor = target_conn.cursor()
+    cursor.execute(f"SELECT {', '.join(columns)} FROM Fact_Delays")
+    facts = 0
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        aggregates.add(pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns))
+        facts += len(rows)
+    for table_name in AGGREGATE_TABLES:
+        cursor.execute(f"DELETE FROM {table_name}")
+    cursor.close()
+    for table_name, rows in aggregates.tables.items():
+        if rows is not None:
+            bulk_insert(target_conn, table_name, rows)
+    target_conn.commit()
+    logger.info(f"Aggregates rebuilt from {facts:,} Fact_Delays rows")
+
+# ============================================================
+# INCREMENTAL LOADING (HIGH-WATER MARKS)
+# ============================================================
+
+def load_watermarks(target_conn, quarters):
+    """Last processed flight_id per source table (0 for tables never loaded)"""
+    cursor = target_conn.cursor()
+    cursor.execute("SELECT source_table, last_flight_id FROM ETL_Watermarks")
+    stored = {row[0]: int(row[1]) for row in cursor.fetchall()}
+    cursor.close()
+    return {quarter: stored.get(quarter, 0) for quarter in quarters}
+
+def advance_high_water(high_water, chunk):
+    """Track the largest flight_id and fl_date seen in the extracted rows"""
+    high_water['flight_id'] = max(high_water['flight_id'], int(chunk['flight_id'].max()))
+    chunk_max_date = pd.to_datetime(chunk['fl_date'], errors='coerce').max()
+    if pd.notna(chunk_max_date) and (high_water['fl_date'] is None or chunk_max_date > high_water['fl_date']):
+        high_water['fl_date'] = chunk_max_date
+
+def save_watermark(target_conn, quarter_name, high_water, rows_processed):
+    """
+    Replace the quarter's watermark row. Runs inside the quarter's transaction,
+    so the mark only moves when the facts it covers are committed.
+    """
+    cursor = target_conn.cursor()
+    cursor.execute("SELECT last_fl_date, total_rows_processed FROM ETL_Watermarks WHERE source_table = ?", [quarter_name])
+    previous = cursor.fetchone()
+    cursor.execute("DELETE FROM ETL_Watermarks WHERE source_table = ?", [quarter_name])
+    cursor.close()
+
+    last_fl_date = high_water['fl_date']
+    if previous is not None and previous[0] is not None:
+        previous_date = pd.Timestamp(previous[0])
+        last_fl_date = previous_date if last_fl_date is None else max(last_fl_date, previous_date)
+    total_rows = rows_processed + (int(previous[1] or 0) if previous is not None else 0)
+
+    bulk_insert(target_conn, 'ETL_Watermarks', pd.DataFrame([{
+        'source_table': quarter_name,
+        'last_flight_id': high_water['flight_id'],
+        'last_fl_date': last_fl_date,
+        'last_run_rows': rows_processed,
+        'total_rows_processed': total_rows,
+        'updated_at': datetime.now()
+    }]))
+    logger.info(f"{quarter_name} watermark advanced to flight_id {high_water['flight_id']:,}")
+
+def extract_new_dimension_members(watermarks):
+    """Distinct dates, carriers and airports among source rows above the watermarks"""
+    params = [watermarks[quarter] for quarter in watermarks]
+
+    def distinct_values(select):
+        query = " UNION ".join(f"{select} FROM {source_table(quarter)} WHERE flight_id > ?"
+                               for quarter in watermarks)
+        return pd.read_sql(query, source_conn, params=params).iloc[:, 0]
+
+    source_conn = get_source_connection()
+    try:
+        dates = distinct_values("SELECT fl_date")
+        carriers = distinct_values("SELECT op_unique_carrier")
+        airports = pd.concat([
+            distinct_values("SELECT origin"),
+            distinct_values("SELECT dest")
+        ]).drop_duplicates()
+    finally:
+        source_conn.close()
+    return dates, carriers, airports
+
+def upsert_new_dimension_members(target_conn, watermarks):
+    """
+    Incremental replacement for STEP 1: insert only dimension members that the
+    new source rows introduce, keeping existing surrogate keys untouched
+    """
+    dates, carriers, airports = extract_new_dimension_members(watermarks)
+    key_cache = get_dimension_key_cache(target_conn)
+    added = key_cache.add_missing_members(dates, carriers, airports, target_conn)
+    logger.info(f"New dimension members: {added['dates']:,} dates, "
+                f"{added['airlines']:,} airlines, {added['airports']:,} airports")
+    return added
+
+def log_incremental_delta(watermarks, summaries):
+    logger.info("\nINCREMENTAL DELTA:")
+    logger.info("-" * 80)
+    for summary in summaries:
+        logger.info(f"  {summary['quarter']}: {summary['extracted']:,} new rows since flight_id "
+                    f"{watermarks[summary['quarter']]:,} -> {summary['loaded']:,} loaded, "
+                    f"{summary['quarantined']:,} quarantined")
+    logger.info(f"  Total: {sum(summary['extracted'] for summary in summaries):,} new rows, "
+                f"{sum(summary['loaded'] for summary in summaries):,} facts appended")
+
+# ============================================================
+# PARALLEL FACT LOADING
+# ============================================================
+
+def init_quarter_worker(abort_event, load_strategy, local_target_path, local_source_path, chunk_size):
+    """Process pool initializer - workers may be spawned, so pass the run settings explicitly"""
+    global ABORT_EVENT, LOAD_STRATEGY, LOCAL_TARGET_PATH, LOCAL_SOURCE_PATH, EXTRACT_CHUNK_SIZE, COMMIT_PER_BATCH, ALLOCATE_NEW_MEMBERS
+    setup_logging()
+    ABORT_EVENT = abort_event
+    LOAD_STRATEGY = load_strategy
+    LOCAL_TARGET_PATH = local_target_path
+    LOCAL_SOURCE_PATH = local_source_path
+    EXTRACT_CHUNK_SIZE = chunk_size
+    COMMIT_PER_BATCH = False
+    # Dimensions are complete before workers start; concurrent inserts of the same
+    # new member from two quarter transactions would block on the UNIQUE constraint
+    ALLOCATE_NEW_MEMBERS = False
+
+def run_quarter_worker(quarter_name, since_flight_id=None, prior_key_hashes=()):
+    """Load one quarter on its own connection as a single transaction"""
+    fast_load.LOAD_STATS.clear()
+    # Keys shared with earlier quarters, as RUN_KEY_INDEX would hold them sequentially
+    RUN_KEY_INDEX.reset(prior_key_hashes)
+    target_conn = get_target_connection()
+    try:
+        summary = load_facts_for_quarter(quarter_name, target_conn, EXTRACT_CHUNK_SIZE, since_flight_id)
+        check_abort()
+        target_conn.commit()
+    except Exception:
+        target_conn.rollback()
+        ABORT_EVENT.set()
+        logger.error(f"{quarter_name} rolled back")
+        raise
+    finally:
+        target_conn.close()
+
+    summary['load_stats'] = dict(fast_load.LOAD_STATS)
+    return summary
+
+def load_facts_parallel(quarters, workers, watermarks=None):
+    """
+    Run quarter pipelines in a process pool. If one quarter fails, pending
+    quarters are cancelled and running ones roll back; quarters that already
+    committed stay complete (facts, quarantine and DQ_Metrics together).
+    """
+    logger.info(f"Loading {len(quarters)} quarters with {workers} worker processes")
+    prior_key_hashes = cross_quarter_key_hashes(quarters, EXTRACT_CHUNK_SIZE, watermarks)
+    abort_event = multiprocessing.Event()
+    summaries = []
+    failures = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_quarter_worker,
+                             initargs=(abort_event, LOAD_STRATEGY, LOCAL_TARGET_PATH, LOCAL_SOURCE_PATH, EXTRACT_CHUNK_SIZE)) as executor:
+        futures = {executor.submit(run_quarter_worker, quarter, (watermarks or {}).get(quarter),
+                                   prior_key_hashes[quarter]): quarter
+                   for quarter in quarters}
+        for future in as_completed(futures):
+            quarter = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                summaries.append(future.result())
+                logger.info(f"{quarter} committed")
+            except Exception as e:
+                failures.append((quarter, e))
+                if not abort_event.is_set():
+                    abort_event.set()
+                for pending in futures:
+                    pending.cancel()
+
+    for summary in summaries:
+        fast_load.merge_load_stats(summary.pop('load_stats'))
+
+    if failures:
+        committed = sorted(summary['quarter'] for summary in summaries)
+        logger.error(f"Parallel load aborted - committed: {committed or 'none'}, failed/rolled back: {[q for q, _ in failures]}")
+        raise failures[0][1]
+
+    return sorted(summaries, key=lambda summary: quarters.index(summary['quarter']))
+
+def load_facts_sequential(quarters, target_conn, watermarks=None):
+    """
+    Sequential load - each quarter is one transaction: its facts, quarantine,
+    DQ_Metrics, aggregates (and watermark, incremental) commit together, and
+    only once the quarter passed the clean-data threshold
+    """
+    summaries = []
+    for quarter in quarters:
+        try:
+            summaries.append(load_facts_for_quarter(quarter, target_conn, EXTRACT_CHUNK_SIZE,
+                                                    (watermarks or {}).get(quarter)))
+            target_conn.commit()
+        except Exception:
+            target_conn.rollback()
+            logger.error(f"{quarter} rolled back" + (" - watermark unchanged" if watermarks else ""))
+            raise
+    return summaries
+
+def record_etl_run(target_conn, start_time, status, facts_loaded, run_mode=None):
+    """
+    Stamp the run in ETL_Runs. The API result cache treats a new run_id as
+    "warehouse data changed" and drops cached query results.
+    """
+    bulk_insert(target_conn, 'ETL_Runs', pd.DataFrame([{
+        'started_at': start_time,
+        'completed_at': datetime.now(),
+        'run_mode': run_mode or ('incremental' if INCREMENTAL else 'full'),
+        'status': status,
+        'facts_loaded': facts_loaded
+    }]))
+    target_conn.commit()
+
+def log_quarter_summaries(summaries):
+    """Aggregate per-quarter DQ stats (same totals for sequential and parallel runs)"""
+    totals = {}
+    for summary in summaries:
+        for key, value in summary['dq_stats'].items():
+            totals[key] = totals.get(key, 0) + value
+    logger.info(f"Quarters loaded: {', '.join(summary['quarter'] for summary in summaries)}")
+    logger.info(f"  Loaded: {sum(summary['loaded'] for summary in summaries):,}, "
+                f"Quarantined: {sum(summary['quarantined'] for summary in summaries):,}")
+    logger.info(f"  DQ violations: {', '.join(f'{key}={value:,}' for key, value in totals.items())}")
 
 # ============================================================
 # MAIN ETL
 # ============================================================
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Flight data warehouse ETL")
+    parser.add_argument('--writer', choices=list(WRITERS), default=LOAD_STRATEGY,
+                        help="Target load strategy (default: %(default)s)")
+    parser.add_argument('--local-db', default=LOCAL_TARGET_PATH,
+                        help="Database file for the sqlite/duckdb writers (default: %(default)s)")
+    parser.add_argument('--source-db', default=LOCAL_SOURCE_PATH,
+                        help="Source file (Q1-Q4) for the sqlite/duckdb writers, as loaded by "
+                             "IMPORT_CSV_FILES.py --local-db (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=PARALLEL_WORKERS,
+                        help="Worker processes for fact loading, 1 = sequential (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=EXTRACT_CHUNK_SIZE,
+                        help="Stream each quarter in chunks of this many rows (default: whole quarter)")
+    parser.add_argument('--incremental', action='store_true', default=INCREMENTAL,
+                        help="Process only source rows above the ETL_Watermarks high-water marks")
+    parser.add_argument('--rebuild-aggregates', action='store_true',
+                        help="Only recompute the Agg_Delays_* tables from the loaded Fact_Delays rows")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global LOAD_STRATEGY, LOCAL_TARGET_PATH, LOCAL_SOURCE_PATH, PARALLEL_WORKERS, EXTRACT_CHUNK_SIZE, INCREMENTAL, COMMIT_PER_BATCH
+    args = parse_args(argv)
+    setup_logging()
+    INCREMENTAL = args.incremental
+    # Transactions are committed explicitly: after the dimensions, then per quarter
+    COMMIT_PER_BATCH = False
+    LOAD_STRATEGY = args.writer
+    LOCAL_TARGET_PATH = args.local_db
+    LOCAL_SOURCE_PATH = args.source_db
+    EXTRACT_CHUNK_SIZE = args.chunk_size or None
+    PARALLEL_WORKERS = max(1, args.workers)
+    if PARALLEL_WORKERS > 1 and LOAD_STRATEGY in LOCAL_WRITERS:
+        logger.warning(f"{LOAD_STRATEGY} allows a single writer process - loading quarters sequentially")
+        PARALLEL_WORKERS = 1
+
+    if args.rebuild_aggregates:
+        start_time = datetime.now()
+        target_conn = get_target_connection()
+        try:
+            rebuild_aggregates(target_conn)
+            record_etl_run(target_conn, start_time, 'success', 0, run_mode='aggregates')
+        finally:
+            target_conn.close()
+        return
+
     start_time = datetime.now()
     logger.info("="*80)
     logger.info("FINAL ETL PIPELINE STARTED (Float Fix Applied)")
     logger.info(f"Start Time: {start_time}")
     logger.info("Configuration: 25 cols, 15 airlines, 100% DQ, >70% clean required")
+    logger.info(f"Writer: {LOAD_STRATEGY}, fact workers: {PARALLEL_WORKERS}, "
+                f"chunk size: {EXTRACT_CHUNK_SIZE or 'whole quarter'}, "
+                f"mode: {'incremental' if INCREMENTAL else 'full'}")
     logger.info("="*80)
 
+    target_conn = None
+    facts_started = False
     try:
-        target_conn = get_db_connection(TARGET_CONN_STR)
+        target_conn = get_target_connection()
 
         # STEP 1: Dimensions
         logger.info("\n" + "="*80)
         logger.info("STEP 1: LOADING DIMENSION TABLES")
         logger.info("="*80)
-        load_dim_date(target_conn)
-        load_dim_airline(target_conn)
-        load_dim_airport(target_conn)
+        watermarks = None
+        if INCREMENTAL:
+            watermarks = load_watermarks(target_conn, QUARTERS)
+            logger.info(f"High-water marks (flight_id): {watermarks}")
+            upsert_new_dimension_members(target_conn, watermarks)
+        else:
+            load_dim_date(target_conn)
+            load_dim_airline(target_conn)
+            load_dim_airport(target_conn)
+        target_conn.commit()
         logger.info("All dimensions loaded successfully!")
 
         # STEP 2: Facts
         logger.info("\n" + "="*80)
         logger.info("STEP 2: LOADING FACT TABLES")
         logger.info("="*80)
-        for quarter in ['Q1', 'Q2', 'Q3', 'Q4']:
-            load_facts_for_quarter(quarter, target_conn)
+        facts_started = True
+        if PARALLEL_WORKERS > 1:
+            summaries = load_facts_parallel(QUARTERS, min(PARALLEL_WORKERS, len(QUARTERS)), watermarks)
+        else:
+            summaries = load_facts_sequential(QUARTERS, target_conn, watermarks)
+        log_quarter_summaries(summaries)
+        if INCREMENTAL:
+            log_incremental_delta(watermarks, summaries)
+        record_etl_run(target_conn, start_time, 'success', sum(summary['loaded'] for summary in summaries))
 
         # STEP 3: Final Stats
         logger.info("\n" + "="*80)
@@ -617,12 +1446,20 @@ def main():
         logger.info(f"  Total Processed: {dq_summary[0]:,}")
         logger.info(f"  Clean: {dq_summary[1]:,} ({dq_summary[1]/dq_summary[0]*100:.2f}%)")
         logger.info(f"  Quarantined: {dq_summary[2]:,} ({dq_summary[2]/dq_summary[0]*100:.2f}%)")
+        log_load_stats()
         logger.info(f"\nExecution Time: {duration}")
         logger.info("="*80)
         logger.info("SUCCESS - ETL COMPLETED")
         logger.info("="*80)
 
     except Exception as e:
+        if facts_started:
+            # Quarters that committed before the failure changed the warehouse too
+            try:
+                target_conn.rollback()
+                record_etl_run(target_conn, start_time, 'failed', None)
+            except Exception as stamp_error:
+                logger.warning(f"Could not record failed run in ETL_Runs: {stamp_error}")
         logger.error(f"\n{'='*80}")
         logger.error(f"ETL PIPELINE FAILED: {e}")
         logger.error(f"{'='*80}")